@@ -0,0 +1,28 @@
+"""Index doctors.slack_id
+
+Revision ID: 4b7e2c9d1a3f
+Revises: cd0e54113d3d
+Create Date: 2026-10-19 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c9d1a3f'
+down_revision: Union[str, Sequence[str], None] = 'cd0e54113d3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_doctors_slack_id'), 'doctors', ['slack_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_doctors_slack_id'), table_name='doctors')
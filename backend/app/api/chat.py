@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.llm_service import process_chat_message
+from app.services.admission import AdmissionRejected, web_tenant
 from app.core.database import get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class ChatRequest(BaseModel):
@@ -20,6 +25,7 @@ class ChatResponse(BaseModel):
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     try:
@@ -29,12 +35,18 @@ async def chat_endpoint(
         result = await process_chat_message(
             user_message=request.message, 
             session_id=request.session_id,
-            user_id=user_id
+            user_id=user_id,
+            tenant=web_tenant(
+                http_request.client.host if http_request.client else None,
+                http_request.headers.get("X-Forwarded-For")
+            )
         )
         return ChatResponse(
             response=result["response"] or "No response generated.",
             session_id=result["session_id"]
         )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        print(f"API Error: {e}")
+        logger.exception("API Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
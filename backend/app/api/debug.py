@@ -0,0 +1,22 @@
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.core.profiling import PROFILE_FILES, profile_dir, verify_profile_request
+
+router = APIRouter()
+
+@router.get("/profiles/{profile_id}/{kind}", include_in_schema=False)
+async def download_profile(profile_id: str, kind: str, request: Request):
+    """Downloads a stored request profile. Requires a profiling signature for this path."""
+    # Unsigned requests get the same 404 as missing profiles, so the endpoint stays invisible
+    if not verify_profile_request(request.headers, request.method, request.url.path):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    directory = profile_dir(profile_id)
+    if not directory or kind not in PROFILE_FILES:
+        raise HTTPException(status_code=404, detail="Not found")
+    path = os.path.join(directory, PROFILE_FILES[kind])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, filename=f"{profile_id}-{PROFILE_FILES[kind]}")
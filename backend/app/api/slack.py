@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
 import hmac
 import hashlib
 import time
 import json
 import httpx
+from typing import Set
 from app.core.config import settings
+from app.core.logging import bind_request_id
+from app.core.tracing import span, trace_turn
+from app.core.deadline import io_timeout
+from app.core.metrics import SLACK_EVENTS, SLACK_RETRIES
 from app.services.llm_service import process_chat_message
+from app.services.admission import AdmissionRejected
+from app.services.session_locks import SessionBusy
+from app.services.mcp_tools import get_appointment_stats
+from app.services.doctor_directory import doctor_directory
+from app.services.slack_reports import USAGE_TEXT, parse_report_command, build_report_response
+from app.services.slack_events import EventDeduplicator, SlackEventQueue, QueueFullError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# The event loop only keeps weak references to tasks; hold late reports until they are posted
+late_reports: Set[asyncio.Task] = set()
+
 async def verify_slack_signature(request: Request):
     """Verifies that the request actually came from Slack."""
     if not settings.SLACK_SIGNING_SECRET:
@@ -37,15 +56,16 @@ async def verify_slack_signature(request: Request):
 async def send_slack_message(channel: str, text: str):
     """Helper to send a message back to Slack."""
     if not settings.SLACK_BOT_TOKEN:
-        print(f"No SLACK_BOT_TOKEN. Mock reply: {text}")
+        logger.debug("No SLACK_BOT_TOKEN. Mock reply to %s: %s", channel, text)
         return
         
     url = "https://slack.com/api/chat.postMessage"
     headers = {"Authorization": f"Bearer {settings.SLACK_BOT_TOKEN}"}
     payload = {"channel": channel, "text": text}
     
-    async with httpx.AsyncClient() as client:
-        await client.post(url, json=payload, headers=headers)
+    with span("slack.chat_postMessage", "slack"):
+        async with httpx.AsyncClient(timeout=io_timeout()) as client:
+            await client.post(url, json=payload, headers=headers)
 
 async def handle_slack_message(event: dict):
     """Processes the message via LLM and replies to Slack."""
@@ -61,16 +81,42 @@ async def handle_slack_message(event: dict):
 
     # Create a unique session ID for this Slack user
     session_id = f"slack_{user_id}"
-    
-    # Process with Gemini
-    response_data = await process_chat_message(text, session_id)
-    ai_response = response_data.get("response", "I'm sorry, I couldn't process that.")
-    
-    # Reply back
-    await send_slack_message(channel_id, ai_response)
+
+    # Queue workers have no HTTP request, so correlate this turn's logs by Slack message
+    with bind_request_id(f"slack-{event.get('client_msg_id') or event.get('ts')}"):
+        with trace_turn("slack.message", channel=channel_id) as trace:
+            # Resolve the Slack user to a doctor so the agent never has to ask who they are
+            doctor = await doctor_directory.get_by_slack_id(user_id)
+
+            # Process with Gemini
+            try:
+                response_data = await process_chat_message(
+                    text, session_id, doctor=doctor, tenant=f"slack:{event.get('team', 'unknown')}"
+                )
+                ai_response = response_data.get("response", "I'm sorry, I couldn't process that.")
+            except SessionBusy as e:
+                logger.warning("Slack turn gave up waiting for the previous one: %s", e)
+                ai_response = "I'm still working on your previous message. Please send this again in a moment."
+            except AdmissionRejected as e:
+                # The event is already acknowledged, so tell the user instead of letting Slack retry
+                logger.warning("Slack turn rejected: %s", e)
+                ai_response = f"I'm handling a lot of requests right now. Please try again in {e.retry_after} seconds."
+
+            # Reply back
+            await send_slack_message(channel_id, ai_response)
+        logger.info("Slack turn finished", extra={"total_ms": round(trace.total_ms, 1), "timing": trace.breakdown()})
+
+# Slack retries any event not acknowledged within 3 seconds, so the same
+# event_id can arrive several times while a slow LLM turn is still running.
+event_deduplicator = EventDeduplicator(ttl_seconds=settings.SLACK_EVENT_DEDUP_TTL_SECONDS)
+slack_event_queue = SlackEventQueue(
+    handle_slack_message,
+    maxsize=settings.SLACK_EVENT_QUEUE_MAXSIZE,
+    concurrency=settings.SLACK_EVENT_WORKERS
+)
 
 @router.post("/events")
-async def slack_events(request: Request, background_tasks: BackgroundTasks):
+async def slack_events(request: Request):
     data = await request.json()
     
     # 1. Handle URL Verification (Slack Challenge)
@@ -79,10 +125,104 @@ async def slack_events(request: Request, background_tasks: BackgroundTasks):
         
     # 2. Verify Signature for real events
     await verify_slack_signature(request)
+
+    if request.headers.get("X-Slack-Retry-Num"):
+        SLACK_RETRIES.labels(request.headers.get("X-Slack-Retry-Reason", "unknown")).inc()
     
     # 3. Handle Events (messages & mentions)
     event = data.get("event")
     if event and event.get("type") in ["message", "app_mention"] and not event.get("subtype"):
-        background_tasks.add_task(handle_slack_message, event)
+        event_id = data.get("event_id") or f"{event.get('channel')}:{event.get('ts')}"
+        if not event_deduplicator.check_and_mark(event_id):
+            SLACK_EVENTS.labels("duplicate").inc()
+            return {"status": "duplicate"}
+
+        try:
+            slack_event_queue.submit(event)
+        except QueueFullError as e:
+            # Let Slack retry later; forget the ID so the retry is not dropped as a duplicate
+            event_deduplicator.forget(event_id)
+            SLACK_EVENTS.labels("rejected").inc()
+            logger.warning("Rejecting Slack event %s: %s", event_id, e)
+            return JSONResponse(
+                status_code=503,
+                content={"status": "busy"},
+                headers={"Retry-After": "5"}
+            )
+        SLACK_EVENTS.labels("accepted").inc()
         
     return {"status": "ok"}
+
+async def build_slash_report(slack_user_id: str, text: str) -> dict:
+    """Answers `/mediassist <period> [filter]` straight from the stats tool, without the LLM."""
+    parsed = parse_report_command(text)
+    if not parsed:
+        return {"response_type": "ephemeral", "text": USAGE_TEXT}
+    query_type, filter_by = parsed
+
+    doctor = await doctor_directory.get_by_slack_id(slack_user_id)
+    if not doctor:
+        return {
+            "response_type": "ephemeral",
+            "text": "Your Slack account is not linked to a doctor profile yet. Please contact the clinic admin."
+        }
+
+    stats = await get_appointment_stats(
+        doctor_name=doctor["name"],
+        query_type=query_type,
+        filter_by=filter_by,
+        doctor_id=doctor["id"]
+    )
+    return build_report_response(stats, filter_by)
+
+# Shown instead of the exception, which can carry SQL or driver details
+REPORT_FAILED = {"response_type": "ephemeral", "text": "⚠️ Could not build the report. Please try again later."}
+
+async def deliver_late_report(report_task: asyncio.Task, response_url: str):
+    """Posts a report that missed Slack's 3-second window to the command's response_url."""
+    try:
+        report = await report_task
+    except Exception:
+        logger.exception("Slash-command report failed")
+        report = REPORT_FAILED
+    try:
+        with span("slack.response_url", "slack"):
+            async with httpx.AsyncClient(timeout=io_timeout()) as client:
+                await client.post(response_url, json=report)
+    except Exception as e:
+        logger.warning("Could not post late slash-command report: %s", e)
+
+async def drain_late_reports(timeout: float = 30.0):
+    """Waits for late reports still being built or posted; cancels whatever is left after `timeout`."""
+    if not late_reports:
+        return
+    pending = list(late_reports)
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    if still_running:
+        logger.warning("Dropping %d late slash-command reports at shutdown.", len(still_running))
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+@router.post("/commands")
+async def slack_commands(request: Request):
+    await verify_slack_signature(request)
+    form = await request.form()
+
+    report_task = asyncio.create_task(build_slash_report(form.get("user_id"), form.get("text", "")))
+    try:
+        # Slack only waits 3 seconds for the immediate response
+        return await asyncio.wait_for(asyncio.shield(report_task), timeout=settings.SLACK_COMMAND_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        response_url = form.get("response_url")
+        if not response_url:
+            report_task.cancel()
+            return {"response_type": "ephemeral", "text": "⚠️ The report took too long. Please try again."}
+        task = asyncio.create_task(deliver_late_report(report_task, response_url))
+        late_reports.add(task)
+        task.add_done_callback(late_reports.discard)
+        return {"response_type": "ephemeral", "text": "⏳ Fetching your report…"}
+    except Exception:
+        # Answer Slack either way; a 500 shows up as "dispatch_failed"
+        logger.exception("Slash-command report failed")
+        return REPORT_FAILED
@@ -0,0 +1,74 @@
+"""
+Per-turn deadline shared by everything a chat turn awaits.
+
+process_chat_message opens a turn_deadline(); LLM and tool calls run through
+within_deadline(), which cancels them once the budget is spent, and outbound
+clients size their timeouts with io_timeout(). Outside a turn (background
+workers, the MCP server) there is no deadline and io_timeout() falls back to
+OUTBOUND_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("turn_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current turn's time budget has run out."""
+
+
+@contextmanager
+def turn_deadline(seconds: float) -> Iterator[float]:
+    """Sets the deadline for the block. A nested deadline can only shorten the outer one."""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left in the current turn (never negative), or `default` outside a turn."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    return max(0.0, deadline - time.monotonic())
+
+
+def io_timeout(cap: Optional[float] = None) -> float:
+    """Timeout for one outbound call: the time left in the turn, capped at OUTBOUND_TIMEOUT_SECONDS."""
+    cap = cap or settings.OUTBOUND_TIMEOUT_SECONDS
+    left = remaining(cap)
+    if left <= 0:
+        raise DeadlineExceeded("Turn deadline exceeded before the call started")
+    return min(cap, left)
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Awaits under the current deadline, cancelling the work if it runs past it."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Close the coroutine so it is not reported as never awaited
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Turn deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError:
+        if remaining() > 0:
+            raise  # A timeout raised by the work itself
+        raise DeadlineExceeded("Turn deadline exceeded") from None
@@ -0,0 +1,189 @@
+"""
+Structured, non-blocking logging for the `app.*` loggers.
+
+Callers only put the LogRecord on an in-memory queue. A QueueListener thread
+does the expensive part: message formatting, PII redaction, JSON encoding and
+the write to stderr (stderr keeps stdout clean for the MCP stdio transport).
+Every record carries the current correlation ID (X-Request-ID for HTTP
+requests, the Slack message for queue workers).
+
+Use lazy %-style arguments, or guard with isEnabledFor() when building the
+arguments is itself costly, so disabled levels cost almost nothing:
+
+    logger.debug("Tool %s args=%s", name, args)
+    logger.info("Tool finished", extra={"tool": name, "ms": 12.3})
+
+`extra` keys become top-level JSON fields; they must not reuse LogRecord
+attribute names such as `args` or `msg`.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator, Optional
+
+from app.core.config import settings
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+
+SENSITIVE_KEYS = {"patient", "patient_email", "patient_name", "email", "attendee_email", "phone", "password", "token"}
+EMAIL_RE = re.compile(r"([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})")
+PHONE_RE = re.compile(r"\+\d{1,3}[\s-]?\d{4,12}(\d{2})\b")
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+def get_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Keeps a well-formed incoming X-Request-ID, otherwise makes a new one."""
+    if incoming and REQUEST_ID_RE.match(incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def bind_request_id(request_id: Optional[str] = None) -> Iterator[str]:
+    """Sets the correlation ID for everything logged inside the block."""
+    request_id = new_request_id(request_id)
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+
+def redact(text: str) -> str:
+    """Masks email addresses and phone numbers, keeping just enough to tell them apart."""
+    text = EMAIL_RE.sub(r"\1***@\2", text)
+    return PHONE_RE.sub(r"+***\1", text)
+
+
+def redact_fields(value: Any) -> Any:
+    """Masks values stored under sensitive keys, recursing into dicts and lists."""
+    if isinstance(value, dict):
+        return {k: "***" if k in SENSITIVE_KEYS else redact_fields(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_fields(v) for v in value]
+    return value
+
+
+class _StructuredFormatter(logging.Formatter):
+    def __init__(self, redact_pii: bool = True):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def extras(self, record: logging.LogRecord) -> dict:
+        fields = {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS}
+        return redact_fields(fields) if self.redact_pii else fields
+
+    def finish(self, text: str) -> str:
+        return redact(text) if self.redact_pii else text
+
+
+class JsonFormatter(_StructuredFormatter):
+    """One JSON object per line, for log shipping."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "msg": record.getMessage(),
+            **self.extras(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return self.finish(json.dumps(entry, default=str, ensure_ascii=False))
+
+
+class TextFormatter(_StructuredFormatter):
+    """Human-readable lines for local development."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S.%f")[:-3]
+        line = f"{timestamp} {record.levelname:<7} [{getattr(record, 'request_id', None) or '-'}] {record.name}: {record.getMessage()}"
+        extras = self.extras(record)
+        if extras:
+            line += " " + " ".join(f"{k}={v}" for k, v in extras.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return self.finish(line)
+
+
+class _RequestIdFilter(logging.Filter):
+    # Runs on the caller's thread, where the correlation contextvar is visible
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener unformatted and drops them if the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread; the listener does it instead
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> logging.Logger:
+    """Routes the `app` logger through a background queue listener. Safe to call more than once."""
+    global _listener, _handler
+    logger = logging.getLogger("app")
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    if _listener is not None:
+        return logger
+
+    formatter_cls = JsonFormatter if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter_cls(redact_pii=settings.LOG_REDACT_PII))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAXSIZE)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(_RequestIdFilter())
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    logger.addHandler(_handler)
+    logger.propagate = False
+    return logger
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logger = logging.getLogger("app")
+    logger.removeHandler(_handler)
+    logger.propagate = True
+    if _handler.dropped:
+        logging.getLogger("app").warning("Dropped %d log records because the log queue was full", _handler.dropped)
+    _listener, _handler = None, None
@@ -0,0 +1,166 @@
+"""
+Prometheus metrics served at /metrics.
+
+Tool, LLM, DB and outbound integration latencies are fed from the tracing
+spans (see app/core/tracing.py), so every instrumented call is measured once
+and shows up in both places.
+
+With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an
+empty directory shared by the workers; /metrics then aggregates all of them
+instead of reporting only the worker that happened to answer the scrape.
+"""
+
+import os
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from app.core.tracing import add_span_observer
+
+# Seconds; LLM calls and whole turns run much longer than single queries
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=SLOW_BUCKETS
+)
+AGENT_LOOP_ITERATIONS = Histogram(
+    "agent_loop_iterations", "Tool-call iterations per chat turn",
+    ["mode"], buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10)
+)
+TURN_CUTOFFS = Counter(
+    "agent_turn_cutoffs_total", "Chat turns stopped early with a partial answer", ["reason"]
+)
+INTENT_ROUTER_REQUESTS = Counter(
+    "intent_router_requests_total", "Intent router outcomes", ["outcome"]
+)
+INTENT_ROUTER_DURATION = Histogram(
+    "intent_router_duration_seconds", "Latency of turns answered by the intent router",
+    ["intent"], buckets=FAST_BUCKETS
+)
+TOOL_DURATION = Histogram(
+    "tool_duration_seconds", "Tool latency by tool name",
+    ["tool", "outcome"], buckets=FAST_BUCKETS + (5.0, 10.0)
+)
+LLM_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM call latency",
+    ["call", "outcome"], buckets=SLOW_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens used", ["provider", "kind"]
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", buckets=FAST_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_in_use", "Connections checked out of the pool", multiprocess_mode="livesum"
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured pool size (excluding overflow)", multiprocess_mode="livesum"
+)
+OUTBOUND_DURATION = Histogram(
+    "outbound_request_duration_seconds", "Outbound integration latency",
+    ["integration", "operation"], buckets=SLOW_BUCKETS
+)
+OUTBOUND_ERRORS = Counter(
+    "outbound_request_errors_total", "Outbound integration calls that raised", ["integration", "operation"]
+)
+SLACK_EVENTS = Counter(
+    "slack_events_total", "Slack events received", ["outcome"]
+)
+SLACK_RETRIES = Counter(
+    "slack_event_retries_total", "Slack redeliveries (X-Slack-Retry-Num present)", ["reason"]
+)
+SLACK_QUEUE_DEPTH = Gauge(
+    "slack_event_queue_depth", "Slack events waiting for a worker", multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Chat turns waiting for an LLM slot", multiprocess_mode="livesum"
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Chat turns holding an LLM slot", multiprocess_mode="livesum"
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds", "Time chat turns waited for an LLM slot",
+    ["outcome"], buckets=FAST_BUCKETS + (5.0, 10.0, 30.0)
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total", "Chat turns turned away by admission control", ["reason"]
+)
+SESSION_LOCK_WAIT = Histogram(
+    "session_lock_wait_seconds", "Time chat turns waited for an earlier turn of the same session",
+    ["backend"], buckets=FAST_BUCKETS + (5.0, 10.0, 30.0)
+)
+TOOL_MEMO_LOOKUPS = Counter(
+    "tool_memo_lookups_total", "Read-only tool calls served from (hit) or missing the per-session memo",
+    ["tool", "outcome"]
+)
+AVAILABILITY_CACHE_LOOKUPS = Counter(
+    "availability_cache_lookups_total", "Shared free-slot cache lookups",
+    ["outcome"]  # hit, miss, coalesced (joined a computation already running), error
+)
+TOOL_CALLS_COALESCED = Counter(
+    "tool_calls_coalesced_total", "Read-only tool calls that joined an identical call already in flight", ["tool"]
+)
+BOOKING_CONFLICTS = Counter(
+    "booking_conflicts_total", "Bookings rejected because the slot was already taken"
+)
+
+OUTBOUND_CATEGORIES = {"slack", "smtp", "calendar"}
+
+
+def _observe_span(name: str, category: str, seconds: float, failed: bool):
+    operation = name.split(".", 1)[-1]
+    outcome = "error" if failed else "ok"
+    if category == "tool":
+        TOOL_DURATION.labels(operation, outcome).observe(seconds)
+    elif category == "llm":
+        LLM_DURATION.labels(operation, outcome).observe(seconds)
+    elif category == "db":
+        DB_QUERY_DURATION.observe(seconds)
+    elif category in OUTBOUND_CATEGORIES:
+        OUTBOUND_DURATION.labels(category, operation).observe(seconds)
+        if failed:
+            OUTBOUND_ERRORS.labels(category, operation).inc()
+
+
+add_span_observer(_observe_span)
+
+
+def observe_llm_usage(provider: str, usage: Dict[str, int]):
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.labels(provider, kind.split("_")[0]).inc(usage[kind])
+
+
+def instrument_pool(engine):
+    """Tracks pool utilization from checkout/checkin events."""
+    from sqlalchemy import event
+
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "size"):
+        DB_POOL_SIZE.set(pool.size())
+
+    # The checkin event fires before the pool's own counter is decremented, so count here
+    event.listen(pool, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(pool, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Returns the exposition body and its content type, merging workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,183 @@
+"""
+On-demand profiling of single live requests.
+
+Opt-in twice: PROFILING_ENABLED must be on, and the request must carry a
+signature made with PROFILING_SECRET (same scheme as Slack's):
+
+    X-Profile-Timestamp: <unix seconds>
+    X-Profile-Signature: v0=<hex HMAC-SHA256 of "v0:<timestamp>:<METHOD>:<path>">
+
+Such a request runs under pyinstrument (HTML + speedscope JSON) when it is
+installed, or cProfile (.prof + text summary) otherwise, while tracemalloc
+counts its allocations. The files are written to PROFILING_OUTPUT_DIR and the
+response carries X-Profile-Id and X-Profile-Allocations headers; the files
+can be downloaded from /api/debug/profiles/{id}/{kind} with a signature for
+that path.
+
+Only one request is profiled at a time. pyinstrument follows the request's
+own task; cProfile and tracemalloc see everything on the event loop, so
+profile on a quiet worker when using them.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.core.config import settings
+
+SIGNATURE_MAX_AGE_SECONDS = 300
+
+PROFILE_FILES = {
+    "html": "profile.html",
+    "speedscope": "speedscope.json",
+    "prof": "profile.prof",
+    "text": "profile.txt",
+    "summary": "summary.json",
+}
+
+_busy = False
+
+
+def sign_profile_request(secret: str, timestamp: str, method: str, path: str) -> str:
+    basestring = f"v0:{timestamp}:{method.upper()}:{path}"
+    return "v0=" + hmac.new(secret.encode("utf-8"), basestring.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_profile_request(headers: Mapping[str, str], method: str, path: str) -> bool:
+    """True only if profiling is enabled and the request is signed with PROFILING_SECRET."""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_SECRET:
+        return False
+    timestamp = headers.get("X-Profile-Timestamp")
+    signature = headers.get("X-Profile-Signature")
+    if not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > SIGNATURE_MAX_AGE_SECONDS:
+            return False
+    except ValueError:
+        return False
+    expected = sign_profile_request(settings.PROFILING_SECRET, timestamp, method, path)
+    return hmac.compare_digest(expected, signature)
+
+
+def profile_dir(profile_id: str) -> Optional[str]:
+    """Directory holding a stored profile, or None for malformed IDs."""
+    if not profile_id.isalnum():
+        return None
+    return os.path.join(settings.PROFILING_OUTPUT_DIR, profile_id)
+
+
+class RequestProfile:
+    """Profiles and allocation-traces one request."""
+
+    def __init__(self, label: str, top_allocations: int = 15):
+        self.id = uuid.uuid4().hex[:16]
+        self.label = label
+        self.top_allocations = top_allocations
+        self.summary: Dict[str, Any] = {}
+        self._profiler = None
+        self._started_tracing = False
+        self._snapshot = None
+        self._started = 0.0
+
+    @staticmethod
+    def acquire() -> bool:
+        """Claims the single profiling slot; False if another request holds it."""
+        global _busy
+        if _busy:
+            return False
+        _busy = True
+        return True
+
+    @staticmethod
+    def release():
+        global _busy
+        _busy = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._snapshot = tracemalloc.take_snapshot()
+
+        self._started = time.perf_counter()
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="enabled")
+            self._profiler.start()
+        except ImportError:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @property
+    def profiler_name(self) -> str:
+        return "cProfile" if isinstance(self._profiler, cProfile.Profile) else "pyinstrument"
+
+    def stop(self) -> Dict[str, Any]:
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        duration_ms = (time.perf_counter() - self._started) * 1000
+
+        _, peak = tracemalloc.get_traced_memory()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = after.compare_to(self._snapshot.filter_traces(ignore), "lineno")
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        grown = [d for d in diff if d.size_diff > 0]
+        self.summary = {
+            "id": self.id,
+            "request": self.label,
+            "profiler": self.profiler_name,
+            "duration_ms": round(duration_ms, 2),
+            "alloc_blocks": sum(d.count_diff for d in grown),
+            "alloc_kib": round(sum(d.size_diff for d in grown) / 1024, 1),
+            "peak_kib": round(peak / 1024, 1),
+            "top_allocations": [
+                {"where": str(d.traceback[0]), "kib": round(d.size_diff / 1024, 1), "blocks": d.count_diff}
+                for d in grown[:self.top_allocations]
+            ],
+        }
+        return self.summary
+
+    def allocation_header(self) -> str:
+        s = self.summary
+        return f"blocks={s['alloc_blocks']}; kib={s['alloc_kib']}; peak_kib={s['peak_kib']}"
+
+    def save(self) -> List[str]:
+        """Writes the profile files and returns their kinds."""
+        directory = profile_dir(self.id)
+        os.makedirs(directory, exist_ok=True)
+        kinds = ["summary"]
+
+        if self.profiler_name == "pyinstrument":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            self._write(directory, "html", self._profiler.output_html())
+            self._write(directory, "speedscope", self._profiler.output(renderer=SpeedscopeRenderer()))
+            kinds += ["html", "speedscope"]
+        else:
+            self._profiler.dump_stats(os.path.join(directory, PROFILE_FILES["prof"]))
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(60)
+            self._write(directory, "text", text.getvalue())
+            kinds += ["prof", "text"]
+
+        self._write(directory, "summary", json.dumps({**self.summary, "files": kinds}, indent=2))
+        return kinds
+
+    @staticmethod
+    def _write(directory: str, kind: str, content: str):
+        with open(os.path.join(directory, PROFILE_FILES[kind]), "w", encoding="utf-8") as f:
+            f.write(content)
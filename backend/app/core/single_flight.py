@@ -0,0 +1,71 @@
+"""
+Single-flight coalescing of concurrent identical work.
+
+While a computation for a key is running, later callers for the same key wait
+for its result instead of starting their own. The work runs as its own task,
+so a caller that is cancelled (e.g. by its turn deadline) stops waiting
+without cancelling it for everyone else. Only in-flight work is shared;
+nothing is cached once it finishes.
+
+`coalesced` applies this to read-only tool functions: concurrent calls with
+equal arguments (a Slack report and the web UI asking at the same moment, a
+crowd of patients checking one doctor at 9 AM) run one query between them.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.core.config import settings
+from app.core.metrics import TOOL_CALLS_COALESCED
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Runs `work()` unless it is already running for `key`. Returns (result, shared)."""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if not shared:
+            flight = self._flights[key] = asyncio.ensure_future(work())
+            flight.add_done_callback(lambda f: self._land(key, f))
+        return await asyncio.shield(flight), shared
+
+    def _land(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Marks a failure as retrieved even if every waiter was cancelled
+            flight.exception()
+
+
+_tool_flights = SingleFlight()
+
+
+def coalesced(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Decorator for read-only async tools. Joiners get a deep copy of the shared result."""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not settings.TOOL_COALESCING_ENABLED:
+            return await func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # Positional and keyword spellings of the same call share a key
+        key = (func.__name__, json.dumps(bound.arguments, sort_keys=True, default=str))
+        result, shared = await _tool_flights.do(key, lambda: func(*args, **kwargs))
+        if shared:
+            TOOL_CALLS_COALESCED.labels(func.__name__).inc()
+            return copy.deepcopy(result)
+        return result
+
+    return wrapper
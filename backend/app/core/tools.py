@@ -1,131 +1,155 @@
+"""
+Tool registry: the functions the agent can call and their declarations.
+
+TOOL_DECLARATIONS is the single schema source. The Gemini provider compiles
+it once into FunctionDeclarations, the MCP server lists it as-is, and
+TOOLS_SCHEMA wraps it for OpenAI-style clients. Parameter names match the
+signatures in app.services.mcp_tools, so arguments pass straight through.
+"""
+
+from typing import Any, Dict, List
+
 from app.services.mcp_tools import check_doctor_availability, book_appointment, get_appointment_stats, list_doctors, send_doctor_notification
 
-# Tool Schemas for OpenAI/LLM
-TOOLS_SCHEMA = [
+_CURSOR = {
+    "type": "string",
+    "description": "Optional next_cursor from a previous result, to fetch the rest of a long list."
+}
+
+TOOL_DECLARATIONS: List[Dict[str, Any]] = [
     {
-        "type": "function",
-        "function": {
-            "name": "check_doctor_availability",
-            "description": "Check available appointment slots for a doctor on a specific date.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_name": {
-                        "type": "string",
-                        "description": "The name of the doctor (e.g. 'Dr. Ahuja')"
-                    },
-                    "date": {
-                        "type": "string",
-                        "description": "The date to check in YYYY-MM-DD format (e.g. '2026-01-20')"
-                    },
-                    "time_preference": {
-                        "type": "string",
-                        "description": "Optional preference like 'morning', 'afternoon' (not strictly used by logic yet but helpful context)"
-                    }
+        "name": "check_doctor_availability",
+        "description": "Check available appointment slots for a doctor on a specific date.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "doctor_name": {
+                    "type": "string",
+                    "description": "The name of the doctor (e.g. 'Dr. Ahuja'). Not needed when doctor_id is given."
                 },
-                "required": ["doctor_name", "date"]
-            }
+                "date_str": {
+                    "type": "string",
+                    "description": "The date to check in YYYY-MM-DD format (e.g. '2026-01-20')"
+                },
+                "time_preference": {
+                    "type": "string",
+                    "description": "Optional preference like 'morning', 'afternoon'"
+                },
+                "doctor_id": {
+                    "type": "integer",
+                    "description": "Optional doctor ID, if already known. Skips the name search."
+                }
+            },
+            "required": ["date_str"]
         }
     },
     {
-        "type": "function",
-        "function": {
-            "name": "book_appointment",
-            "description": "Book a new appointment for a patient. USE THIS tool whenever a user provides booking details (email, date, reason) OR asks for an email confirmation. It automatically sends the Email and Calendar invite.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_id": {
-                        "type": "integer",
-                        "description": "The ID of the doctor (obtained from check_doctor_availability)"
-                    },
-                    "patient_name": {
-                        "type": "string",
-                        "description": "Full name of the patient"
-                    },
-                    "patient_email": {
-                        "type": "string",
-                        "description": "Email address of the patient"
-                    },
-                    "appointment_time": {
-                        "type": "string",
-                        "description": "The exact ISO timestamp for the appointment (e.g. '2026-01-20T10:00:00'. Obtained from check_doctor_availability slots)"
-                    },
-                    "reason": {
-                        "type": "string",
-                        "description": "Reason for the visit (e.g. 'Fever', 'Routine Checkup')"
-                    }
+        "name": "book_appointment",
+        "description": "Book a new appointment for a patient. USE THIS tool whenever a user provides booking details (email, date, reason) OR asks for an email confirmation. It automatically sends the Email and Calendar invite.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "doctor_id": {
+                    "type": "integer",
+                    "description": "The ID of the doctor (obtained from check_doctor_availability)"
+                },
+                "patient_name": {
+                    "type": "string",
+                    "description": "Full name of the patient"
+                },
+                "patient_email": {
+                    "type": "string",
+                    "description": "Email address of the patient"
                 },
-                "required": ["doctor_id", "patient_name", "patient_email", "appointment_time"]
-            }
+                "appointment_time_str": {
+                    "type": "string",
+                    "description": "The exact ISO timestamp for the appointment (e.g. '2026-01-20T10:00:00'. Obtained from check_doctor_availability slots)"
+                },
+                "reason": {
+                    "type": "string",
+                    "description": "Reason for the visit (e.g. 'Fever', 'Routine Checkup')"
+                }
+            },
+            "required": ["doctor_id", "patient_name", "patient_email", "appointment_time_str"]
         }
     },
     {
-        "type": "function",
-        "function": {
-            "name": "get_appointment_stats",
-            "description": "Get appointment statistics and summary for a doctor.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_name": {
-                        "type": "string",
-                        "description": "The name of the doctor"
-                    },
-                    "query_type": {
-                        "type": "string",
-                        "enum": ["today", "tomorrow", "yesterday", "this_week", "daily", "weekly"],
-                        "description": "The time period to query stats for. (User friendly options: daily, weekly)"
-                    },
-                    "filter_by": {
-                        "type": "string",
-                        "description": "Optional keyword to filter by reason (e.g. 'fever')"
-                    }
+        "name": "get_appointment_stats",
+        "description": "Get appointment statistics and summary for a doctor. Used for generating reports about patient visits.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "doctor_name": {
+                    "type": "string",
+                    "description": "The name of the doctor. Not needed when doctor_id is given."
+                },
+                "query_type": {
+                    "type": "string",
+                    "enum": ["today", "tomorrow", "yesterday", "this_week", "daily", "weekly"],
+                    "description": "The time period to query stats for. (User friendly options: daily, weekly)"
+                },
+                "filter_by": {
+                    "type": "string",
+                    "description": "Optional keyword to filter by reason (e.g. 'fever')"
                 },
-                "required": ["doctor_name", "query_type"]
-            }
+                "doctor_id": {
+                    "type": "integer",
+                    "description": "Optional doctor ID, if already known (e.g. the doctor you are talking to). Skips the name search."
+                },
+                "cursor": _CURSOR
+            },
+            "required": ["query_type"]
         }
     },
     {
-        "type": "function",
-        "function": {
-            "name": "list_doctors",
-            "description": "List all registered doctors and their IDs.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "specialization": {
-                        "type": "string",
-                        "description": "Optional specialization to filter doctors by (e.g. 'Cardiologist', 'Dentist')."
-                    }
+        "name": "list_doctors",
+        "description": "List all registered doctors with their IDs and specializations. Use this when you need to find a doctor's ID.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "specialization": {
+                    "type": "string",
+                    "description": "Optional specialization to filter doctors by (e.g. 'Cardiologist', 'Dentist')."
                 },
-                "required": []
-            }
+                "cursor": _CURSOR
+            },
+            "required": []
         }
     },
     {
-        "type": "function",
-        "function": {
-            "name": "send_doctor_notification",
-            "description": "Send a notification to a doctor via Slack/External Channel.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "doctor_name": {
-                        "type": "string",
-                        "description": "Name of the doctor to notify."
-                    },
-                    "message": {
-                        "type": "string",
-                        "description": " The message content to send."
-                    }
+        "name": "send_doctor_notification",
+        "description": "Send a notification to a doctor via Slack. Used for urgent messages or report delivery.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "doctor_name": {
+                    "type": "string",
+                    "description": "Name of the doctor to notify."
+                },
+                "message": {
+                    "type": "string",
+                    "description": "The message content to send."
                 },
-                "required": ["doctor_name", "message"]
-            }
+                "channel": {
+                    "type": "string",
+                    "description": "Notification channel (default: 'slack')"
+                }
+            },
+            "required": ["doctor_name", "message"]
         }
     }
 ]
 
+# OpenAI-style function specs
+TOOLS_SCHEMA = [{"type": "function", "function": declaration} for declaration in TOOL_DECLARATIONS]
+
+
+def tool_arguments(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps only the arguments the tool declares, dropping anything a client made up."""
+    declared = next((d["parameters"]["properties"] for d in TOOL_DECLARATIONS if d["name"] == name), {})
+    return {k: v for k, v in arguments.items() if k in declared}
+
+
 # Mapping string names to actual functions
 AVAILABLE_TOOLS = {
     "check_doctor_availability": check_doctor_availability,
@@ -0,0 +1,203 @@
+"""
+Per-turn tracing.
+
+Every request (and every Slack event handled by a queue worker) runs inside a
+`trace_turn`. Code along the way opens spans with `span(name, category)`:
+LLM calls, tool invocations, SQL statements, and outbound Slack, SMTP and
+Calendar calls. Spans are always summed per category into a breakdown that
+the HTTP middleware returns as a `Server-Timing` header. When
+TRACING_OTLP_ENDPOINT is set and the OpenTelemetry SDK is installed, the same
+spans are exported to that collector.
+
+Categories nest (a tool's time includes the SQL it runs), so the breakdown
+is not meant to add up to the total.
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+# Set by setup_tracing() when OpenTelemetry export is configured
+_tracer = None
+
+# Called as observer(name, category, seconds, failed) whenever a span ends
+_span_observers: List[Callable[[str, str, float, bool], None]] = []
+
+
+def add_span_observer(observer: Callable[[str, str, float, bool], None]):
+    """Registers a callback for every finished span, traced or not (used by app.core.metrics)."""
+    _span_observers.append(observer)
+
+
+def _notify(name: str, category: str, seconds: float, failed: bool):
+    for observer in _span_observers:
+        try:
+            observer(name, category, seconds, failed)
+        except Exception as e:
+            logger.warning("Span observer failed: %s", e)
+
+
+class TurnTrace:
+    """Collects span timings for one request or Slack turn."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, name: str, category: str, duration_ms: float):
+        self.spans.append({"name": name, "category": category, "ms": duration_ms})
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Total time and span count per category."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            entry = totals.setdefault(s["category"], {"ms": 0.0, "count": 0})
+            entry["ms"] += s["ms"]
+            entry["count"] += 1
+        return totals
+
+    def server_timing(self) -> str:
+        """Formats the breakdown as a Server-Timing header value."""
+        parts = [
+            f'{category};dur={entry["ms"]:.1f};desc="{entry["count"]} calls"'
+            for category, entry in self.breakdown().items()
+        ]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        parts = [f"{c}={e['ms']:.0f}ms/{e['count']}" for c, e in self.breakdown().items()]
+        return f"{self.name}: total={self.total_ms:.0f}ms " + " ".join(parts)
+
+
+def current_trace() -> Optional[TurnTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_turn(name: str, **attributes) -> Iterator[TurnTrace]:
+    """Starts a new trace (and root span) for the duration of the block."""
+    trace = TurnTrace(name)
+    token = _current_trace.set(trace)
+    try:
+        if _tracer is not None:
+            with _tracer.start_as_current_span(name, attributes=_clean(attributes)):
+                yield trace
+        else:
+            yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str, **attributes) -> Iterator[None]:
+    """Times the block as one span in `category` (llm, tool, db, slack, smtp, calendar)."""
+    trace = _current_trace.get()
+    started = time.perf_counter()
+    failed = False
+    try:
+        if _tracer is not None:
+            with _tracer.start_as_current_span(name, attributes={"category": category, **_clean(attributes)}):
+                yield
+        else:
+            yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        if trace is not None:
+            trace.add(name, category, duration * 1000)
+        _notify(name, category, duration, failed)
+
+
+def record_span(name: str, category: str, started: float, **attributes):
+    """Records a span that has already finished; `started` is a perf_counter() reading."""
+    duration = time.perf_counter() - started
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, category, duration * 1000)
+    _notify(name, category, duration, False)
+    if _tracer is not None:
+        end_ns = time.time_ns()
+        otel_span = _tracer.start_span(
+            name,
+            start_time=end_ns - int(duration * 1e9),
+            attributes={"category": category, **_clean(attributes)}
+        )
+        otel_span.end(end_time=end_ns)
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # OpenTelemetry only accepts primitive attribute values
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items() if v is not None}
+
+
+def instrument_engine(engine):
+    """Records every SQL statement run on the (async) engine as a `db` span."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("trace_started")
+        if stack:
+            record_span("db.query", "db", stack.pop(), statement=statement.split(None, 1)[0].upper())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(exception_context):
+        stack = exception_context.connection.info.get("trace_started") if exception_context.connection else None
+        if stack:
+            stack.pop()
+
+
+def setup_tracing(service_name: Optional[str] = None) -> bool:
+    """Enables OpenTelemetry export if TRACING_OTLP_ENDPOINT is set. Returns True when exporting."""
+    global _tracer
+    if not settings.TRACING_OTLP_ENDPOINT or _tracer is not None:
+        return _tracer is not None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("TRACING_OTLP_ENDPOINT is set but OpenTelemetry is not installed; "
+                       "run `pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http`.")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name or settings.TRACING_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("mediassist")
+    logger.info("Exporting traces to %s", settings.TRACING_OTLP_ENDPOINT)
+    return True
+
+
+def shutdown_tracing():
+    """Flushes spans still buffered for export."""
+    global _tracer
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+    _tracer = None
@@ -0,0 +1,51 @@
+# LLM Provider Package
+from typing import Any, Callable, Dict
+
+from app.core.config import settings
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+
+
+def _gemini_factory(tools: Dict[str, Callable], system_instruction: str) -> LLMProvider:
+    from app.core.tools import TOOL_DECLARATIONS
+    from app.llm.gemini import GeminiProvider
+    return GeminiProvider([d for d in TOOL_DECLARATIONS if d["name"] in tools], system_instruction)
+
+
+def _scripted_factory(tools: Dict[str, Callable], system_instruction: str) -> LLMProvider:
+    from app.llm.scripted import ScriptedProvider, load_script
+    script = load_script(settings.LLM_SCRIPT_PATH) if settings.LLM_SCRIPT_PATH else None
+    return ScriptedProvider(
+        script=script,
+        latency_ms=settings.LLM_SCRIPTED_LATENCY_MS,
+        jitter_ms=settings.LLM_SCRIPTED_JITTER_MS,
+        seed=settings.LLM_SCRIPTED_SEED
+    )
+
+
+PROVIDERS: Dict[str, Callable[[Dict[str, Callable], str], LLMProvider]] = {
+    "gemini": _gemini_factory,
+    "scripted": _scripted_factory,
+}
+
+
+def register_provider(name: str, factory: Callable[[Dict[str, Callable], str], LLMProvider]):
+    """Adds a backend (e.g. an Anthropic or OpenAI provider) selectable via LLM_PROVIDER."""
+    PROVIDERS[name] = factory
+
+
+def create_provider(tools: Dict[str, Callable], system_instruction: str, name: str = None) -> LLMProvider:
+    name = name or settings.LLM_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Available: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name](tools, system_instruction)
+
+
+__all__ = [
+    "ChatSession",
+    "FunctionCall",
+    "LLMProvider",
+    "LLMResponse",
+    "PROVIDERS",
+    "create_provider",
+    "register_provider",
+]
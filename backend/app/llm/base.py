@@ -0,0 +1,77 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+class FunctionCall:
+    """A tool invocation requested by the model."""
+
+    def __init__(self, name: str, args: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.args = args or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "args": self.args}
+
+
+class LLMResponse:
+    """Provider-neutral model reply: final text and/or requested function calls."""
+
+    def __init__(
+        self,
+        text: str = "",
+        function_calls: Optional[List[FunctionCall]] = None,
+        usage: Optional[Dict[str, int]] = None
+    ):
+        self.text = text
+        self.function_calls = function_calls or []
+        self.usage = usage or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "function_calls": [fc.to_dict() for fc in self.function_calls],
+            "usage": self.usage
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMResponse":
+        return cls(
+            text=data.get("text", ""),
+            function_calls=[FunctionCall(fc["name"], fc.get("args")) for fc in data.get("function_calls", [])],
+            usage=data.get("usage")
+        )
+
+
+class ChatSession:
+    """One multi-turn conversation with the model."""
+
+    async def send_message(self, content: str) -> LLMResponse:
+        raise NotImplementedError
+
+    async def send_function_response(self, name: str, result: Any) -> LLMResponse:
+        raise NotImplementedError
+
+    async def stream(self, content: str) -> AsyncIterator[str]:
+        """Yields the text reply in chunks. Providers without streaming yield it whole."""
+        response = await self.send_message(content)
+        yield response.text
+
+
+class LLMProvider:
+    """
+    Interface every model backend implements.
+
+    `history` passed to `start_chat` uses the same message dicts stored in
+    ConversationSession.messages ({"role", "content", "tool_call", "tool_response"}),
+    so providers are interchangeable without migrating stored sessions.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = {"chats": 0, "calls": 0}
+
+    def warm(self):
+        """Does the one-time setup (SDK import, client, tool declarations) ahead of the first turn. Blocking."""
+
+    def start_chat(self, history: List[Dict[str, Any]]) -> ChatSession:
+        raise NotImplementedError
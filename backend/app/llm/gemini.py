@@ -0,0 +1,211 @@
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _map_role(role: str) -> str:
+    if role == 'assistant':
+        return 'model'
+    # Gemini history often requires 'user' role for function response turns
+    return 'user'
+
+
+def build_gemini_history(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Converts stored session messages into Gemini content dicts."""
+    # We include function calls and responses to maintain context
+    from google.generativeai import protos
+    gemini_history = []
+
+    for msg in messages:
+        role = _map_role(msg['role'])
+        content = msg.get('content')
+        tool_call = msg.get('tool_call')
+        tool_response = msg.get('tool_response')
+
+        parts = []
+        if content:
+            parts.append(protos.Part(text=content))
+
+        if tool_call:
+            parts.append(protos.Part(
+                function_call=protos.FunctionCall(
+                    name=tool_call['name'],
+                    args=tool_call['args']
+                )
+            ))
+
+        if tool_response:
+            parts.append(protos.Part(
+                function_response=protos.FunctionResponse(
+                    name=tool_response['name'],
+                    response={"result": tool_response['result']}
+                )
+            ))
+
+        if parts:
+            # tool_response MUST have a non-model role.
+            if tool_response:
+                role = 'user'  # Force user role for function responses
+
+            gemini_history.append({"role": role, "parts": parts})
+
+    # --- SANITIZATION: Fix Broken Tool Chains due to Truncation ---
+    # Ensure history doesn't start with a function_response (orphaned). History is now
+    # windowed by whole turns (app/services/history.py); this still guards older sessions.
+    while gemini_history and gemini_history[0]["parts"][0].function_response:
+        logger.debug("Sanitizing history: removing orphaned function_response at start.")
+        gemini_history.pop(0)
+
+    return gemini_history
+
+
+def parse_gemini_response(response) -> LLMResponse:
+    """Extracts function calls and text from a Gemini response with strict safety checks."""
+    usage = {}
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata:
+        usage = {
+            "prompt_tokens": getattr(metadata, "prompt_token_count", 0) or 0,
+            "completion_tokens": getattr(metadata, "candidates_token_count", 0) or 0
+        }
+
+    if not response.parts:
+        try:
+            text = response.text
+        except Exception as e:
+            logger.warning("Error accessing response.text: %s", e)
+            text = ""
+        return LLMResponse(text=text, usage=usage)
+
+    function_calls = [
+        FunctionCall(p.function_call.name, dict(p.function_call.args))
+        for p in response.parts if p.function_call
+    ]
+    if function_calls:
+        return LLMResponse(function_calls=function_calls, usage=usage)
+
+    # Manual text construction with strict safety checks
+    text_parts = []
+    for p in response.parts:
+        try:
+            if p.text:
+                text_parts.append(p.text)
+        except Exception as e:
+            logger.warning("Skipping part due to text access error: %s", e)
+            continue
+
+    text = "".join(text_parts)
+
+    # If still empty, try response.text as last resort fallback
+    if not text:
+        try:
+            text = response.text
+        except Exception:
+            pass
+
+    return LLMResponse(text=text, usage=usage)
+
+
+class GeminiChatSession(ChatSession):
+    def __init__(self, provider: "GeminiProvider", chat):
+        self.provider = provider
+        self.chat = chat
+
+    async def send_message(self, content: str) -> LLMResponse:
+        self.provider.stats["calls"] += 1
+        response = await self.chat.send_message_async(content)
+        return parse_gemini_response(response)
+
+    async def send_function_response(self, name: str, result: Any) -> LLMResponse:
+        from google.generativeai import protos
+        self.provider.stats["calls"] += 1
+        response = await self.chat.send_message_async(
+            [
+                protos.Part(
+                    function_response=protos.FunctionResponse(
+                        name=name,
+                        response={"result": result}
+                    )
+                )
+            ]
+        )
+        return parse_gemini_response(response)
+
+    async def stream(self, content: str) -> AsyncIterator[str]:
+        self.provider.stats["calls"] += 1
+        response = await self.chat.send_message_async(content, stream=True)
+        async for chunk in response:
+            try:
+                if chunk.text:
+                    yield chunk.text
+            except Exception:
+                continue
+
+
+def compile_tools(declarations: List[Dict[str, Any]]):
+    """Builds the Gemini Tool proto once from JSON-schema declarations (see app.core.tools)."""
+    from google.generativeai import protos
+    from google.generativeai.types import FunctionDeclaration
+
+    return protos.Tool(function_declarations=[
+        FunctionDeclaration(
+            name=d["name"], description=d["description"], parameters=d["parameters"]
+        ).to_proto()
+        for d in declarations
+    ])
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini via google.generativeai. The SDK is imported on first use.
+
+    Tool declarations are compiled once and the system instruction is static,
+    so the model is built once per process and every turn shares the same
+    prompt prefix. Per-turn facts (today's date, identity) travel in the message.
+    """
+
+    name = "gemini"
+
+    def __init__(
+        self,
+        declarations: List[Dict[str, Any]],
+        system_instruction: str,
+        model_name: Optional[str] = None
+    ):
+        super().__init__()
+        self.declarations = declarations
+        self.system_instruction = system_instruction
+        self.model_name = model_name or settings.LLM_MODEL
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            import google.generativeai as genai
+
+            # Configure Gemini
+            if settings.GEMINI_API_KEY:
+                os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+            else:
+                logger.warning("GEMINI_API_KEY is not set.")
+
+            self._model = genai.GenerativeModel(
+                model_name=self.model_name,
+                tools=[compile_tools(self.declarations)],
+                system_instruction=self.system_instruction
+            )
+        return self._model
+
+    def warm(self):
+        self.model
+
+    def start_chat(self, history: List[Dict[str, Any]]) -> ChatSession:
+        self.stats["chats"] += 1
+        chat = self.model.start_chat(history=build_gemini_history(history))
+        return GeminiChatSession(self, chat)
@@ -0,0 +1,70 @@
+"""
+Serves recorded model responses back to the agent loop.
+
+Fed one recorded turn at a time (see app/services/conversation_recorder.py),
+the provider answers each model call with the next recorded response, so a
+real conversation can be re-run without Gemini while tools and the database
+do their work for real. If the loop asks for more responses than were
+recorded the replay has diverged and ReplayDivergence is raised.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from app.llm.base import ChatSession, LLMProvider, LLMResponse
+
+
+class ReplayDivergence(Exception):
+    """The agent loop asked for a model response the recording does not have."""
+
+
+class ReplayChatSession(ChatSession):
+    def __init__(self, provider: "ReplayProvider"):
+        self.provider = provider
+
+    async def send_message(self, content: str) -> LLMResponse:
+        return await self.provider.next_response()
+
+    async def send_function_response(self, name: str, result: Any) -> LLMResponse:
+        return await self.provider.next_response()
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Replays recorded turns in order. With `replay_latency` each response is
+    delayed by the time the real model took, for end-to-end timings.
+    """
+
+    name = "replay"
+
+    def __init__(self, replay_latency: bool = False):
+        super().__init__()
+        self.replay_latency = replay_latency
+        self.stats["divergences"] = 0
+        self._pending: Deque[Tuple[LLMResponse, float]] = deque()
+
+    def load_turn(self, record: Dict[str, Any]):
+        """Queues the model responses recorded for one turn."""
+        self._pending = deque(
+            (LLMResponse.from_dict(call["response"]), call.get("ms", 0.0))
+            for call in record.get("llm", [])
+        )
+
+    @property
+    def remaining(self) -> int:
+        return len(self._pending)
+
+    async def next_response(self) -> LLMResponse:
+        self.stats["calls"] += 1
+        if not self._pending:
+            self.stats["divergences"] += 1
+            raise ReplayDivergence("No recorded model response left for this turn")
+        response, ms = self._pending.popleft()
+        if self.replay_latency and ms:
+            await asyncio.sleep(ms / 1000)
+        return response
+
+    def start_chat(self, history: List[Dict[str, Any]]) -> ChatSession:
+        self.stats["chats"] += 1
+        return ReplayChatSession(self)
@@ -0,0 +1,166 @@
+"""
+Deterministic, offline LLM stand-in for load tests, benchmarks and replays.
+
+A script is a list of rules. The first rule whose `match` regex matches the
+user's message decides the turn: it either replies with text straight away,
+or requests a tool call and replies after the tool result comes back.
+Named regex groups and a few built-ins ({today}, {tomorrow}) are substituted
+into argument and reply templates, e.g.:
+
+    {
+        "match": "available.*(?P<doctor>dr\\.? [a-z]+)",
+        "tool_call": {"name": "check_doctor_availability",
+                      "args": {"doctor_name": "{doctor}", "date_str": "{tomorrow}"}},
+        "reply": "Here are the open slots for {doctor}: {result}"
+    }
+
+Latency is simulated per call with a seeded RNG so runs are reproducible.
+"""
+
+import asyncio
+import json
+import random
+import re
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+
+DEFAULT_SCRIPT = [
+    {
+        "match": r"(?=.*\b(?:available|availability|free|slots?|openings?)\b).*?(?P<doctor>dr\.? [a-z]+)",
+        "tool_call": {
+            "name": "check_doctor_availability",
+            "args": {"doctor_name": "{doctor}", "date_str": "{tomorrow}"}
+        },
+        "reply": "Here is the availability I found: {result}"
+    },
+    {
+        "match": r"(?=.*\b(?:report|stats|summary|appointments|patients)\b).*?(?P<doctor>dr\.? [a-z]+)",
+        "tool_call": {
+            "name": "get_appointment_stats",
+            "args": {"doctor_name": "{doctor}", "query_type": "today"}
+        },
+        "reply": "Here is the report: {result}"
+    },
+    {
+        "match": r"\b(?:doctors|specialists?)\b",
+        "tool_call": {"name": "list_doctors", "args": {}},
+        "reply": "These doctors are available: {result}"
+    },
+    {
+        "match": r".*",
+        "reply": "I can help you check availability, book appointments and get reports."
+    }
+]
+
+
+def load_script(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+class _SafeDict(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def _render(template: Any, values: Dict[str, Any]) -> Any:
+    if isinstance(template, dict):
+        return {k: _render(v, values) for k, v in template.items()}
+    if isinstance(template, list):
+        return [_render(v, values) for v in template]
+    if not isinstance(template, str):
+        return template
+    rendered = template.format_map(_SafeDict(values))
+    # A lone placeholder that expands to a number becomes an int (e.g. doctor_id)
+    if re.fullmatch(r"\{\w+\}", template) and rendered.isdigit():
+        return int(rendered)
+    return rendered
+
+
+class ScriptedChatSession(ChatSession):
+    def __init__(self, provider: "ScriptedProvider"):
+        self.provider = provider
+        self._pending_rule: Optional[Dict[str, Any]] = None
+        self._values: Dict[str, Any] = {}
+
+    async def send_message(self, content: str) -> LLMResponse:
+        await self.provider.simulate_latency()
+        # The provider may receive context notes before the user's text; match against the last line
+        message = content.strip().splitlines()[-1].strip().lower() if content.strip() else ""
+
+        for rule in self.provider.script:
+            match = re.search(rule["match"], message)
+            if not match:
+                continue
+            today = date.today()
+            self._values = {
+                "today": today.isoformat(),
+                "tomorrow": (today + timedelta(days=1)).isoformat(),
+                "message": message,
+                **{k: v for k, v in match.groupdict().items() if v is not None}
+            }
+            if rule.get("tool_call"):
+                self._pending_rule = rule
+                call = rule["tool_call"]
+                return LLMResponse(
+                    function_calls=[FunctionCall(call["name"], _render(call.get("args", {}), self._values))],
+                    usage=self.provider.usage(content)
+                )
+            return LLMResponse(text=_render(rule.get("reply", ""), self._values), usage=self.provider.usage(content))
+
+        return LLMResponse(text=self.provider.default_reply, usage=self.provider.usage(content))
+
+    async def send_function_response(self, name: str, result: Any) -> LLMResponse:
+        await self.provider.simulate_latency()
+        rule, self._pending_rule = self._pending_rule, None
+        result_text = json.dumps(result, default=str)
+        template = (rule or {}).get("reply") or f"{name} returned: {{result}}"
+        return LLMResponse(
+            text=_render(template, {**self._values, "result": result_text}),
+            usage=self.provider.usage(result_text)
+        )
+
+    async def stream(self, content: str) -> AsyncIterator[str]:
+        response = await self.send_message(content)
+        for word in response.text.split(" "):
+            yield word + " "
+
+
+class ScriptedProvider(LLMProvider):
+    """Rule-driven provider with configurable, reproducible latency. Makes no network calls."""
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        script: Optional[List[Dict[str, Any]]] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        seed: int = 0,
+        default_reply: str = "I'm sorry, I didn't understand that."
+    ):
+        super().__init__()
+        self.script = script or DEFAULT_SCRIPT
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.default_reply = default_reply
+        self._rng = random.Random(seed)
+
+    async def simulate_latency(self):
+        self.stats["calls"] += 1
+        delay_ms = self.latency_ms
+        if self.jitter_ms:
+            delay_ms += self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+    @staticmethod
+    def usage(prompt: str) -> Dict[str, int]:
+        # Rough 4-characters-per-token estimate, good enough for relative comparisons
+        return {"prompt_tokens": len(prompt) // 4, "completion_tokens": 0}
+
+    def start_chat(self, history: List[Dict[str, Any]]) -> ChatSession:
+        self.stats["chats"] += 1
+        return ScriptedChatSession(self)
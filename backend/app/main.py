@@ -1,15 +1,49 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+from fastapi import FastAPI, Request, Response
 from app.core.config import settings
+from app.core.logging import bind_request_id, setup_logging, shutdown_logging
+from app.core.tracing import setup_tracing, shutdown_tracing, trace_turn
+from app.core.metrics import HTTP_REQUEST_DURATION, render_metrics
+from app.core.profiling import RequestProfile, verify_profile_request
 from app.api.chat import router as chat_router
-from app.api.slack import router as slack_router
+from app.api.slack import router as slack_router, slack_event_queue, drain_late_reports
+from app.api.debug import router as debug_router
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.warmup import warm_up
+from app.services.conversation_recorder import conversation_recorder
 
 
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    setup_tracing()
+    await notification_dispatcher.start()
+    await slack_event_queue.start()
+    # Pay for lazy SDK imports and first connections before taking traffic
+    if settings.WARMUP_ENABLED:
+        await warm_up()
+    yield
+    # Drain queued Slack events before the worker exits, then flush pending digests
+    await slack_event_queue.stop(timeout=settings.SLACK_EVENT_DRAIN_TIMEOUT_SECONDS)
+    await drain_late_reports(timeout=settings.SLACK_EVENT_DRAIN_TIMEOUT_SECONDS)
+    await notification_dispatcher.stop()
+    await asyncio.to_thread(conversation_recorder.flush)
+    shutdown_tracing()
+    shutdown_logging()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
-    description="Agentic AI Doctor Appointment & Reporting System API"
+    description="Agentic AI Doctor Appointment & Reporting System API",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -18,11 +52,65 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id", "X-Profile-Allocations", "X-Request-ID"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Traces each request and returns its LLM/tool/DB time breakdown as Server-Timing."""
+    started = time.perf_counter()
+    with trace_turn(f"{request.method} {request.url.path}") as trace:
+        response = await call_next(request)
+    if settings.TRACING_SERVER_TIMING:
+        response.headers["Server-Timing"] = trace.server_timing()
+
+    # Label by route template (e.g. /api/chat) so path parameters don't explode cardinality
+    route = request.scope.get("route")
+    HTTP_REQUEST_DURATION.labels(
+        request.method, route.path if route else "unmatched", str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    return response
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Profiles a request when profiling is enabled and the request is signed for it."""
+    path = request.url.path
+    if (
+        path.startswith("/api/debug")
+        or not verify_profile_request(request.headers, request.method, path)
+        or not RequestProfile.acquire()
+    ):
+        return await call_next(request)
+
+    profile = RequestProfile(f"{request.method} {path}")
+    try:
+        profile.start()
+        try:
+            response = await call_next(request)
+        finally:
+            profile.stop()
+        profile.save()
+    finally:
+        RequestProfile.release()
+
+    logger.info("Profiled %s as %s (%s)", profile.label, profile.id, profile.allocation_header())
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["X-Profile-Allocations"] = profile.allocation_header()
+    return response
+
+# Registered last so it runs outermost: every log line of the request carries its ID
+@app.middleware("http")
+async def correlate_requests(request: Request, call_next):
+    """Binds X-Request-ID (or a fresh ID) to the request's logs and echoes it back."""
+    with bind_request_id(request.headers.get("X-Request-ID")) as request_id:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 
 app.include_router(chat_router, prefix="/api")
 app.include_router(slack_router, prefix="/api/slack")
+app.include_router(debug_router, prefix="/api/debug")
 
 @app.get("/")
 async def root():
@@ -31,3 +119,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
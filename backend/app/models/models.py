@@ -26,7 +26,7 @@ class Doctor(Base):
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False)
     specialization = Column(String(100))
-    slack_id = Column(String(100))
+    slack_id = Column(String(100), index=True)
     phone = Column(String(20))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
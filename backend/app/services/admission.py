@@ -0,0 +1,196 @@
+import asyncio
+import ipaddress
+import math
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+from app.core.config import settings
+from app.core.deadline import remaining
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn cannot get an LLM slot; callers should answer 429/503 with Retry-After."""
+
+    def __init__(self, reason: str, retry_after: int, message: str = None):
+        super().__init__(message or f"Too many concurrent requests ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def status_code(self) -> int:
+        # One tenant over its share (or its own earlier turn) is told to slow down; global overload is a service problem
+        return 429 if self.reason in ("tenant_queue_full", "session_busy") else 503
+
+
+class _Tenant:
+    __slots__ = ("semaphore", "active", "waiting")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+
+
+class AdmissionSlot:
+    """A held LLM slot. Release it exactly once, typically in a `finally` block."""
+
+    def __init__(self, controller: "AdmissionController", tenant: str):
+        self._controller = controller
+        self._tenant = tenant
+        self._admitted_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self._tenant, time.monotonic() - self._admitted_at)
+
+
+class AdmissionController:
+    """
+    Caps how many chat turns talk to the LLM at once, globally and per tenant.
+
+    A turn that cannot start immediately waits in a bounded queue for at most
+    `max_wait_seconds`. When the queue is already full, or the wait runs out,
+    it is rejected straight away with a Retry-After estimate instead of piling
+    more concurrent calls onto the provider.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_queue: int = 64,
+        max_wait_seconds: float = 10.0,
+        tenant_max_concurrent: int = 8,
+        tenant_max_queue: int = 16
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.tenant_max_concurrent = tenant_max_concurrent
+        self.tenant_max_queue = tenant_max_queue
+        self.active = 0
+        self.waiting = 0
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._tenants: Dict[str, _Tenant] = {}
+        # Moving average of how long a turn holds its slot, for Retry-After
+        self._avg_hold_seconds = 2.0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        backlog = (self.waiting + 1) / self.max_concurrent
+        return max(1, min(60, math.ceil(self._avg_hold_seconds * backlog)))
+
+    def _reject(self, reason: str, waited: float = 0.0) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.labels(reason).inc()
+        ADMISSION_WAIT.labels("rejected").observe(waited)
+        return AdmissionRejected(reason, self.retry_after())
+
+    async def acquire(self, tenant: str = "default") -> AdmissionSlot:
+        """Waits for a slot. Raises AdmissionRejected when the queue is full or the wait times out."""
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant(self.tenant_max_concurrent)
+
+        # Only turns that would have to wait count against the queue bounds
+        if state.semaphore.locked() or self._global.locked():
+            if state.waiting >= self.tenant_max_queue:
+                self._forget_if_idle(tenant, state)
+                raise self._reject("tenant_queue_full")
+            if self.waiting >= self.max_queue:
+                self._forget_if_idle(tenant, state)
+                raise self._reject("queue_full")
+
+        started = time.monotonic()
+        admitted = False
+        self.waiting += 1
+        state.waiting += 1
+        ADMISSION_QUEUE_DEPTH.inc()
+        try:
+            # Never wait past the turn's own deadline
+            timeout = min(self.max_wait_seconds, remaining(self.max_wait_seconds))
+            await asyncio.wait_for(self._acquire_semaphores(state), timeout=timeout)
+            admitted = True
+        except asyncio.TimeoutError:
+            raise self._reject("timeout", time.monotonic() - started)
+        finally:
+            self.waiting -= 1
+            state.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.dec()
+            if not admitted:
+                self._forget_if_idle(tenant, state)
+
+        ADMISSION_WAIT.labels("admitted").observe(time.monotonic() - started)
+        self.active += 1
+        state.active += 1
+        ADMISSION_IN_FLIGHT.inc()
+        return AdmissionSlot(self, tenant)
+
+    async def _acquire_semaphores(self, state: _Tenant):
+        # Tenant first, so a tenant over its share never sits on a global slot
+        await state.semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            state.semaphore.release()
+            raise
+
+    def _release(self, tenant: str, held_seconds: float):
+        state = self._tenants[tenant]
+        self._global.release()
+        state.semaphore.release()
+        self.active -= 1
+        state.active -= 1
+        ADMISSION_IN_FLIGHT.dec()
+        self._avg_hold_seconds += 0.2 * (held_seconds - self._avg_hold_seconds)
+        self._forget_if_idle(tenant, state)
+
+    def _forget_if_idle(self, tenant: str, state: _Tenant):
+        if not state.active and not state.waiting and self._tenants.get(tenant) is state:
+            del self._tenants[tenant]
+
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@lru_cache(maxsize=8)
+def _parse_proxies(spec: str) -> List[IPNetwork]:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+def _is_trusted(address: str, proxies: List[IPNetwork]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def web_tenant(client_host: Optional[str], forwarded_for: Optional[str] = None, trusted_proxies: Optional[str] = None) -> str:
+    """
+    Admission tenant for a web request: the client's IP address.
+
+    Behind a reverse proxy every connection comes from the proxy, which would make all web users one
+    tenant. When the peer is in TRUSTED_PROXIES, X-Forwarded-For is walked from the right, past further
+    trusted proxies, to the first address they did not add: the real client. The header is ignored for
+    any other peer, since clients can send whatever they like in it.
+    """
+    proxies = _parse_proxies(settings.TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies)
+    client = client_host or "unknown"
+    if proxies and forwarded_for and _is_trusted(client, proxies):
+        for hop in reversed([h.strip() for h in forwarded_for.split(",") if h.strip()]):
+            client = hop
+            if not _is_trusted(hop, proxies):
+                break
+    return f"web:{client}"
+
+
+admission_controller = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    tenant_max_concurrent=settings.ADMISSION_TENANT_MAX_CONCURRENT,
+    tenant_max_queue=settings.ADMISSION_TENANT_MAX_QUEUE
+)
@@ -0,0 +1,156 @@
+"""
+Shared read-through cache of free slots per (doctor_id, date).
+
+Every check_doctor_availability call for a popular doctor and day repeats the
+same schedule and appointment queries. The computed slots are cached for all
+sessions under a key that includes a per-doctor version number. book_appointment
+bumps the version, so every cached day for that doctor is skipped from then on
+and simply ages out; a computation that raced with the booking stored its
+result under the old version, where nobody reads it. Concurrent misses for the
+same key share one computation.
+
+AVAILABILITY_CACHE_BACKEND picks where entries and versions live:
+- "memory": an LRU in this process. With several workers, a booking made by
+            another worker is only seen once AVAILABILITY_CACHE_TTL_SECONDS pass.
+- "redis":  any Redis-compatible server at REDIS_URL, shared by all workers.
+            Needs `pip install redis`.
+
+The cache only speeds up reads; book_appointment still re-checks the slot in
+the database. If the backend is unreachable, slots are computed directly.
+"""
+
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import AVAILABILITY_CACHE_LOOKUPS
+from app.core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessAvailabilityStore:
+    name = "memory"
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def version(self, doctor_id: int) -> int:
+        return self._versions.get(doctor_id, 0)
+
+    async def bump(self, doctor_id: int):
+        self._versions[doctor_id] = self._versions.get(doctor_id, 0) + 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisAvailabilityStore:
+    """Entries expire in Redis after the TTL; versions are plain counters."""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("AVAILABILITY_CACHE_BACKEND=redis needs the client: run `pip install redis`.") from None
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def version(self, doctor_id: int) -> int:
+        return int(await self._redis.get(f"availability:version:{doctor_id}") or 0)
+
+    async def bump(self, doctor_id: int):
+        await self._redis.incr(f"availability:version:{doctor_id}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any):
+        await self._redis.set(key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+
+
+class AvailabilityCache:
+    def __init__(self, store):
+        self.store = store
+        self._flights = SingleFlight()
+
+    async def get_or_compute(self, doctor_id: int, date_str: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached free slots for the doctor and date, computing (once for all concurrent callers) on a miss."""
+        if not settings.AVAILABILITY_CACHE_ENABLED:
+            return await compute()
+        try:
+            version = await self.store.version(doctor_id)
+            key = f"availability:{doctor_id}:{date_str}:v{version}"
+            cached = await self.store.get(key)
+        except Exception as e:
+            AVAILABILITY_CACHE_LOOKUPS.labels("error").inc()
+            logger.warning("Availability cache unavailable, computing directly: %s", e)
+            return await compute()
+        if cached is not None:
+            AVAILABILITY_CACHE_LOOKUPS.labels("hit").inc()
+            return cached
+
+        async def fill():
+            value = await compute()
+            try:
+                await self.store.set(key, value)
+            except Exception as e:
+                logger.warning("Could not store availability in the cache: %s", e)
+            return value
+
+        value, shared = await self._flights.do(key, fill)
+        AVAILABILITY_CACHE_LOOKUPS.labels("coalesced" if shared else "miss").inc()
+        return copy.deepcopy(value) if shared else value
+
+    async def invalidate_doctor(self, doctor_id: int):
+        """Call after any change to a doctor's appointments (a booking or a cancellation)."""
+        try:
+            await self.store.bump(doctor_id)
+        except Exception as e:
+            # Bookings re-check the slot in the database, so a stale read cannot double-book
+            logger.error("Could not invalidate cached availability for doctor %s: %s", doctor_id, e)
+
+
+AVAILABILITY_STORES: Dict[str, Callable[[], Any]] = {
+    "memory": lambda: InProcessAvailabilityStore(
+        settings.AVAILABILITY_CACHE_TTL_SECONDS, settings.AVAILABILITY_CACHE_MAX_ENTRIES
+    ),
+    "redis": lambda: RedisAvailabilityStore(settings.REDIS_URL, settings.AVAILABILITY_CACHE_TTL_SECONDS),
+}
+
+
+def create_availability_cache(name: str = None) -> AvailabilityCache:
+    name = name or settings.AVAILABILITY_CACHE_BACKEND
+    if name not in AVAILABILITY_STORES:
+        raise ValueError(f"Unknown availability cache backend '{name}'. Available: {', '.join(AVAILABILITY_STORES)}")
+    return AvailabilityCache(AVAILABILITY_STORES[name]())
+
+
+availability_cache = create_availability_cache()
@@ -0,0 +1,157 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import redact, redact_fields
+from app.llm.base import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+RECORD_VERSION = 1
+
+
+class TurnRecord:
+    """Everything one call to process_chat_message did, in the order it happened."""
+
+    def __init__(self, session_id: str, user_message: str, doctor: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.user_message = user_message
+        self.doctor = doctor
+        self.recorded_at = datetime.now().isoformat(timespec="seconds")
+        self.routed = False
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.response: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def add_llm_call(self, response: LLMResponse, started: float):
+        self.llm_calls.append({"response": response.to_dict(), "ms": _elapsed_ms(started)})
+
+    def add_tool_call(self, name: str, args: Dict[str, Any], result: Any, started: float):
+        self.tool_calls.append({"name": name, "args": args, "result": result, "ms": _elapsed_ms(started)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": RECORD_VERSION,
+            "session_id": self.session_id,
+            "at": self.recorded_at,
+            "user_message": self.user_message,
+            "doctor": self.doctor,
+            "routed": self.routed,
+            "llm": self.llm_calls,
+            "tools": self.tool_calls,
+            "response": self.response,
+            "ms": _elapsed_ms(self._started),
+        }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class ConversationRecorder:
+    """
+    Appends one compact JSON line per chat turn to CONVERSATION_RECORD_PATH.
+
+    The log is the input for scripts/replay_conversations.py, which serves the
+    recorded model responses back to the agent loop so the cost of each real
+    conversation (tool calls, DB queries, time) can be measured offline.
+    Recording is off while the path is unset.
+
+    Like the log listener, a background thread does the file writes, so the
+    event loop never waits on disk. While LOG_REDACT_PII is on (the default),
+    patient fields are masked and emails and phone numbers redacted exactly as
+    in the logs. Replays only need the model responses and timings.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_queue: int = 1000):
+        self._path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path or settings.CONVERSATION_RECORD_PATH
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def start_turn(self, session_id: str, user_message: str, doctor: Optional[Dict[str, Any]] = None) -> TurnRecord:
+        return TurnRecord(session_id, user_message, doctor)
+
+    def finish(self, turn: TurnRecord, response: str):
+        turn.response = response
+        if not self.enabled:
+            return
+        redact_pii = settings.LOG_REDACT_PII
+        record = turn.to_dict()
+        # Serialized here: tool results may be shared with caches and change after the turn
+        line = json.dumps(redact_fields(record) if redact_pii else record, separators=(",", ":"), default=str)
+        self._start_writer()
+        try:
+            self._queue.put_nowait((self.path, line, redact_pii))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Blocks until every queued turn has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="conversation-recorder", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            path, line, redact_pii = self._queue.get()
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write((redact(line) if redact_pii else line) + "\n")
+            except OSError as e:
+                logger.warning("Failed to record conversation turn: %s", e)
+            finally:
+                self._queue.task_done()
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """Reads a recording, skipping blank or truncated lines."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def group_conversations(records: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Groups turns by session, keeping the order they were recorded in."""
+    conversations: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        conversations.setdefault(record["session_id"], []).append(record)
+    return conversations
+
+
+conversation_recorder = ConversationRecorder()
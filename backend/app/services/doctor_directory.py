@@ -0,0 +1,71 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import Doctor
+
+
+class DoctorDirectory:
+    """
+    In-process cache mapping Slack user IDs to doctor identities.
+
+    Lets Slack turns know which doctor is talking without asking the LLM to
+    resolve a name. Misses are cached for a shorter time so a doctor whose
+    slack_id was just linked is picked up quickly.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, negative_ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = min(negative_ttl_seconds, ttl_seconds)
+        self._by_slack_id: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
+    @staticmethod
+    def _identity(row) -> Dict[str, Any]:
+        return {"id": row.id, "name": row.name, "specialization": row.specialization}
+
+    def _store(self, slack_user_id: str, identity: Optional[Dict[str, Any]]):
+        ttl = self.ttl_seconds if identity else self.negative_ttl_seconds
+        self._by_slack_id[slack_user_id] = (time.monotonic() + ttl, identity)
+
+    async def get_by_slack_id(self, slack_user_id: str) -> Optional[Dict[str, Any]]:
+        """Returns {"id", "name", "specialization"} for the doctor linked to this Slack user."""
+        if not slack_user_id:
+            return None
+
+        cached = self._by_slack_id.get(slack_user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Doctor.id, Doctor.name, Doctor.specialization).where(Doctor.slack_id == slack_user_id)
+            )
+            row = result.first()
+
+        identity = self._identity(row) if row else None
+        self._store(slack_user_id, identity)
+        return identity
+
+    async def warm(self) -> int:
+        """Preloads every doctor that has a linked Slack account. Returns the count."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Doctor.id, Doctor.name, Doctor.specialization, Doctor.slack_id).where(Doctor.slack_id.isnot(None))
+            )
+            rows = result.all()
+
+        for row in rows:
+            self._store(row.slack_id, self._identity(row))
+        return len(rows)
+
+    def invalidate(self, slack_user_id: Optional[str] = None):
+        if slack_user_id is None:
+            self._by_slack_id.clear()
+        else:
+            self._by_slack_id.pop(slack_user_id, None)
+
+
+doctor_directory = DoctorDirectory(ttl_seconds=settings.DOCTOR_DIRECTORY_TTL_SECONDS)
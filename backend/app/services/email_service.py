@@ -1,14 +1,18 @@
+import logging
+
 import aiosmtplib
 from email.message import EmailMessage
 from app.core.config import settings
+from app.core.tracing import span
+from app.core.deadline import io_timeout
+
+logger = logging.getLogger(__name__)
 
 class EmailService:
     async def send_email(self, to_email: str, subject: str, content: str):
         """Sends an email using SMTP."""
         if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-            print(f"SMTP credentials not set. Mocking email to {to_email}")
-            print(f"Subject: {subject}")
-            print(f"Content: {content}")
+            logger.debug("SMTP credentials not set. Mocking email to %s: %s", to_email, subject)
             return True
 
         message = EmailMessage()
@@ -17,19 +21,23 @@ class EmailService:
         message["Subject"] = subject
         message.set_content(content)
 
+        # Outside the try: a spent turn deadline must stop the turn, not read as a failed email
+        timeout = io_timeout()
         try:
-            await aiosmtplib.send(
-                message,
-                hostname=settings.SMTP_SERVER,
-                port=settings.SMTP_PORT,
-                username=settings.SMTP_USER,
-                password=settings.SMTP_PASSWORD,
-                use_tls=False,
-                start_tls=True,
-            )
+            with span("smtp.send", "smtp"):
+                await aiosmtplib.send(
+                    message,
+                    hostname=settings.SMTP_SERVER,
+                    port=settings.SMTP_PORT,
+                    username=settings.SMTP_USER,
+                    password=settings.SMTP_PASSWORD,
+                    use_tls=False,
+                    start_tls=True,
+                    timeout=timeout,
+                )
             return True
         except Exception as e:
-            print(f"Failed to send email: {e}")
+            logger.error("Failed to send email: %s", e)
             return False
 
     async def send_appointment_confirmation(self, patient_email: str, patient_name: str, appt_time: str, doctor_name: str, calendar_link: str = None):
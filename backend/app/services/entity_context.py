@@ -0,0 +1,95 @@
+"""
+Entities resolved by tool calls, remembered across turns.
+
+After each tool call the agent loop pulls the doctor, date, offered slots,
+patient and booked appointment out of the call and its result into
+ConversationSession.context["entities"]. Every later turn carries them as a
+one-line note, so the model can pass `doctor_id` straight to the next tool
+instead of re-running list_doctors or check_doctor_availability to recover
+something it has already seen.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.services.result_encoding import compress_slots
+
+
+def _doctor(doctor_id: Any, name: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not doctor_id:
+        return None
+    return {"id": int(doctor_id), "name": name} if name else {"id": int(doctor_id)}
+
+
+def extract_entities(tool_name: str, tool_args: Dict[str, Any], result: Any) -> Dict[str, Any]:
+    """Entities a single tool call resolved. Failed calls resolve nothing except user-given patient details."""
+    found: Dict[str, Any] = {}
+    if tool_name == "book_appointment" and tool_args.get("patient_name"):
+        # Typed in by the user, so still right even if the slot was taken
+        found["patient"] = {"name": tool_args["patient_name"], "email": tool_args.get("patient_email")}
+    if not isinstance(result, dict) or result.get("error"):
+        return found
+
+    if tool_name == "check_doctor_availability":
+        doctor = _doctor(result.get("doctor_id"), result.get("doctor_name"))
+        if doctor:
+            found["doctor"] = doctor
+        if result.get("date"):
+            found["date"] = result["date"]
+            found["offered_slots"] = compress_slots(result.get("available_slots") or []) or "none"
+    elif tool_name == "get_appointment_stats":
+        doctor = _doctor(result.get("doctor_id"), result.get("doctor_name"))
+        if doctor:
+            found["doctor"] = doctor
+    elif tool_name == "list_doctors":
+        doctors: List[Dict[str, Any]] = result.get("doctors") or []
+        # Only an unambiguous match counts as resolved
+        if len(doctors) == 1 and not result.get("offset"):
+            found["doctor"] = _doctor(doctors[0].get("id"), doctors[0].get("name"))
+    elif tool_name == "book_appointment" and result.get("status") == "success":
+        found["appointment"] = {
+            "id": result.get("appointment_id"),
+            "doctor_id": tool_args.get("doctor_id"),
+            "time": tool_args.get("appointment_time_str"),
+        }
+        # The booked slot is gone; offer fresh ones if asked again
+        found["offered_slots"] = None
+    return found
+
+
+def merge_entities(current: Optional[Dict[str, Any]], found: Dict[str, Any]) -> Dict[str, Any]:
+    """Applies newly resolved entities. Switching doctors forgets the previous doctor's date and slots."""
+    merged = dict(current or {})
+    doctor, previous = found.get("doctor"), merged.get("doctor")
+    if doctor and previous:
+        if previous["id"] != doctor["id"]:
+            merged.pop("date", None)
+            merged.pop("offered_slots", None)
+        elif not doctor.get("name"):
+            found = {**found, "doctor": previous}
+    for key, value in found.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+
+def format_entity_context(entities: Dict[str, Any]) -> str:
+    """Per-turn note listing what is already resolved; sent to the model but never stored in history."""
+    parts = []
+    doctor = entities.get("doctor")
+    if doctor:
+        name = f"{doctor['name']} " if doctor.get("name") else ""
+        parts.append(f"doctor {name}(doctor_id={doctor['id']})")
+    if entities.get("date"):
+        parts.append(f"date {entities['date']}")
+    if entities.get("offered_slots"):
+        parts.append(f"free slots {entities['offered_slots']}")
+    patient = entities.get("patient")
+    if patient:
+        email = f" <{patient['email']}>" if patient.get("email") else ""
+        parts.append(f"patient {patient['name']}{email}")
+    appointment = entities.get("appointment")
+    if appointment:
+        parts.append(f"booked appointment_id={appointment['id']} at {appointment['time']}")
+    return f"[Known: {'; '.join(parts)}]" if parts else ""
@@ -1,10 +1,10 @@
+import logging
 import os.path
 import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from app.core.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
@@ -18,13 +18,22 @@ class CalendarService:
         self.token_path = os.path.join(base_dir, 'token.json')
         self.creds_path = os.path.join(base_dir, 'credentials.json')
 
-    def authenticate(self):
-        """Authenticates the user and creates/refreshes tokens."""
+    def authenticate(self, interactive: bool = True):
+        """
+        Authenticates the user and creates/refreshes tokens.
+        Non-interactive callers (startup warmup) never open the browser login flow.
+        """
+        # The Google client libraries are slow to import; only pay for them once the calendar is used
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         if os.path.exists(self.token_path):
             try:
                 self.creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
             except Exception as e:
-                print(f"Error loading token.json: {e}")
+                logger.warning("Error loading token.json: %s", e)
                 self.creds = None
 
         # If there are no (valid) credentials available, let the user log in.
@@ -33,12 +42,14 @@ class CalendarService:
                 try:
                     self.creds.refresh(Request())
                 except Exception as e:
-                     print(f"Error refreshing token: {e}")
+                     logger.warning("Error refreshing token: %s", e)
                      self.creds = None
             
             if not self.creds:
+                if not interactive:
+                    return False
                 if not os.path.exists(self.creds_path):
-                    print(f"WARNING: {self.creds_path} not found. Calendar integration disabled.")
+                    logger.warning("%s not found. Calendar integration disabled.", self.creds_path)
                     return False
                 
                 try:
@@ -47,7 +58,7 @@ class CalendarService:
                     # Or run this once locally and copy token.json
                     self.creds = flow.run_local_server(port=0) 
                 except Exception as e:
-                    print(f"Authentication failed: {e}")
+                    logger.error("Authentication failed: %s", e)
                     return False
 
             # Save the credentials for the next run
@@ -58,9 +69,17 @@ class CalendarService:
             self.service = build('calendar', 'v3', credentials=self.creds)
             return True
         except Exception as e:
-             print(f"Failed to build service: {e}")
+             logger.error("Failed to build service: %s", e)
              return False
 
+    def warm(self) -> bool:
+        """Builds the API client (loading its discovery document) if a saved token allows it. Blocking."""
+        if self.service:
+            return True
+        if not os.path.exists(self.token_path):
+            return False
+        return self.authenticate(interactive=False)
+
     def create_event(self, summary: str, start_time: datetime.datetime, end_time: datetime.datetime, attendee_email: str = None):
         """Creates an event in the primary calendar."""
         if not self.service:
@@ -83,10 +102,11 @@ class CalendarService:
             event['attendees'] = [{'email': attendee_email}]
 
         try:
-            event = self.service.events().insert(calendarId='primary', body=event).execute()
+            with span("calendar.events.insert", "calendar"):
+                event = self.service.events().insert(calendarId='primary', body=event).execute()
             return event.get('htmlLink')
         except Exception as e:
-            print(f"An error occurred creating calendar event: {e}")
+            logger.error("An error occurred creating calendar event: %s", e)
             return None
 
 calendar_service = CalendarService()
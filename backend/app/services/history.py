@@ -0,0 +1,123 @@
+"""
+Token-budgeted windowing of ConversationSession.messages.
+
+The stored history is what every turn sends to the model, so it is kept under
+HISTORY_TOKEN_BUDGET instead of a fixed message count:
+
+1. Tool results older than the most recent few are replaced by compact
+   summaries (long lists cut to a few items, long strings shortened).
+2. Whole turns are dropped oldest-first until the history fits. A turn runs
+   from a user message up to the next one, so a tool call is never separated
+   from its response and the history always starts with a user message.
+3. Dropped turns can be folded into a short rolling summary kept in
+   ConversationSession.context["history_summary"], which is sent with each
+   turn in place of the full transcript.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_LIST_ITEMS = 3
+MAX_STRING_CHARS = 200
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """Rough token count (about 4 characters per token) of one stored message."""
+    return len(json.dumps(message, default=str, ensure_ascii=False)) // 4 + 1
+
+
+def summarize_tool_result(result: Any, depth: int = 0) -> Any:
+    """Shrinks a tool payload while keeping its shape, counts and leading items."""
+    if isinstance(result, dict):
+        if depth >= 2:
+            return f"{{{len(result)} fields}}"
+        return {k: summarize_tool_result(v, depth + 1) for k, v in result.items()}
+    if isinstance(result, list):
+        items = [summarize_tool_result(v, depth + 1) for v in result[:MAX_LIST_ITEMS]]
+        if len(result) > MAX_LIST_ITEMS:
+            items.append(f"... {len(result) - MAX_LIST_ITEMS} more")
+        return items
+    if isinstance(result, str) and len(result) > MAX_STRING_CHARS:
+        return result[:MAX_STRING_CHARS] + "..."
+    return result
+
+
+def _is_turn_start(message: Dict[str, Any]) -> bool:
+    return message.get("role") == "user" and not message.get("tool_response")
+
+
+def split_turns(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Groups messages into turns, each starting at a user message. Leading orphans form their own group."""
+    turns: List[List[Dict[str, Any]]] = []
+    for message in messages:
+        if not turns or _is_turn_start(message):
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def compact_history(
+    messages: List[Dict[str, Any]],
+    budget_tokens: int,
+    recent_tool_payloads: int = 2,
+    max_messages: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """Returns the history to keep and the turns dropped from its start. The latest turn is always kept."""
+    responses = [i for i, m in enumerate(messages) if m.get("tool_response")]
+    old_responses = set(responses[:-recent_tool_payloads] if recent_tool_payloads else responses)
+    compacted = []
+    for i, message in enumerate(messages):
+        if i in old_responses and not message["tool_response"].get("compacted"):
+            response = message["tool_response"]
+            message = {
+                **message,
+                "tool_response": {
+                    "name": response["name"],
+                    "result": summarize_tool_result(response["result"]),
+                    "compacted": True
+                }
+            }
+        compacted.append(message)
+
+    turns = split_turns(compacted)
+    sizes = [sum(estimate_tokens(m) for m in turn) for turn in turns]
+    total_tokens, total_messages = sum(sizes), len(compacted)
+    dropped = []
+    while len(turns) > 1 and (
+        total_tokens > budget_tokens or (max_messages and total_messages > max_messages)
+        or not _is_turn_start(turns[0][0])
+    ):
+        turn = turns.pop(0)
+        total_tokens -= sizes.pop(0)
+        total_messages -= len(turn)
+        dropped.append(turn)
+    return [m for turn in turns for m in turn], dropped
+
+
+def _clip(text: Optional[str], limit: int = SUMMARY_LINE_CHARS) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def fold_into_summary(summary: Optional[str], dropped: List[List[Dict[str, Any]]], max_chars: int) -> str:
+    """Appends one line per dropped turn to the rolling summary, forgetting the oldest lines past max_chars."""
+    lines = summary.splitlines() if summary else []
+    for turn in dropped:
+        user = next((m.get("content") for m in turn if _is_turn_start(m)), None)
+        tools = [m["tool_call"]["name"] for m in turn if m.get("tool_call")]
+        reply = next((m.get("content") for m in reversed(turn) if m.get("role") == "assistant" and m.get("content")), None)
+        line = f"User: {_clip(user)}"
+        if tools:
+            line += f" | tools: {', '.join(tools)}"
+        if reply:
+            line += f" | Assistant: {_clip(reply)}"
+        lines.append(line)
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def format_summary_context(summary: str) -> str:
+    """Per-turn note carrying the rolling summary; sent to the model but never stored in history."""
+    return f"[Earlier in this conversation:\n{summary}]"
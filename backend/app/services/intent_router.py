@@ -0,0 +1,303 @@
+"""
+Deterministic pre-router for structurally simple chat messages.
+
+Messages such as "list cardiologists" or "stats for Dr. Ahuja this week" map to
+exactly one tool call. Matching them with compiled patterns lets the agent
+answer without a single LLM round trip; anything the router is not confident
+about falls through to Gemini unchanged.
+"""
+
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Pattern
+
+from app.core.tracing import span
+from app.core.metrics import INTENT_ROUTER_DURATION, INTENT_ROUTER_REQUESTS
+from app.services.mcp_tools import SPECIALIZATION_SYNONYMS
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    "today": "today",
+    "tomorrow": "tomorrow",
+    "yesterday": "yesterday",
+    "this week": "this_week",
+    "weekly": "this_week",
+    "daily": "today",
+}
+
+PERIOD_LABELS = {
+    "today": "today",
+    "tomorrow": "tomorrow",
+    "yesterday": "yesterday",
+    "this_week": "this week",
+}
+
+_PERIOD_PATTERN = "|".join(sorted(PERIODS, key=len, reverse=True))
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if word.endswith("s") else word
+
+
+def resolve_specialization(text: str, known: Iterable[str] = ()) -> Optional[str]:
+    """
+    Returns a specialization for high-confidence phrases, None when unsure.
+    Only synonyms and specializations that exist (`known`, from the doctors table) count,
+    so generic words such as "specialist" or "artist" go to the LLM.
+    """
+    text = text.strip().lower()
+    for filler in ("doctors", "doctor", "specialists", "specialist"):
+        if text.endswith(" " + filler):
+            text = text[: -len(filler) - 1].strip()
+    if not text:
+        return None
+    if text in SPECIALIZATION_SYNONYMS:
+        return SPECIALIZATION_SYNONYMS[text]
+    names = {name.lower(): name for name in (*SPECIALIZATION_SYNONYMS.values(), *known)}
+    return names.get(text) or names.get(_singular(text))
+
+
+class IntentRule:
+    """
+    One routable intent: a compiled pattern, how to turn a match into tool
+    arguments, and how to render the tool result as the final reply.
+
+    `build_args` returns None to decline the match (the message then goes to the LLM).
+    `format_result` returns None when the result needs LLM judgement (e.g. an error).
+    `needs_specializations` rules get the known specializations as context["specializations"].
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tool_name: str,
+        pattern: Pattern,
+        build_args: Callable[[re.Match, Dict[str, Any]], Optional[Dict[str, Any]]],
+        format_result: Callable[[Dict[str, Any]], Optional[str]],
+        needs_specializations: bool = False
+    ):
+        self.name = name
+        self.tool_name = tool_name
+        self.pattern = pattern
+        self.build_args = build_args
+        self.format_result = format_result
+        self.needs_specializations = needs_specializations
+
+
+class RoutedTurn:
+    """Outcome of a routed message: the tool call made and the reply text."""
+
+    def __init__(self, intent: str, tool_name: str, tool_args: Dict[str, Any], tool_result: Dict[str, Any], response: str):
+        self.intent = intent
+        self.tool_name = tool_name
+        self.tool_args = tool_args
+        self.tool_result = tool_result
+        self.response = response
+
+
+class IntentRouter:
+    """Runs registered rules in order; the first confident match is dispatched to its tool."""
+
+    def __init__(
+        self,
+        tools: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]],
+        load_specializations: Optional[Callable[[], Awaitable[List[str]]]] = None,
+        specializations_ttl_seconds: float = 300.0
+    ):
+        self.tools = tools
+        self.rules: List[IntentRule] = []
+        self.load_specializations = load_specializations
+        self.specializations_ttl_seconds = specializations_ttl_seconds
+        self._specializations: List[str] = []
+        self._specializations_loaded_at: Optional[float] = None
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "hits": 0,
+            "misses": 0,
+            "declined": 0,
+            "errors": 0,
+            "latency_ms_total": 0.0,
+            "hits_by_intent": {},
+        }
+
+    def register(self, rule: IntentRule):
+        self.rules.append(rule)
+
+    async def specializations(self) -> List[str]:
+        """Specializations on record, reloaded every `specializations_ttl_seconds`; stale or empty on DB errors."""
+        if self.load_specializations is None:
+            return []
+        now = time.monotonic()
+        if self._specializations_loaded_at is None or now - self._specializations_loaded_at > self.specializations_ttl_seconds:
+            # Set first so a failing database is retried once per TTL, not on every message
+            self._specializations_loaded_at = now
+            try:
+                self._specializations = await self.load_specializations()
+            except Exception as e:
+                logger.warning("Intent router: could not load specializations: %s", e)
+        return self._specializations
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of hit rate and average routed-turn latency."""
+        requests = self.stats["requests"]
+        hits = self.stats["hits"]
+        return {
+            **self.stats,
+            "hits_by_intent": dict(self.stats["hits_by_intent"]),
+            "hit_rate": hits / requests if requests else 0.0,
+            "avg_latency_ms": self.stats["latency_ms_total"] / hits if hits else 0.0,
+        }
+
+    async def route(self, message: str, context: Optional[Dict[str, Any]] = None) -> Optional[RoutedTurn]:
+        """Answers the message with one tool call, or returns None to fall back to the LLM."""
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        normalized = " ".join(message.strip().lower().rstrip("?.!").split())
+        context = context or {}
+
+        for rule in self.rules:
+            match = rule.pattern.match(normalized)
+            if not match:
+                continue
+            if rule.needs_specializations and "specializations" not in context:
+                context = {**context, "specializations": await self.specializations()}
+            args = rule.build_args(match, context)
+            if args is None or rule.tool_name not in self.tools:
+                continue
+
+            try:
+                with span(f"tool.{rule.tool_name}", "tool", intent=rule.name):
+                    result = await self.tools[rule.tool_name](**args)
+                response = rule.format_result(result)
+            except Exception as e:
+                logger.warning("Intent router: %s failed, falling back to LLM: %s", rule.name, e)
+                self.stats["errors"] += 1
+                INTENT_ROUTER_REQUESTS.labels("error").inc()
+                return None
+
+            if response is None:
+                self.stats["declined"] += 1
+                INTENT_ROUTER_REQUESTS.labels("declined").inc()
+                return None
+
+            self.stats["hits"] += 1
+            INTENT_ROUTER_REQUESTS.labels("hit").inc()
+            elapsed = time.perf_counter() - started
+            self.stats["latency_ms_total"] += elapsed * 1000
+            INTENT_ROUTER_DURATION.labels(rule.name).observe(elapsed)
+            self.stats["hits_by_intent"][rule.name] = self.stats["hits_by_intent"].get(rule.name, 0) + 1
+            return RoutedTurn(rule.name, rule.tool_name, args, result, response)
+
+        self.stats["misses"] += 1
+        INTENT_ROUTER_REQUESTS.labels("miss").inc()
+        return None
+
+
+# ============================================================================
+# DEFAULT RULES
+# ============================================================================
+
+def _format_doctor_list(result: Dict[str, Any]) -> Optional[str]:
+    if "error" in result:
+        return None
+    doctors = result.get("doctors", [])
+    if not doctors:
+        return "I couldn't find any doctors matching that specialization."
+    lines = [f"• {d['name']} ({d['specialization'] or 'General'}) – ID {d['id']}" for d in doctors]
+    return f"Here are the available doctors ({len(doctors)}):\n" + "\n".join(lines)
+
+
+def _format_stats(result: Dict[str, Any]) -> Optional[str]:
+    if "error" in result:
+        return None
+    period = PERIOD_LABELS.get(result.get("period"), result.get("period"))
+    total = result.get("total_appointments", 0)
+    if not total:
+        return f"{result['doctor_name']} has no appointments {period}."
+    noun = "appointment" if total == 1 else "appointments"
+    lines = [
+        f"• {a['time']}: {a['patient']} ({a.get('reason') or 'Not specified'})"
+        for a in result.get("appointments", [])
+    ]
+    return f"{result['doctor_name']} has {total} {noun} {period}:\n" + "\n".join(lines)
+
+
+def _list_all_doctors_args(match: re.Match, context: Dict[str, Any]) -> Dict[str, Any]:
+    return {}
+
+
+def _list_specialists_args(match: re.Match, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    specialization = resolve_specialization(match.group("spec"), context.get("specializations", ()))
+    if not specialization:
+        return None
+    return {"specialization": specialization}
+
+
+def _named_stats_args(match: re.Match, context: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "doctor_name": match.group("doctor").strip(),
+        "query_type": PERIODS[match.group("period")],
+    }
+
+
+def _own_stats_args(match: re.Match, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    doctor = context.get("doctor")
+    if not doctor:
+        return None
+    return {
+        "doctor_name": doctor["name"],
+        "query_type": PERIODS[match.group("period")],
+        "doctor_id": doctor["id"],
+    }
+
+
+DEFAULT_RULES = [
+    IntentRule(
+        name="list_all_doctors",
+        tool_name="list_doctors",
+        pattern=re.compile(r"^(?:please )?(?:show me|list|show|find|see)(?: all the| all| the)? (?:doctors|available doctors)$"),
+        build_args=_list_all_doctors_args,
+        format_result=_format_doctor_list,
+    ),
+    IntentRule(
+        name="list_specialists",
+        tool_name="list_doctors",
+        pattern=re.compile(r"^(?:please )?(?:show me|find me|list|show|find)(?: all| the| a| an)? (?P<spec>[a-z ]+)$"),
+        build_args=_list_specialists_args,
+        format_result=_format_doctor_list,
+        needs_specializations=True,
+    ),
+    IntentRule(
+        name="doctor_stats",
+        tool_name="get_appointment_stats",
+        pattern=re.compile(
+            r"^(?:stats|statistics|report|summary|appointments|schedule)(?: for| of)? "
+            r"(?P<doctor>dr\.? [a-z][a-z .'-]*?)(?: for)? (?P<period>" + _PERIOD_PATTERN + r")$"
+        ),
+        build_args=_named_stats_args,
+        format_result=_format_stats,
+    ),
+    IntentRule(
+        name="own_stats",
+        tool_name="get_appointment_stats",
+        pattern=re.compile(
+            r"^(?:how many (?:patients|appointments)(?: do i have)?|my (?:appointments|schedule|patients|report)|"
+            r"(?:stats|report|summary) for)(?: for)? (?P<period>" + _PERIOD_PATTERN + r")$"
+        ),
+        build_args=_own_stats_args,
+        format_result=_format_stats,
+    ),
+]
+
+
+def build_default_router(
+    tools: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]],
+    load_specializations: Optional[Callable[[], Awaitable[List[str]]]] = None,
+    specializations_ttl_seconds: float = 300.0
+) -> IntentRouter:
+    router = IntentRouter(tools, load_specializations, specializations_ttl_seconds)
+    for rule in DEFAULT_RULES:
+        router.register(rule)
+    return router
@@ -1,42 +1,45 @@
 import json
+import logging
+import time
 import uuid
-import os
-from typing import List, Dict, Any, Optional
+from contextlib import AsyncExitStack
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.future import select
-import google.generativeai as genai
-from google.generativeai.types import FunctionDeclaration, Tool
-from google.api_core.exceptions import InvalidArgument
+from sqlalchemy.exc import IntegrityError
 
 from app.core.database import AsyncSessionLocal
 from app.models.models import ConversationSession
 from app.core.config import settings
+from app.core.tracing import span
+from app.core.deadline import DeadlineExceeded, turn_deadline, within_deadline
+from app.core.metrics import AGENT_LOOP_ITERATIONS, TURN_CUTOFFS, observe_llm_usage
 from app.core.tools import AVAILABLE_TOOLS  # We will use the functions directly
+from app.services.mcp_tools import list_specializations
+from app.llm import LLMProvider, create_provider
+from app.services.intent_router import build_default_router
+from app.services.conversation_recorder import conversation_recorder
+from app.services.admission import admission_controller
+from app.services.session_locks import session_locks
+from app.services.history import compact_history, fold_into_summary, format_summary_context
+from app.services.result_encoding import encode_tool_result
+from app.services.tool_memo import tool_memo
+from app.services.entity_context import extract_entities, format_entity_context, merge_entities
 from datetime import datetime
 
-# Configure Gemini
-if settings.GEMINI_API_KEY:
-    os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-else:
-    print("WARNING: GEMINI_API_KEY is not set.")
+logger = logging.getLogger(__name__)
 
-# Get current date for context
-current_date = datetime.now().strftime("%Y-%m-%d")
-current_day = datetime.now().strftime("%A")
-
-# Initialize Model with Tools
-tools_list = list(AVAILABLE_TOOLS.values())
+# Structurally simple messages are answered with one tool call, skipping Gemini
+intent_router = build_default_router(
+    AVAILABLE_TOOLS, list_specializations, settings.INTENT_ROUTER_SPECIALIZATIONS_TTL_SECONDS
+)
 
-model = genai.GenerativeModel(
-    model_name='gemini-flash-latest',
-    tools=tools_list,
-    system_instruction=f"""
+# Static so the model and its prompt prefix are built once; the date is sent with each turn (format_date_context)
+SYSTEM_INSTRUCTION = """
 You are a smart and helpful Doctor Appointment Assistant.
 Your goal is to help patients book appointments and help doctors get reports.
 
 CURRENT DATE CONTEXT:
-- Today's date is: {current_date}
-- Today is: {current_day}
+- Each message starts with a [Today: YYYY-MM-DD, Weekday] line giving the current date.
 - Use this information to calculate "tomorrow", "next week", etc.
 
 DATE HANDLING:
@@ -70,13 +73,39 @@ REPORTING RULES:
 4. If a tool returns an empty list, inform the doctor politely that no appointments were found for that period.
 
 BOOKING RULES:
-1. ALWAYS check availability before booking using `check_doctor_availability`.
+1. ALWAYS check availability before booking using `check_doctor_availability`, unless a [Known: ...] line already lists free slots for that doctor and date.
 2. If details (Name, Email, Reason) are missing, ASK for them.
 3. The `book_appointment` tool is the ONLY way to send emails.
 4. If you don't know a doctor's ID, use `list_doctors` first. NEVER guess an ID.
 5. If a doctor asks for specific patients (e.g. "patients with fever"), use the `filter_by` parameter.
+
+DOCTOR IDENTITY:
+1. A message may start with a [Context: ...] line naming the doctor you are talking to and their doctor_id.
+2. In that case do NOT ask who they are. Pass that `doctor_id` to tools for their own schedule and reports.
+
+KNOWN DETAILS:
+1. A message may include a [Known: ...] line with the doctor, date, free slots, patient and booking already resolved earlier in this conversation.
+2. Reuse them: pass the known `doctor_id` directly and do NOT call `list_doctors` or `check_doctor_availability` again just to recover them.
+3. If the user changes the doctor or date, look them up again.
+
+TOOL RESULTS:
+1. `free_slots` is compact: "09:00–12:30 every 30m, except 10:00" means every half hour from 09:00 to 12:30 is free except 10:00.
+2. Lists come as {"columns": [...], "rows": [...]}. If a list has a `next_cursor`, call the same tool again with `cursor` set to it to see the rest.
 """
-)
+
+# The provider (Gemini by default, or the offline scripted stand-in) is built on first use
+_llm_provider: Optional[LLMProvider] = None
+
+def get_llm_provider() -> LLMProvider:
+    global _llm_provider
+    if _llm_provider is None:
+        _llm_provider = create_provider(AVAILABLE_TOOLS, SYSTEM_INSTRUCTION)
+    return _llm_provider
+
+def set_llm_provider(provider: Optional[LLMProvider]):
+    """Swaps the provider (e.g. for load tests or replays). None rebuilds it from settings."""
+    global _llm_provider
+    _llm_provider = provider
 
 async def get_or_create_session(session_id: Optional[str] = None, user_id: Optional[int] = None) -> ConversationSession:
     async with AsyncSessionLocal() as db:
@@ -86,8 +115,8 @@ async def get_or_create_session(session_id: Optional[str] = None, user_id: Optio
             if session:
                 return session
         
-        # Create new session
-        new_id = str(uuid.uuid4())
+        # Create new session (keeping caller-chosen IDs such as "slack_<user>" stable)
+        new_id = session_id or str(uuid.uuid4())
         session = ConversationSession(
             session_id=new_id,
             user_id=user_id,
@@ -95,7 +124,13 @@ async def get_or_create_session(session_id: Optional[str] = None, user_id: Optio
             context={}
         )
         db.add(session)
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another turn created the same caller-chosen session concurrently
+            await db.rollback()
+            result = await db.execute(select(ConversationSession).where(ConversationSession.session_id == new_id))
+            return result.scalars().first()
         await db.refresh(session)
         return session
 
@@ -104,186 +139,258 @@ async def update_session_messages(session_id: str, new_messages: List[Dict]):
         result = await db.execute(select(ConversationSession).where(ConversationSession.session_id == session_id))
         session = result.scalars().first()
         if session:
-            current_msgs = list(session.messages)
-            current_msgs.extend(new_messages)
-            if len(current_msgs) > 60: 
-                current_msgs = current_msgs[-60:]
+            current_msgs, dropped = compact_history(
+                list(session.messages) + new_messages,
+                budget_tokens=settings.HISTORY_TOKEN_BUDGET,
+                recent_tool_payloads=settings.HISTORY_RECENT_TOOL_PAYLOADS,
+                max_messages=settings.HISTORY_MAX_MESSAGES
+            )
             session.messages = current_msgs
+            if dropped and settings.HISTORY_ROLLING_SUMMARY:
+                context = dict(session.context or {})
+                context["history_summary"] = fold_into_summary(
+                    context.get("history_summary"), dropped, settings.HISTORY_SUMMARY_MAX_CHARS
+                )
+                session.context = context
             await db.commit()
 
-async def process_chat_message(user_message: str, session_id: Optional[str] = None, user_id: Optional[int] = None) -> Dict[str, Any]:
+async def update_session_context(session_id: str, updates: Dict[str, Any]):
+    """Sets the given context keys, keeping the others (e.g. the rolling summary written meanwhile)."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(ConversationSession).where(ConversationSession.session_id == session_id))
+        session = result.scalars().first()
+        if session:
+            session.context = {**(session.context or {}), **updates}
+            await db.commit()
+
+def format_date_context(now: Optional[datetime] = None) -> str:
+    """Per-turn note with today's date, so a long-running process never works from a stale one."""
+    now = now or datetime.now()
+    return f"[Today: {now:%Y-%m-%d}, {now:%A}]"
+
+def format_identity_context(doctor: Dict[str, Any]) -> str:
+    """Compact per-turn note telling the model which doctor it is talking to."""
+    specialization = f", {doctor['specialization']}" if doctor.get("specialization") else ""
+    return (
+        f"[Context: You are talking to {doctor['name']} (doctor_id={doctor['id']}{specialization}). "
+        f"Use doctor_id={doctor['id']} for their own schedule and reports.]"
+    )
+
+async def process_chat_message(
+    user_message: str,
+    session_id: Optional[str] = None,
+    user_id: Optional[int] = None,
+    doctor: Optional[Dict[str, Any]] = None,
+    tenant: str = "default"
+) -> Dict[str, Any]:
+    """
+    Runs one chat turn. Turns for the same session run one at a time, in arrival
+    order. Turns that need the LLM then wait for an admission slot for `tenant`;
+    AdmissionRejected propagates so callers can answer 429/503. Each turn gets
+    TURN_DEADLINE_SECONDS from arrival, including any wait for an earlier turn;
+    a turn that runs out while still waiting raises SessionBusy (an AdmissionRejected),
+    one that runs out later stops with a partial answer.
+    """
+    async with AsyncExitStack() as stack:
+        stack.enter_context(turn_deadline(settings.TURN_DEADLINE_SECONDS))
+        # A new session cannot have a concurrent turn yet
+        if session_id:
+            await stack.enter_async_context(session_locks.hold(session_id))
+        return await _run_chat_turn(user_message, session_id, user_id, doctor, tenant)
+
+def compact_result(tool_name: str, result: Any) -> Any:
+    if not settings.TOOL_RESULT_COMPACT:
+        return result
+    return encode_tool_result(tool_name, result, settings.TOOL_RESULT_MAX_ITEMS)
+
+async def remember_entities(session_id: str, entities: Dict[str, Any], calls: List[Tuple[str, Dict[str, Any], Any]]):
+    """Folds what this turn's tool calls resolved into the session's entity context."""
+    if not settings.ENTITY_CONTEXT_ENABLED:
+        return
+    updated = entities
+    for tool_name, tool_args, tool_result in calls:
+        updated = merge_entities(updated, extract_entities(tool_name, tool_args, tool_result))
+    if updated != entities:
+        await update_session_context(session_id, {"entities": updated})
+
+def partial_answer(completed: List[str], pending: Optional[str], reason: str) -> str:
+    """Reply for a turn cut short, telling the user what did and did not happen."""
+    completed = [name.replace("_", " ") for name in completed]
+    parts = [f"Sorry, I had to stop before finishing because {reason}."]
+    if completed:
+        parts.append(f"Completed steps: {', '.join(completed)}.")
+    if pending:
+        parts.append(f"I was still running {pending.replace('_', ' ')}, so it may or may not have gone through. Please check before retrying.")
+    else:
+        parts.append("Please try again, or split the request into smaller steps.")
+    return " ".join(parts)
+
+async def _run_chat_turn(
+    user_message: str,
+    session_id: Optional[str],
+    user_id: Optional[int],
+    doctor: Optional[Dict[str, Any]],
+    tenant: str
+) -> Dict[str, Any]:
     session = await get_or_create_session(session_id, user_id)
+
+    # Remember which doctor owns this session (e.g. resolved from their Slack user ID)
+    context = dict(session.context or {})
+    if doctor and context.get("doctor") != doctor:
+        context["doctor"] = doctor
+        await update_session_context(session.session_id, {"doctor": doctor})
+    entities = context.get("entities") or {}
+
+    turn = conversation_recorder.start_turn(session.session_id, user_message, context.get("doctor"))
+
+    if settings.INTENT_ROUTER_ENABLED:
+        routed = await intent_router.route(user_message, context)
+        if routed:
+            turn.routed = True
+            # Store the turn exactly as if the model had made the tool call, so later turns can build on it
+            await update_session_messages(session.session_id, [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": None, "tool_call": {"name": routed.tool_name, "args": routed.tool_args}},
+                {"role": "user", "content": None, "tool_response": {"name": routed.tool_name, "result": compact_result(routed.tool_name, routed.tool_result)}},
+                {"role": "assistant", "content": routed.response}
+            ])
+            await remember_entities(session.session_id, entities, [(routed.tool_name, routed.tool_args, routed.tool_result)])
+            conversation_recorder.finish(turn, routed.response)
+            AGENT_LOOP_ITERATIONS.labels("routed").observe(1)
+            return {
+                "response": routed.response,
+                "session_id": session.session_id
+            }
     
-    # helper to map roles
-    def map_role(r):
-        if r == 'assistant':
-            return 'model'
-        # Gemini history often requires 'user' role for function response turns
-        return 'user'
-
-    # Reconstruct History
-    # We include function calls and responses to maintain context
-    from google.generativeai import protos
-    gemini_history = []
-    
-    for msg in session.messages:
-        role = map_role(msg['role'])
-        content = msg.get('content')
-        tool_call = msg.get('tool_call')
-        tool_response = msg.get('tool_response')
-        
-        parts = []
-        if content:
-            parts.append(protos.Part(text=content))
-        
-        if tool_call:
-             parts.append(protos.Part(
-                 function_call=protos.FunctionCall(
-                     name=tool_call['name'],
-                     args=tool_call['args']
-                 )
-             ))
-        
-        if tool_response:
-             parts.append(protos.Part(
-                 function_response=protos.FunctionResponse(
-                     name=tool_response['name'],
-                     response={"result": tool_response['result']}
-                 )
-             ))
-             
-        if parts:
-            # If the last message was also the same role, we might want to merge parts?
-            # But in function calling, they should be distinct turns.
-            # However, tool_response MUST have a non-model role.
-            if tool_response:
-                role = 'user' # Force user role for function responses
-            
-            gemini_history.append({"role": role, "parts": parts})
-    
-    # --- SANITIZATION: Fix Broken Tool Chains due to Truncation ---
-    # Ensure history doesn't start with a function_response (orphaned)
-    while gemini_history and gemini_history[0]["parts"][0].function_response:
-        print("Sanitizing history: Removing orphaned function_response at start.")
-        gemini_history.pop(0)
-
-    # Ensure history doesn't start with a model function_call that has no user response following it immediately?
-    # Actually, Gemini might tolerate a call at start, but let's be safe. 
-    # The more critical one is function_response without call.
-    # Also remove if first message is 'model' but not a function call? 
-    # (Gemini usually okay with Model starting, but typically User starts).
-    
-    # Basic check: If sanitized history is empty, that's fine (new chat).
-    
-    chat = model.start_chat(history=gemini_history)
-    
+    iterations = 0
+    pending_tool = None
+    turn_id = uuid.uuid4().hex
+
+    slot = await admission_controller.acquire(tenant)
     try:
+        # Inside the try: building the model or converting stored history can fail, and the slot must come back
+        provider = get_llm_provider()
+        chat = provider.start_chat(history=session.messages)
+
         # 1. Store User Message in DB first to ensure correct Turn order in history
         await update_session_messages(session.session_id, [{"role": "user", "content": user_message}])
 
-        # 2. Send User Message to Gemini
-        print(f"Sending to Gemini: {user_message}")
-        response = await chat.send_message_async(user_message)
-        print("Received response from Gemini.")
+        # The date, identity note, rolling summary and known entities are sent with every turn but never stored in history
+        model_input = user_message
+        if settings.ENTITY_CONTEXT_ENABLED and entities:
+            model_input = f"{format_entity_context(entities)}\n{model_input}"
+        if context.get("history_summary"):
+            model_input = f"{format_summary_context(context['history_summary'])}\n{model_input}"
+        if context.get("doctor"):
+            model_input = f"{format_identity_context(context['doctor'])}\n{model_input}"
+        model_input = f"{format_date_context()}\n{model_input}"
+
+        # 2. Send User Message to the model
+        logger.debug("Sending turn to LLM: %s", user_message)
+        started = time.perf_counter()
+        with span("llm.send_message", "llm"):
+            response = await within_deadline(chat.send_message(model_input))
+        turn.add_llm_call(response, started)
+        observe_llm_usage(provider.name, response.usage)
         
-        # 2. Loop for Tool Calls
+        # 3. Loop for Tool Calls
         final_text = ""
         
         while True:
-            if not response.parts:
-                try:
-                    final_text = response.text
-                except Exception as e:
-                     print(f"Error accessing response.text: {e}")
-                     final_text = ""
+            if not response.function_calls:
+                final_text = response.text
+                break
+            if iterations >= settings.TURN_MAX_TOOL_ITERATIONS:
+                TURN_CUTOFFS.labels("max_iterations").inc()
+                logger.warning("Turn stopped at the tool iteration cap", extra={"session_id": session.session_id})
+                final_text = partial_answer(
+                    [c["name"] for c in turn.tool_calls], None, "the request needed too many steps"
+                )
                 break
 
-            # Check if ANY part is a function call
-            function_call_part = None
-            for p in response.parts:
-                if p.function_call:
-                    function_call_part = p
-                    break
+            iterations += 1
+            fc = response.function_calls[0]
+            tool_name = fc.name
+            tool_args = dict(fc.args)
             
-            if function_call_part:
-                fc = function_call_part.function_call
-                tool_name = fc.name
-                tool_args = dict(fc.args)
-                
-                print(f"Executing Tool: {tool_name} with args: {tool_args}")
-                
-                if tool_name in AVAILABLE_TOOLS:
-                    tool_func = AVAILABLE_TOOLS[tool_name]
-                    try:
-                        tool_result = await tool_func(**tool_args)
-                    except Exception as e:
-                        tool_result = {"error": str(e)}
-                else:
-                    tool_result = {"error": f"Tool {tool_name} not found"}
-                
-                print(f"Tool Result: {tool_result}")
-
-                # Store tool call and response in history
-                await update_session_messages(session.session_id, [
-                    {
-                        "role": "assistant", 
-                        "content": None, 
-                        "tool_call": {"name": tool_name, "args": tool_args}
-                    },
-                    {
-                        "role": "user", # Function responses are stored as 'user' to maintain turn consistency
-                        "content": None, 
-                        "tool_response": {"name": tool_name, "result": tool_result}
-                    }
-                ])
-
-                # Send result back to model
-                from google.generativeai import protos
-                
-                response = await chat.send_message_async(
-                    [
-                        protos.Part(
-                            function_response=protos.FunctionResponse(
-                                name=tool_name,
-                                response={"result": tool_result}
-                            )
-                        )
-                    ]
-                )
-                # Loop continues
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executing tool %s", tool_name, extra={"tool_args": tool_args})
             
+            started = time.perf_counter()
+            memoized = False
+            if tool_name in AVAILABLE_TOOLS:
+                tool_func = AVAILABLE_TOOLS[tool_name]
+                pending_tool = tool_name
+                try:
+                    with span(f"tool.{tool_name}", "tool"):
+                        if settings.TOOL_MEMO_ENABLED:
+                            tool_result, memoized = await within_deadline(
+                                tool_memo.call(session.session_id, turn_id, tool_name, tool_func, tool_args)
+                            )
+                        else:
+                            tool_result = await within_deadline(tool_func(**tool_args))
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    tool_result = {"error": str(e)}
             else:
-                # Manual text construction with strict safety checks
-                text_parts = []
-                for p in response.parts:
-                    # Skip function calls explicitly before touching .text
-                    if p.function_call:
-                        continue
-                    
-                    try:
-                        if p.text:
-                            text_parts.append(p.text)
-                    except Exception as e:
-                        print(f"Skipping part due to text access error: {e}")
-                        continue
-                
-                final_text = "".join(text_parts)
-                
-                # If still empty, try response.text as last resort fallback
-                if not final_text:
-                    try:
-                        final_text = response.text
-                    except Exception:
-                        pass
-                
-                break
+                tool_result = {"error": f"Tool {tool_name} not found"}
+            
+            pending_tool = None
+            turn.add_tool_call(tool_name, tool_args, tool_result, started)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Tool call finished", extra={
+                    "tool": tool_name,
+                    "ms": turn.tool_calls[-1]["ms"],
+                    "memoized": memoized,
+                    "tool_error": tool_result.get("error") if isinstance(tool_result, dict) else None,
+                })
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool %s result", tool_name, extra={"tool_result": tool_result})
+            # The model and the stored history both get the compact form
+            model_result = compact_result(tool_name, tool_result)
 
+            # Store tool call and response in history
+            await update_session_messages(session.session_id, [
+                {
+                    "role": "assistant", 
+                    "content": None, 
+                    "tool_call": {"name": tool_name, "args": tool_args}
+                },
+                {
+                    "role": "user", # Function responses are stored as 'user' to maintain turn consistency
+                    "content": None, 
+                    "tool_response": {"name": tool_name, "result": model_result}
+                }
+            ])
+
+            # Send result back to model; loop continues
+            started = time.perf_counter()
+            with span("llm.send_function_response", "llm", tool=tool_name):
+                response = await within_deadline(chat.send_function_response(tool_name, model_result))
+            turn.add_llm_call(response, started)
+            observe_llm_usage(provider.name, response.usage)
+
+    except DeadlineExceeded:
+        # The work in flight has been cancelled; answer with what is known
+        TURN_CUTOFFS.labels("deadline").inc()
+        logger.warning("Turn deadline exceeded", extra={"session_id": session.session_id, "pending_tool": pending_tool})
+        final_text = partial_answer(
+            [c["name"] for c in turn.tool_calls], pending_tool, "the request took too long"
+        )
     except Exception as e:
         final_text = f"Error communicating with AI: {str(e)}"
-        print(f"Gemini Error Details: {e}")
+        logger.exception("LLM turn failed", extra={"session_id": session.session_id})
+    finally:
+        slot.release()
 
+    await remember_entities(
+        session.session_id, entities, [(c["name"], c["args"], c["result"]) for c in turn.tool_calls]
+    )
     # Update DB with Final Assistant Response
     await update_session_messages(session.session_id, [{"role": "assistant", "content": final_text}])
+    conversation_recorder.finish(turn, final_text)
+    AGENT_LOOP_ITERATIONS.labels("llm").observe(iterations)
     
     return {
         "response": final_text,
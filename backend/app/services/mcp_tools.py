@@ -1,11 +1,136 @@
+import asyncio
+import logging
 from datetime import datetime, date, timedelta, time
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
 from app.models.models import Doctor, Appointment, AvailabilitySlot
-import httpx
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, io_timeout
+from app.core.single_flight import coalesced
+from app.services.result_encoding import apply_cursor
+from app.services.tool_memo import tool_memo
+from app.services.availability_cache import availability_cache
+from app.services.notification_dispatcher import notification_dispatcher
+from app.core.metrics import BOOKING_CONFLICTS
+
+logger = logging.getLogger(__name__)
+
+# Map common terms to medical specializations
+SPECIALIZATION_SYNONYMS = {
+    "heart": "Cardiologist",
+    "heart doctor": "Cardiologist",
+    "cardiac": "Cardiologist",
+    "tooth": "Dentist",
+    "dental": "Dentist",
+    "teeth": "Dentist",
+    "bone": "Orthopedic",
+    "skin": "Dermatologist",
+    "eye": "Ophthalmologist",
+    "brain": "Neurologist",
+    "child": "Pediatrician",
+    "kids": "Pediatrician",
+    "baby": "Pediatrician",
+}
+
+def normalize_specialization(specialization: str) -> str:
+    """Maps user-friendly terms ("heart doctor") to the medical specialization."""
+    spec_lower = specialization.lower()
+    for key, value in SPECIALIZATION_SYNONYMS.items():
+        if key in spec_lower:
+            return value
+    return specialization
+
+async def add_to_calendar(
+    doctor_name: str, patient_name: str, patient_email: str, appt_time: datetime
+) -> Tuple[Optional[str], str]:
+    """Creates the Calendar event for a booking. Returns the event link (if any) and a note for the user."""
+    from app.services.google_calendar import calendar_service
+
+    # Calculate end time (assuming 30 mins for now, or fetch slot duration)
+    #Ideally get this from availability slot config, but default 30m is fine for MVP
+    end_time = appt_time + timedelta(minutes=30)
+
+    # The Calendar client is blocking, so run it off the event loop and stop waiting at the timeout.
+    # A thread cannot be cancelled: a timed-out request may still create the event later
+    try:
+        calendar_link = await asyncio.wait_for(
+            asyncio.to_thread(
+                calendar_service.create_event,
+                summary=f"Appointment with {doctor_name} - {patient_name}",
+                start_time=appt_time,
+                end_time=end_time,
+                attendee_email=patient_email
+            ),
+            timeout=io_timeout()
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Calendar sync for %s timed out; the event may still be created.", doctor_name)
+        return None, " (Calendar sync timed out.)"
+
+    if calendar_link:
+        return calendar_link, f" Added to Google Calendar: {calendar_link}"
+    return None, " (Calendar sync skipped: No credentials found)"
+
+async def send_booking_followups(
+    doctor_name: str, patient_name: str, patient_email: str, appt_time: datetime, reason: Optional[str]
+) -> Tuple[Optional[str], str]:
+    """
+    Runs the side effects of a committed booking: doctor notification, Calendar event and
+    confirmation email. Returns the event link (if any) and the message for the user.
+    """
+    # --- Slack Notification ---
+    # Notify the doctor about the new appointment in a structured way.
+    # Bookings are coalesced into per-doctor digests; appointments coming up
+    # soon are urgent and skip the coalescing window.
+    # Queued first: it is only an enqueue, and the doctor must hear about the booking
+    # even if the turn runs out of time in the steps below
+    notification_msg = (
+        f"*New appointment scheduled!*\n"
+        f"• *Patient:* {patient_name}\n"
+        f"• *Time:* {appt_time.strftime('%Y-%m-%d %H:%M')}\n"
+        f"• *Reason:* {reason or 'Not specified'}"
+    )
+    urgent = appt_time - datetime.now() <= timedelta(minutes=settings.NOTIFICATION_URGENT_WITHIN_MINUTES)
+    await notification_dispatcher.notify(doctor_name, notification_msg, urgent=urgent)
+
+    msg = "Appointment booked successfully."
+    calendar_link = None
+    try:
+        # --- Google Calendar Integration ---
+        calendar_link, calendar_note = await add_to_calendar(doctor_name, patient_name, patient_email, appt_time)
+        msg += calendar_note
+
+        # --- Email Integration ---
+        from app.services.email_service import email_service
+        email_sent = await email_service.send_appointment_confirmation(
+            patient_email=patient_email,
+            patient_name=patient_name,
+            appt_time=appt_time.strftime("%Y-%m-%d %H:%M"),
+            doctor_name=doctor_name,
+            calendar_link=calendar_link
+        )
+    except DeadlineExceeded:
+        # The booking is already committed; report it as booked rather than failing the turn
+        logger.warning("Turn deadline ran out during follow-ups for %s's booking.", doctor_name)
+        return calendar_link, msg + " (Confirmation email skipped: the request ran out of time.)"
+
+    if not email_sent:
+        msg += " (Email delivery failed. Please check SMTP settings.)"
+    elif not settings.SMTP_USER:
+        msg += " (Email simulation active: No SMTP credentials found.)"
+    else:
+        msg += " Confirmation email sent successfully."
+    return calendar_link, msg
+
+async def list_specializations() -> List[str]:
+    """Distinct specializations of the doctors on record."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Doctor.specialization).where(Doctor.specialization.isnot(None)).distinct()
+        )
+        return list(result.scalars())
 
 async def get_doctor_by_name(session: AsyncSession, name: str) -> Optional[Doctor]:
     """Helper to find a doctor by fuzzy name matching."""
@@ -26,30 +151,29 @@ async def get_doctor_by_name(session: AsyncSession, name: str) -> Optional[Docto
     
     return None
 
-async def check_doctor_availability(
-    doctor_name: str,
-    date_str: str,  # YYYY-MM-DD
-    time_preference: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Checks availability for a specific doctor on a given date.
-    """
-    async with AsyncSessionLocal() as session:
-        doctor = await get_doctor_by_name(session, doctor_name)
-        if not doctor:
-            return {"error": f"Doctor '{doctor_name}' not found."}
-
-        try:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            return {"error": "Invalid date format. Use YYYY-MM-DD."}
+async def resolve_doctor(
+    session: AsyncSession,
+    doctor_name: Optional[str] = None,
+    doctor_id: Optional[int] = None
+) -> Optional[Doctor]:
+    """Helper to load a doctor by primary key when the ID is known, else by fuzzy name."""
+    if doctor_id:
+        doctor = await session.get(Doctor, int(doctor_id))
+        if doctor:
+            return doctor
+    if doctor_name:
+        return await get_doctor_by_name(session, doctor_name)
+    return None
 
+async def compute_free_slots(doctor_id: int, target_date: date) -> Dict[str, Any]:
+    """Free slot start times ("HH:MM") for a doctor on a date; `working` is False on their days off."""
+    async with AsyncSessionLocal() as session:
         day_of_week = target_date.weekday() # 0=Monday
 
         # 1. Get availability slots config for this doctor on this day
         stmt = select(AvailabilitySlot).where(
             and_(
-                AvailabilitySlot.doctor_id == doctor.id,
+                AvailabilitySlot.doctor_id == doctor_id,
                 AvailabilitySlot.day_of_week == day_of_week
             )
         )
@@ -57,7 +181,7 @@ async def check_doctor_availability(
         availability_configs = result.scalars().all()
 
         if not availability_configs:
-            return {"doctor": doctor.name, "date": date_str, "available_slots": [], "message": "Doctor is not working on this day."}
+            return {"working": False, "slots": []}
 
         # 2. Get existing appointments
         start_of_day = datetime.combine(target_date, time.min)
@@ -65,7 +189,7 @@ async def check_doctor_availability(
         
         appt_stmt = select(Appointment).where(
             and_(
-                Appointment.doctor_id == doctor.id,
+                Appointment.doctor_id == doctor_id,
                 Appointment.appointment_time >= start_of_day,
                 Appointment.appointment_time <= end_of_day,
                 Appointment.status != "cancelled"
@@ -105,12 +229,43 @@ async def check_doctor_availability(
                 current_time += timedelta(minutes=config.slot_duration_minutes)
 
 
-        return {
-            "doctor_id": doctor.id,
-            "doctor_name": doctor.name,
-            "date": date_str,
-            "available_slots": available_slots
-        }
+        return {"working": True, "slots": available_slots}
+
+@coalesced
+async def check_doctor_availability(
+    doctor_name: Optional[str] = None,
+    date_str: str = "",  # YYYY-MM-DD
+    time_preference: Optional[str] = None,
+    doctor_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Checks availability for a specific doctor on a given date.
+    If `doctor_id` is already known it is used instead of the name search, and the name can be left out.
+    Free slots come from the shared availability cache, which bookings invalidate.
+    """
+    async with AsyncSessionLocal() as session:
+        doctor = await resolve_doctor(session, doctor_name, doctor_id)
+        if not doctor:
+            return {"error": f"Doctor '{doctor_name or doctor_id}' not found."}
+        doctor_id, doctor_name = doctor.id, doctor.name
+
+    try:
+        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return {"error": "Invalid date format. Use YYYY-MM-DD."}
+
+    free = await availability_cache.get_or_compute(
+        doctor_id, target_date.isoformat(), lambda: compute_free_slots(doctor_id, target_date)
+    )
+    if not free["working"]:
+        return {"doctor_id": doctor_id, "doctor_name": doctor_name, "date": date_str, "available_slots": [], "message": "Doctor is not working on this day."}
+
+    return {
+        "doctor_id": doctor_id,
+        "doctor_name": doctor_name,
+        "date": date_str,
+        "available_slots": free["slots"]
+    }
 
 async def book_appointment(
     doctor_id: int,
@@ -142,6 +297,9 @@ async def book_appointment(
         )
         result = await session.execute(stmt)
         if result.scalars().first():
+            BOOKING_CONFLICTS.inc()
+            # The slot was offered as free, so cached availability may be stale (e.g. booked on another worker)
+            await availability_cache.invalidate_doctor(doctor_id)
             return {"status": "failed", "error": "Slot already taken."}
 
         new_appt = Appointment(
@@ -155,60 +313,17 @@ async def book_appointment(
         session.add(new_appt)
         await session.commit()
         await session.refresh(new_appt)
+        # Cached availability and memoized reports for this doctor no longer hold
+        await availability_cache.invalidate_doctor(doctor_id)
+        tool_memo.invalidate_booking(doctor_id, appt_time.date().isoformat())
         
         # Fetch doctor details for notifications
         doctor = await session.get(Doctor, doctor_id)
         doctor_name = doctor.name if doctor else f"ID {doctor_id}"
 
-        
-        # --- Google Calendar Integration ---
-        from app.services.google_calendar import calendar_service
-        
-        # Calculate end time (assuming 30 mins for now, or fetch slot duration)
-        #Ideally get this from availability slot config, but default 30m is fine for MVP
-        end_time = appt_time + timedelta(minutes=30)
-        
-        calendar_link = calendar_service.create_event(
-            summary=f"Appointment with {doctor_name} - {patient_name}",
-            start_time=appt_time,
-            end_time=end_time,
-            attendee_email=patient_email
-        )
-        
-        # --- Email Integration ---
-        from app.services.email_service import email_service
-        # We don't await here to avoid blocking the user response, or we can await for better reliability
-        # In FastAPI, we could use BackgroundTasks, but for simplicity here we await
-        email_sent = await email_service.send_appointment_confirmation(
-            patient_email=patient_email,
-            patient_name=patient_name,
-            appt_time=appt_time.strftime("%Y-%m-%d %H:%M"),
-            doctor_name=doctor_name,
-            calendar_link=calendar_link
-        )
-
-        msg = "Appointment booked successfully."
-        if calendar_link:
-            msg += f" Added to Google Calendar: {calendar_link}"
-        else:
-             msg += " (Calendar sync skipped: No credentials found)"
-             
-        if not email_sent:
-            msg += " (Email delivery failed. Please check SMTP settings.)"
-        elif not settings.SMTP_USER:
-            msg += " (Email simulation active: No SMTP credentials found.)"
-        else:
-            msg += " Confirmation email sent successfully."
-
-        # --- Slack Notification ---
-        # Notify the doctor about the new appointment in a structured way
-        notification_msg = (
-            f"*New appointment scheduled!*\n"
-            f"• *Patient:* {patient_name}\n"
-            f"• *Time:* {appt_time.strftime('%Y-%m-%d %H:%M')}\n"
-            f"• *Reason:* {reason or 'Not specified'}"
+        calendar_link, msg = await send_booking_followups(
+            doctor_name, patient_name, patient_email, appt_time, reason
         )
-        await send_doctor_notification(doctor_name, notification_msg)
 
         return {
             "status": "success",
@@ -217,18 +332,23 @@ async def book_appointment(
             "calendar_link": calendar_link
         }
 
+@coalesced
 async def get_appointment_stats(
-    doctor_name: str,
-    query_type: str, # 'today', 'tomorrow', 'this_week'
-    filter_by: Optional[str] = None
+    doctor_name: Optional[str] = None,
+    query_type: str = "", # 'today', 'tomorrow', 'this_week'
+    filter_by: Optional[str] = None,
+    doctor_id: Optional[int] = None,
+    cursor: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Gets appointment statistics for a doctor.
+    If `doctor_id` is already known it is used instead of the name search, and the name can be left out.
+    Long lists are paged: pass a previous result's `next_cursor` as `cursor` for the rest.
     """
     async with AsyncSessionLocal() as session:
-        doctor = await get_doctor_by_name(session, doctor_name)
+        doctor = await resolve_doctor(session, doctor_name, doctor_id)
         if not doctor:
-            return {"error": f"Doctor '{doctor_name}' not found."}
+            return {"error": f"Doctor '{doctor_name or doctor_id}' not found."}
 
         today = date.today()
         start_date = None
@@ -266,8 +386,10 @@ async def get_appointment_stats(
 
         result = await session.execute(stmt)
         appointments = result.scalars().all()
+        page, offset = apply_cursor(appointments, cursor)
 
-        return {
+        stats = {
+            "doctor_id": doctor.id,
             "doctor_name": doctor.name,
             "period": query_type,
             "total_appointments": len(appointments),
@@ -277,9 +399,12 @@ async def get_appointment_stats(
                     "patient": appt.patient_name,
                     "reason": appt.reason
                 }
-                for appt in appointments
+                for appt in page
             ]
         }
+        if offset:
+            stats["offset"] = offset
+        return stats
 
 
 async def send_doctor_notification(
@@ -289,138 +414,34 @@ async def send_doctor_notification(
 ) -> Dict[str, Any]:
     """
     Sends a notification to the doctor via Slack Webhook.
+    Explicit requests bypass digest coalescing but still respect the webhook rate limit.
     """
-    webhook_url = settings.SLACK_WEBHOOK_URL
-    
-    if not webhook_url:
-        print(f"Mock Notification to {doctor_name}: {message}")
-        return {
-            "status": "success",
-            "mode": "mock",
-            "recipient": doctor_name,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        }
-
-    # Premium Slack Payload Design
-    # We use 'attachments' to get the colored sidebar (blue for info) which feels more 'premium'
-    # than just plain blocks.
-    
-    # Simple logic to split message into an intro and body if possible
-    lines = message.strip().split('\n')
-    intro = lines[0] if lines else "New Update"
-    body = "\n".join(lines[1:]) if len(lines) > 1 else ""
-
-    payload = {
-        "attachments": [
-            {
-                "color": "#36a64f", # Health green
-                "blocks": [
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": "🏥 MediAssist Professional",
-                            "emoji": True
-                        }
-                    },
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Hello {doctor_name},*\n{intro}"
-                        }
-                    }
-                ]
-            }
-        ]
-    }
-
-    if body:
-        payload["attachments"][0]["blocks"].append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": body
-            }
-        })
-
-    # Add footer context
-    payload["attachments"][0]["blocks"].extend([
-        {
-            "type": "divider"
-        },
-        {
-            "type": "context",
-            "elements": [
-                {
-                    "type": "mrkdwn",
-                    "text": f"📅 *Issued:* {datetime.now().strftime('%b %d, %Y | %H:%M')}  •  🤖 *AI Assistant*"
-                }
-            ]
-        }
-    ])
+    return await notification_dispatcher.deliver(doctor_name, [message])
 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(webhook_url, json=payload)
-            resp.raise_for_status()
-            
-        return {
-            "status": "success",
-            "mode": "live",
-            "channel": "slack",
-            "recipient": doctor_name,
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        print(f"Failed to send Slack notification: {e}")
-        return {
-            "status": "failed",
-            "error": str(e),
-            "recipient": doctor_name
-        }
-
-async def list_doctors(specialization: Optional[str] = None) -> Dict[str, Any]:
+@coalesced
+async def list_doctors(specialization: Optional[str] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Lists all available doctors, optionally filtering by specialization.
+    Long lists are paged: pass a previous result's `next_cursor` as `cursor` for the rest.
     """
     async with AsyncSessionLocal() as session:
-        # Map common terms to medical specializations
-        specialization_map = {
-            "heart": "Cardiologist",
-            "heart doctor": "Cardiologist",
-            "cardiac": "Cardiologist",
-            "tooth": "Dentist",
-            "dental": "Dentist",
-            "teeth": "Dentist",
-            "bone": "Orthopedic",
-            "skin": "Dermatologist",
-            "eye": "Ophthalmologist",
-            "brain": "Neurologist",
-            "child": "Pediatrician",
-            "kids": "Pediatrician",
-            "baby": "Pediatrician",
-        }
-        
         # Convert common terms to medical specialization
         if specialization:
-            spec_lower = specialization.lower()
-            for key, value in specialization_map.items():
-                if key in spec_lower:
-                    specialization = value
-                    break
+            specialization = normalize_specialization(specialization)
         
         stmt = select(Doctor)
         if specialization:
             stmt = stmt.where(Doctor.specialization.ilike(f"%{specialization}%"))
         
         result = await session.execute(stmt)
-        doctors = result.scalars().all()
-        return {
+        doctors, offset = apply_cursor(result.scalars().all(), cursor)
+        listing = {
             "doctors": [
                 {"id": d.id, "name": d.name, "specialization": d.specialization} 
                 for d in doctors
             ]
         }
+        if offset:
+            listing["offset"] = offset
+        return listing
 
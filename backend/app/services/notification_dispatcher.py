@@ -0,0 +1,309 @@
+import asyncio
+import logging
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.core.deadline import io_timeout
+
+logger = logging.getLogger(__name__)
+
+HEADER_TEXT = "🏥 MediAssist Professional"
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        """Empties the bucket so nothing is sent for roughly `seconds` (e.g. after a 429)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _footer_blocks() -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "divider"
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"📅 *Issued:* {datetime.now().strftime('%b %d, %Y | %H:%M')}  •  🤖 *AI Assistant*"
+                }
+            ]
+        }
+    ]
+
+
+def _wrap_blocks(blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # 'attachments' give the colored sidebar (health green) which feels more 'premium'
+    return {
+        "attachments": [
+            {
+                "color": "#36a64f",
+                "blocks": [
+                    {
+                        "type": "header",
+                        "text": {
+                            "type": "plain_text",
+                            "text": HEADER_TEXT,
+                            "emoji": True
+                        }
+                    },
+                    *blocks,
+                    *_footer_blocks()
+                ]
+            }
+        ]
+    }
+
+
+def build_notification_payload(doctor_name: str, message: str) -> Dict[str, Any]:
+    """Block Kit payload for a single message: first line is the intro, the rest the body."""
+    lines = message.strip().split('\n')
+    intro = lines[0] if lines else "New Update"
+    body = "\n".join(lines[1:]) if len(lines) > 1 else ""
+
+    blocks = [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"*Hello {doctor_name},*\n{intro}"
+            }
+        }
+    ]
+    if body:
+        blocks.append({
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": body
+            }
+        })
+    return _wrap_blocks(blocks)
+
+
+def build_digest_payload(doctor_name: str, messages: List[str], max_items: int = 10) -> Dict[str, Any]:
+    """Block Kit payload that coalesces several messages for one doctor into a digest."""
+    if len(messages) == 1:
+        return build_notification_payload(doctor_name, messages[0])
+
+    blocks = [
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"*Hello {doctor_name},*\nYou have {len(messages)} new updates."
+            }
+        }
+    ]
+    for message in messages[:max_items]:
+        blocks.append({"type": "divider"})
+        blocks.append({
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": message.strip()
+            }
+        })
+
+    hidden = len(messages) - max_items
+    if hidden > 0:
+        blocks.append({
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"…and {hidden} more update{'s' if hidden > 1 else ''}."
+                }
+            ]
+        })
+    return _wrap_blocks(blocks)
+
+
+class NotificationDispatcher:
+    """
+    Coalesces doctor notifications and rate-limits outbound Slack webhook calls.
+
+    Messages for the same doctor that arrive within `window_seconds` are sent as
+    one digest. Urgent messages flush the doctor's pending digest immediately and
+    jump ahead of normal digests in the outbox. Every webhook post goes through
+    a per-webhook token bucket so bursts never exceed Slack's rate limit.
+    """
+
+    URGENT = 0
+    NORMAL = 1
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        rate_per_second: float = 1.0,
+        burst: int = 3,
+        max_digest_items: int = 10
+    ):
+        self.window_seconds = window_seconds
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_digest_items = max_digest_items
+
+        self._pending: Dict[str, List[str]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._outbox: Optional[asyncio.PriorityQueue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+        self.stats = {"queued": 0, "digests_sent": 0, "webhook_calls": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._sender is not None
+
+    def _bucket(self, webhook_url: str) -> TokenBucket:
+        bucket = self._buckets.get(webhook_url)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst)
+            self._buckets[webhook_url] = bucket
+        return bucket
+
+    async def start(self):
+        if self.running:
+            return
+        self._outbox = asyncio.PriorityQueue()
+        self._sender = asyncio.create_task(self._sender_loop(), name="notification-dispatcher")
+
+    async def stop(self, timeout: float = 10.0):
+        """Flushes every pending digest, waits for the outbox to drain, then stops."""
+        if not self.running:
+            return
+        for doctor_name in list(self._pending):
+            self._flush(doctor_name, self.NORMAL)
+        try:
+            await asyncio.wait_for(self._outbox.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Notification outbox drain timed out with %d digests pending.", self._outbox.qsize())
+        self._sender.cancel()
+        await asyncio.gather(self._sender, return_exceptions=True)
+        self._sender = None
+
+    async def notify(self, doctor_name: str, message: str, urgent: bool = False):
+        """Queues a message for the doctor's next digest (or sends it directly if not running)."""
+        self.stats["queued"] += 1
+        if not self.running:
+            await self.deliver(doctor_name, [message])
+            return
+
+        self._pending.setdefault(doctor_name, []).append(message)
+        if urgent:
+            self._flush(doctor_name, self.URGENT)
+        elif doctor_name not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[doctor_name] = loop.call_later(
+                self.window_seconds, self._flush, doctor_name, self.NORMAL
+            )
+
+    def _flush(self, doctor_name: str, priority: int):
+        timer = self._timers.pop(doctor_name, None)
+        if timer:
+            timer.cancel()
+        messages = self._pending.pop(doctor_name, None)
+        if messages:
+            self._outbox.put_nowait((priority, next(self._sequence), doctor_name, messages))
+
+    async def _sender_loop(self):
+        while True:
+            _, _, doctor_name, messages = await self._outbox.get()
+            try:
+                await self.deliver(doctor_name, messages)
+            except Exception as e:
+                logger.exception("Notification dispatcher failed to deliver digest: %s", e)
+            finally:
+                self._outbox.task_done()
+
+    async def deliver(self, doctor_name: str, messages: List[str]) -> Dict[str, Any]:
+        """Posts one (possibly coalesced) message to the Slack webhook, respecting the rate limit."""
+        webhook_url = settings.SLACK_WEBHOOK_URL
+        if not webhook_url:
+            for message in messages:
+                logger.debug("Mock notification to %s: %s", doctor_name, message)
+            return {
+                "status": "success",
+                "mode": "mock",
+                "recipient": doctor_name,
+                "message": "\n\n".join(messages),
+                "timestamp": datetime.now().isoformat()
+            }
+
+        payload = build_digest_payload(doctor_name, messages, self.max_digest_items)
+        bucket = self._bucket(webhook_url)
+        try:
+            status_code, retry_after = await self._post(bucket, webhook_url, payload)
+            if status_code == 429:
+                # Slack asked us to back off; hold the whole bucket and retry once
+                bucket.pause(retry_after)
+                status_code, _ = await self._post(bucket, webhook_url, payload)
+            if status_code >= 400:
+                raise RuntimeError(f"Slack webhook returned HTTP {status_code}")
+
+            self.stats["digests_sent"] += 1
+            return {
+                "status": "success",
+                "mode": "live",
+                "channel": "slack",
+                "recipient": doctor_name,
+                "coalesced": len(messages),
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error("Failed to send Slack notification: %s", e)
+            return {
+                "status": "failed",
+                "error": str(e),
+                "recipient": doctor_name
+            }
+
+    async def _post(self, bucket: TokenBucket, webhook_url: str, payload: Dict[str, Any]) -> Tuple[int, float]:
+        await bucket.acquire()
+        self.stats["webhook_calls"] += 1
+        with span("slack.webhook", "slack"):
+            async with httpx.AsyncClient(timeout=io_timeout()) as client:
+                resp = await client.post(webhook_url, json=payload)
+        retry_after = float(resp.headers.get("Retry-After", 1))
+        return resp.status_code, retry_after
+
+
+notification_dispatcher = NotificationDispatcher(
+    window_seconds=settings.NOTIFICATION_COALESCE_WINDOW_SECONDS,
+    rate_per_second=settings.SLACK_WEBHOOK_RATE_PER_SECOND,
+    burst=settings.SLACK_WEBHOOK_BURST,
+    max_digest_items=settings.NOTIFICATION_DIGEST_MAX_ITEMS
+)
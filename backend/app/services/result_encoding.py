@@ -0,0 +1,114 @@
+"""
+Compact encoding of tool results for the model and the stored history.
+
+Tools return plain dicts meant for code (the intent router, Slack reports,
+MCP clients). Before a result goes back to the LLM it is re-encoded to spend
+fewer prompt tokens on every later iteration and turn:
+
+- free slots become ranges: "09:00–12:30 every 30m, except 10:00"
+- lists of records become {"columns": [...], "rows": [[...], ...]}
+- keys with empty values are dropped
+- long lists are capped; `next_cursor` is passed back to the tool to continue
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Booked slots inside a working block are listed as exceptions, up to this many in a row
+MAX_GAP_SLOTS = 3
+
+
+def _to_minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _fmt(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def compress_slots(slots: List[str]) -> str:
+    """Describes "HH:MM" slot start times as ranges with a step and exceptions."""
+    if not slots:
+        return ""
+    minutes = sorted({_to_minutes(s) for s in slots})
+    if len(minutes) == 1:
+        return _fmt(minutes[0])
+
+    gaps = [b - a for a, b in zip(minutes, minutes[1:])]
+    step = min(gaps)
+    if any(gap % step for gap in gaps):
+        # Mixed slot lengths; a range would misdescribe them
+        return ", ".join(_fmt(m) for m in minutes)
+
+    blocks = [[minutes[0], minutes[0]]]
+    exceptions: List[int] = []
+    for prev, cur, gap in zip(minutes, minutes[1:], gaps):
+        if gap <= step * (MAX_GAP_SLOTS + 1):
+            exceptions.extend(range(prev + step, cur, step))
+            blocks[-1][1] = cur
+        else:
+            blocks.append([cur, cur])
+
+    ranges = ", ".join(_fmt(a) if a == b else f"{_fmt(a)}–{_fmt(b)}" for a, b in blocks)
+    text = f"{ranges} every {step}m"
+    if exceptions:
+        text += f", except {', '.join(_fmt(m) for m in exceptions)}"
+    return text
+
+
+def drop_empty(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in result.items() if v not in (None, "", [], {})}
+
+
+def tabulate(records: List[Dict[str, Any]], max_items: int, offset: int = 0) -> Dict[str, Any]:
+    """Turns a list of same-shaped dicts into columns + rows, capped at max_items."""
+    columns = list(records[0]) if records else []
+    table: Dict[str, Any] = {
+        "columns": columns,
+        "rows": [[r.get(c) for c in columns] for r in records[:max_items]],
+    }
+    if len(records) > max_items:
+        table["next_cursor"] = str(offset + max_items)
+    return table
+
+
+def _encode_availability(result: Dict[str, Any], max_items: int) -> Dict[str, Any]:
+    encoded = {k: v for k, v in result.items() if k != "available_slots"}
+    slots = result.get("available_slots") or []
+    encoded["free_slots"] = compress_slots(slots)
+    encoded["free_slot_count"] = len(slots)
+    return drop_empty(encoded)
+
+
+def _tabulate_field(field: str) -> Callable[[Dict[str, Any], int], Dict[str, Any]]:
+    def encode(result: Dict[str, Any], max_items: int) -> Dict[str, Any]:
+        encoded = dict(result)
+        offset = encoded.pop("offset", 0)
+        if result.get(field):
+            encoded[field] = tabulate(result[field], max_items, offset)
+        return drop_empty(encoded)
+    return encode
+
+
+ENCODERS: Dict[str, Callable[[Dict[str, Any], int], Dict[str, Any]]] = {
+    "check_doctor_availability": _encode_availability,
+    "get_appointment_stats": _tabulate_field("appointments"),
+    "list_doctors": _tabulate_field("doctors"),
+}
+
+
+def encode_tool_result(name: str, result: Any, max_items: int = 25) -> Any:
+    """Compact form of a tool result for the LLM and session history. Errors pass through unchanged."""
+    if not isinstance(result, dict) or "error" in result:
+        return result
+    encoder: Optional[Callable] = ENCODERS.get(name)
+    return encoder(result, max_items) if encoder else drop_empty(result)
+
+
+def apply_cursor(items: List[Any], cursor: Optional[str]) -> Tuple[List[Any], int]:
+    """Skips the items a previous page already returned. Returns (items, offset)."""
+    try:
+        offset = max(0, int(cursor)) if cursor else 0
+    except ValueError:
+        offset = 0
+    return items[offset:], offset
@@ -0,0 +1,163 @@
+"""
+Per-session locks that serialize chat turns for the same session_id.
+
+Each turn reads the session history, talks to the LLM and appends to the
+history. Two turns for one session running at once would build on the same
+snapshot and interleave their writes, so they queue here instead. Turns for
+different sessions never wait on each other.
+
+SESSION_LOCK_BACKEND picks the implementation:
+- "memory":   asyncio locks; correct within one worker process.
+- "postgres": additionally takes a Postgres advisory lock, so turns are
+              serialized across workers and hosts. It holds one connection
+              per running turn, from its own autocommit pool
+              (SESSION_LOCK_POOL_SIZE) so that lock holders never starve
+              the turns' own queries on the main pool.
+
+Waiting is bounded: by the turn deadline inside a chat turn, otherwise by
+SESSION_LOCK_TIMEOUT_SECONDS. A turn stuck behind a hung holder gets
+SessionBusy (answered like an admission rejection) instead of waiting forever.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.deadline import remaining
+from app.core.metrics import SESSION_LOCK_WAIT
+from app.services.admission import AdmissionRejected
+
+# Postgres has no queue for pg_try_advisory_lock; poll with backoff up to this interval
+_POLL_MAX_SECONDS = 0.5
+
+
+class SessionBusy(AdmissionRejected):
+    """Raised when an earlier turn of the same session held its lock past the wait budget."""
+
+    def __init__(self, session_id: str, waited: float):
+        super().__init__(
+            "session_busy", retry_after=1,
+            message=f"An earlier message in this session is still being processed (waited {waited:.1f}s)"
+        )
+        self.session_id = session_id
+
+
+def _wait_budget(timeout: Optional[float]) -> float:
+    return timeout if timeout is not None else remaining(settings.SESSION_LOCK_TIMEOUT_SECONDS)
+
+
+class _Entry:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class InProcessSessionLocks:
+    name = "memory"
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Waits for earlier turns of this session, then holds its lock for the block.
+        Raises SessionBusy after `timeout` seconds (default: what is left of the turn deadline).
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = self._entries[session_id] = _Entry()
+        entry.users += 1
+        started = time.perf_counter()
+        try:
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), timeout=_wait_budget(timeout))
+            except asyncio.TimeoutError:
+                raise SessionBusy(session_id, time.perf_counter() - started) from None
+            try:
+                SESSION_LOCK_WAIT.labels(self.name).observe(time.perf_counter() - started)
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            # Drop the lock once nobody holds or waits for it, so idle sessions cost nothing
+            entry.users -= 1
+            if not entry.users:
+                del self._entries[session_id]
+
+
+class PostgresSessionLocks(InProcessSessionLocks):
+    """Adds a session-level pg_advisory_lock on top of the in-process lock."""
+
+    name = "postgres"
+
+    def __init__(self, engine):
+        super().__init__()
+        self._engine = engine
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        from sqlalchemy import text
+
+        key = {"key": f"chat_session:{session_id}"}
+        started = time.monotonic()
+        deadline = started + _wait_budget(timeout)
+        # Local waiters queue on the asyncio lock first, so only one connection per session waits in Postgres
+        async with super().hold(session_id, timeout=max(0.0, deadline - time.monotonic())):
+            async with self._engine.connect() as conn:
+                # pg_advisory_lock would wait forever behind a stuck holder; poll until the budget is spent
+                delay = 0.02
+                while not (await conn.execute(
+                    text("SELECT pg_try_advisory_lock(hashtextextended(:key, 0))"), key
+                )).scalar():
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise SessionBusy(session_id, time.monotonic() - started)
+                    await asyncio.sleep(min(delay, left))
+                    delay = min(delay * 2, _POLL_MAX_SECONDS)
+                try:
+                    yield
+                finally:
+                    try:
+                        await conn.execute(text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))"), key)
+                    except BaseException:
+                        # Including cancellation: never hand a connection that may still hold the
+                        # session-level lock back to the pool (a rollback does not release it)
+                        await conn.invalidate()
+                        raise
+
+
+def _postgres_factory() -> InProcessSessionLocks:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # Autocommit: a connection holding the lock sits idle through LLM calls, not idle in a transaction
+    lock_engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.SESSION_LOCK_POOL_SIZE,
+        max_overflow=10,
+        isolation_level="AUTOCOMMIT",
+    )
+    return PostgresSessionLocks(lock_engine)
+
+
+SESSION_LOCK_BACKENDS: Dict[str, Callable[[], InProcessSessionLocks]] = {
+    "memory": InProcessSessionLocks,
+    "postgres": _postgres_factory,
+}
+
+
+def create_session_locks(name: str = None) -> InProcessSessionLocks:
+    name = name or settings.SESSION_LOCK_BACKEND
+    if name not in SESSION_LOCK_BACKENDS:
+        raise ValueError(f"Unknown session lock backend '{name}'. Available: {', '.join(SESSION_LOCK_BACKENDS)}")
+    return SESSION_LOCK_BACKENDS[name]()
+
+
+session_locks = create_session_locks()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.metrics import SLACK_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeduplicator:
+    """
+    Remembers Slack event IDs for a fixed TTL so retried deliveries are dropped.
+
+    Every entry shares the same TTL, so insertion order is also expiry order and
+    eviction only ever needs to look at the oldest entries.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._seen:
+            _, expires_at = next(iter(self._seen.items()))
+            if expires_at > now and len(self._seen) < self.max_entries:
+                break
+            self._seen.popitem(last=False)
+
+    def check_and_mark(self, event_id: str) -> bool:
+        """Returns True the first time an event ID is seen within the TTL."""
+        now = time.monotonic()
+        self._evict(now)
+        if event_id in self._seen:
+            return False
+        self._seen[event_id] = now + self.ttl_seconds
+        return True
+
+    def forget(self, event_id: str):
+        """Drops an event ID so a later retry from Slack is accepted again."""
+        self._seen.pop(event_id, None)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more events."""
+
+
+class SlackEventQueue:
+    """
+    Bounded asyncio queue drained by a fixed pool of worker tasks.
+
+    Replaces per-request BackgroundTasks so the number of concurrent LLM turns
+    triggered from Slack is capped, and a full queue pushes back on Slack
+    (which retries later) instead of piling up unbounded work.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        maxsize: int = 100,
+        concurrency: int = 4
+    ):
+        self.handler = handler
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        if self._accepting:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"slack-event-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._accepting = True
+
+    def submit(self, event: Dict[str, Any]):
+        """Enqueues an event without waiting. Raises QueueFullError on backpressure."""
+        if not self._accepting:
+            raise QueueFullError("Slack event queue is not running")
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Slack event queue is full ({self.maxsize} pending)")
+        SLACK_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _worker(self, index: int):
+        while True:
+            event = await self._queue.get()
+            SLACK_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self.handler(event)
+            except Exception as e:
+                logger.exception("Slack worker %d failed to handle event: %s", index, e)
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        """Waits until every queued event has been handled."""
+        if self._queue:
+            await self._queue.join()
+
+    async def stop(self, timeout: float = 30.0):
+        """Stops accepting events, drains what is queued, then cancels the workers."""
+        if not self._workers:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Slack event queue drain timed out with %d events pending.", self._queue.qsize())
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
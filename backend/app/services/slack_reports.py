@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Slash command period keywords -> get_appointment_stats query_type
+PERIOD_ALIASES = {
+    "today": "today",
+    "daily": "today",
+    "tomorrow": "tomorrow",
+    "yesterday": "yesterday",
+    "week": "this_week",
+    "weekly": "this_week",
+    "this_week": "this_week",
+}
+
+PERIOD_LABELS = {
+    "today": "Today",
+    "tomorrow": "Tomorrow",
+    "yesterday": "Yesterday",
+    "this_week": "This week",
+}
+
+USAGE_TEXT = (
+    "*Usage:* `/mediassist today|tomorrow|week [filter]`\n"
+    "• `/mediassist today` – today's appointments\n"
+    "• `/mediassist tomorrow fever` – tomorrow's appointments for fever"
+)
+
+# Slack caps a section's text at 3000 characters; 20 short lines stays well below it
+LINES_PER_SECTION = 20
+MAX_SECTIONS = 10
+
+
+def parse_report_command(text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Parses "<period> [filter words]" into (query_type, filter_by). None if unrecognised."""
+    words = (text or "").strip().split()
+    if not words:
+        return None
+    query_type = PERIOD_ALIASES.get(words[0].lower())
+    if not query_type:
+        return None
+    filter_by = " ".join(words[1:]) or None
+    return query_type, filter_by
+
+
+def _section(text: str) -> Dict[str, Any]:
+    return {"type": "section", "text": {"type": "mrkdwn", "text": text}}
+
+
+def build_report_response(stats: Dict[str, Any], filter_by: Optional[str] = None) -> Dict[str, Any]:
+    """Formats a get_appointment_stats result as an ephemeral Block Kit slash-command response."""
+    if "error" in stats:
+        return {"response_type": "ephemeral", "text": f"⚠️ {stats['error']}"}
+
+    label = PERIOD_LABELS.get(stats.get("period"), stats.get("period"))
+    total = stats.get("total_appointments", 0)
+    noun = "appointment" if total == 1 else "appointments"
+    summary = f"*{label}* for *{stats['doctor_name']}*: {total} {noun}"
+    if filter_by:
+        summary += f" matching _{filter_by}_"
+
+    blocks: List[Dict[str, Any]] = [_section(summary)]
+    lines = [
+        f"• {appt['time']} – {appt['patient']} ({appt.get('reason') or 'Not specified'})"
+        for appt in stats.get("appointments", [])
+    ]
+    if not lines:
+        blocks.append(_section("No appointments found for this period."))
+
+    shown = lines[:LINES_PER_SECTION * MAX_SECTIONS]
+    for start in range(0, len(shown), LINES_PER_SECTION):
+        blocks.append(_section("\n".join(shown[start:start + LINES_PER_SECTION])))
+
+    if len(lines) > len(shown):
+        blocks.append({
+            "type": "context",
+            "elements": [{"type": "mrkdwn", "text": f"…and {len(lines) - len(shown)} more."}]
+        })
+
+    return {"response_type": "ephemeral", "text": summary, "blocks": blocks}
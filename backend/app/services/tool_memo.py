@@ -0,0 +1,118 @@
+"""
+Memoization of read-only tool results within a conversation.
+
+The model often repeats `list_doctors` or `check_doctor_availability` with the
+same arguments a step or a turn later. The agent loop runs read-only tools
+through `tool_memo.call()`:
+
+- within one turn a repeated call is always served from the memo
+- across turns of the same session it is served while younger than the tool's TTL
+- a booking drops every memoized availability for that doctor and date, and
+  every report for that doctor, in all sessions
+- write tools (and errors) are never memoized
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import TOOL_MEMO_LOOKUPS
+
+Tag = Tuple[int, Optional[str]]
+
+
+class _Entry:
+    __slots__ = ("result", "turn_id", "expires_at", "tags")
+
+    def __init__(self, result: Any, turn_id: str, expires_at: float, tags: Set[Tag]):
+        self.result = result
+        self.turn_id = turn_id
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+def _key(tool_name: str, tool_args: Dict[str, Any]) -> str:
+    return tool_name + ":" + json.dumps(tool_args, sort_keys=True, default=str)
+
+
+def _tags(tool_name: str, result: Dict[str, Any]) -> Set[Tag]:
+    """(doctor_id, date) pairs a booking must invalidate; date None means any date."""
+    doctor_id = result.get("doctor_id")
+    if not doctor_id:
+        return set()
+    if tool_name == "check_doctor_availability":
+        return {(int(doctor_id), result.get("date"))}
+    if tool_name == "get_appointment_stats":
+        return {(int(doctor_id), None)}
+    return set()
+
+
+class ToolMemo:
+    """Per-session memo of read-only tool results. `ttls` lists the memoizable tools."""
+
+    def __init__(self, ttls: Dict[str, float], max_sessions: int = 1000):
+        self.ttls = ttls
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, _Entry]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._sessions.values())
+
+    async def call(
+        self,
+        session_id: str,
+        turn_id: str,
+        tool_name: str,
+        tool_func: Callable[..., Awaitable[Any]],
+        tool_args: Dict[str, Any]
+    ) -> Tuple[Any, bool]:
+        """Runs the tool or returns its memoized result. Returns (result, from_memo)."""
+        ttl = self.ttls.get(tool_name)
+        if ttl is None:
+            return await tool_func(**tool_args), False
+
+        key = _key(tool_name, tool_args)
+        entries = self._sessions.get(session_id)
+        entry = entries.get(key) if entries else None
+        if entry and (entry.turn_id == turn_id or entry.expires_at > time.monotonic()):
+            self._sessions.move_to_end(session_id)
+            TOOL_MEMO_LOOKUPS.labels(tool_name, "hit").inc()
+            return copy.deepcopy(entry.result), True
+
+        TOOL_MEMO_LOOKUPS.labels(tool_name, "miss").inc()
+        result = await tool_func(**tool_args)
+        if isinstance(result, dict) and "error" not in result:
+            self._store(session_id, key, _Entry(
+                copy.deepcopy(result), turn_id, time.monotonic() + ttl, _tags(tool_name, result)
+            ))
+        return result, False
+
+    def _store(self, session_id: str, key: str, entry: _Entry):
+        entries = self._sessions.setdefault(session_id, {})
+        self._sessions.move_to_end(session_id)
+        now = time.monotonic()
+        for stale in [k for k, e in entries.items() if e.expires_at <= now and e.turn_id != entry.turn_id]:
+            del entries[stale]
+        entries[key] = entry
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def invalidate_booking(self, doctor_id: int, date: str):
+        """Drops results a new appointment for this doctor on this date (YYYY-MM-DD) makes stale."""
+        doomed = {(int(doctor_id), date), (int(doctor_id), None)}
+        for entries in self._sessions.values():
+            for key in [k for k, e in entries.items() if e.tags & doomed]:
+                del entries[key]
+
+
+tool_memo = ToolMemo(
+    ttls={
+        "list_doctors": settings.TOOL_MEMO_DIRECTORY_TTL_SECONDS,
+        "check_doctor_availability": settings.TOOL_MEMO_TTL_SECONDS,
+        "get_appointment_stats": settings.TOOL_MEMO_TTL_SECONDS,
+    },
+    max_sessions=settings.TOOL_MEMO_MAX_SESSIONS
+)
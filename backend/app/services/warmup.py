@@ -0,0 +1,89 @@
+"""
+Startup warmup, run from the FastAPI lifespan before the worker takes traffic.
+
+Heavy SDKs are imported lazily so that importing app.main stays fast. Left
+alone, that cost would land on the first requests instead, so the lifespan
+pays it up front:
+
+- db_pool:          opens WARMUP_DB_CONNECTIONS pooled connections
+- doctor_directory: preloads the Slack user -> doctor mapping
+- llm:              imports the provider SDK and builds the model with its tools
+- calendar:         builds the Calendar client and its discovery document,
+                    if a saved token exists
+
+Steps run concurrently, each bounded by WARMUP_TIMEOUT_SECONDS. A failing step
+is logged and skipped; warmup never stops the worker from starting.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_db_pool():
+    from sqlalchemy import text
+    from app.core.database import engine
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Held at the same time, so the pool keeps that many connections open afterwards
+    await asyncio.gather(*(ping() for _ in range(settings.WARMUP_DB_CONNECTIONS)))
+
+
+async def warm_doctor_directory():
+    from app.services.doctor_directory import doctor_directory
+    await doctor_directory.warm()
+
+
+async def warm_llm():
+    from app.services.llm_service import get_llm_provider
+    await asyncio.to_thread(get_llm_provider().warm)
+
+
+async def warm_calendar():
+    from app.services.google_calendar import calendar_service
+    await asyncio.to_thread(calendar_service.warm)
+
+
+WARMUP_STEPS: Dict[str, Callable[[], Awaitable[object]]] = {
+    "db_pool": warm_db_pool,
+    "doctor_directory": warm_doctor_directory,
+    "llm": warm_llm,
+    "calendar": warm_calendar,
+}
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[object]], timeout: float) -> str:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(step(), timeout=timeout)
+        outcome = "ok"
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+    except Exception as e:
+        outcome = "failed"
+        logger.warning("Warmup step %s failed: %s", name, e)
+    logger.debug("Warmup step %s: %s in %.0fms", name, outcome, (time.perf_counter() - started) * 1000)
+    return outcome
+
+
+async def warm_up(steps: Dict[str, Callable[[], Awaitable[object]]] = None) -> Dict[str, str]:
+    """Runs the warmup steps concurrently. Returns each step's outcome: ok, failed or timeout."""
+    steps = steps if steps is not None else WARMUP_STEPS
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        _run_step(name, step, settings.WARMUP_TIMEOUT_SECONDS) for name, step in steps.items()
+    ))
+    results = dict(zip(steps, outcomes))
+    logger.info("Warmup finished", extra={
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "steps": results,
+    })
+    return results
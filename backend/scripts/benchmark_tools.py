@@ -0,0 +1,367 @@
+"""
+Microbenchmarks for the MCP Tool Functions
+
+Calls check_doctor_availability, book_appointment, get_appointment_stats,
+list_doctors and get_doctor_by_name directly (no HTTP, no LLM) and reports,
+per call:
+- latency (p50/p95/mean)
+- DB round trips (statements sent to the database)
+- rows fetched from the database
+- peak Python memory allocated (tracemalloc, measured in a separate pass so
+  it does not distort the timings)
+
+Calendar, email and Slack side effects are stubbed, and appointments created
+by the booking benchmark are deleted afterwards.
+
+The shared availability cache and tool-call coalescing are switched off so that
+every call measures its queries and results stay comparable across releases.
+The `:cached` cases turn the availability cache back on to measure warm reads;
+pass --availability-cache / --coalescing to run the whole suite with them on.
+
+With --sizes the suite regenerates the synthetic dataset (generate_dataset.py,
+Postgres only) at each appointment count before measuring. Without it, the
+currently configured database is measured as-is.
+
+Results can be saved as a baseline and later runs compared against it; any
+case whose latency or allocations grow beyond --tolerance, or whose round
+trips or rows fetched grow at all, is reported as a regression.
+
+Usage:
+    python scripts/benchmark_tools.py --sizes 10000,100000,1000000 --save-baseline benchmark_baseline.json
+    python scripts/benchmark_tools.py --sizes 10000,100000,1000000 --compare benchmark_baseline.json
+    python scripts/benchmark_tools.py --iterations 50 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Must be set before the app (and its settings) are imported
+for _key in ("SLACK_WEBHOOK_URL", "SLACK_BOT_TOKEN", "SMTP_USER", "SMTP_PASSWORD"):
+    os.environ[_key] = ""
+
+from sqlalchemy import delete, event, func, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.models import Appointment, AvailabilitySlot, Doctor
+from app.services import mcp_tools
+from app.services.email_service import email_service
+from app.services.google_calendar import calendar_service
+from app.services.notification_dispatcher import notification_dispatcher
+
+BENCH_EMAIL = "benchmark@bench.mediassist.test"
+
+_counters: Optional[Dict[str, int]] = None
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _counters is None:
+        return
+    _counters["db"] += 1
+    # Both the asyncpg and aiosqlite adapters buffer the fetched rows on the cursor
+    _counters["rows"] += len(getattr(cursor, "_rows", None) or ())
+
+
+def stub_integrations():
+    """Replaces outbound calls with no-ops so only the tool's own work is measured."""
+    async def send_confirmation(**kwargs):
+        return True
+
+    async def notify(doctor_name, message, urgent=False):
+        return None
+
+    calendar_service.create_event = lambda **kwargs: None
+    email_service.send_appointment_confirmation = send_confirmation
+    notification_dispatcher.notify = notify
+
+
+def with_settings(call: Callable[[int], Awaitable[Any]], **overrides) -> Callable[[int], Awaitable[Any]]:
+    """Runs a case with some settings overridden, restoring them afterwards."""
+    async def run(i: int):
+        saved = {key: getattr(settings, key) for key in overrides}
+        for key, value in overrides.items():
+            setattr(settings, key, value)
+        try:
+            return await call(i)
+        finally:
+            for key, value in saved.items():
+                setattr(settings, key, value)
+    return run
+
+
+async def get_doctor_by_name(name: str):
+    async with AsyncSessionLocal() as session:
+        return await mcp_tools.get_doctor_by_name(session, name)
+
+
+async def pick_fixtures() -> Dict[str, Any]:
+    """Chooses the most and least booked doctors and a working day for each."""
+    async with AsyncSessionLocal() as session:
+        booked = (
+            select(Appointment.doctor_id, func.count().label("n"))
+            .group_by(Appointment.doctor_id)
+            .subquery()
+        )
+        rows = (await session.execute(
+            select(Doctor.id, Doctor.name, func.coalesce(booked.c.n, 0).label("n"))
+            .join(booked, booked.c.doctor_id == Doctor.id, isouter=True)
+            .join(AvailabilitySlot, AvailabilitySlot.doctor_id == Doctor.id)
+            .group_by(Doctor.id, Doctor.name, booked.c.n)
+            .order_by(func.coalesce(booked.c.n, 0).desc(), Doctor.id)
+        )).all()
+        if not rows:
+            raise SystemExit("No doctors with availability found. Seed or generate a dataset first.")
+        hot, cold = rows[0], rows[-1]
+
+        fixtures = {"hot": hot, "cold": cold}
+        for key, doctor in (("hot", hot), ("cold", cold)):
+            days = set((await session.execute(
+                select(AvailabilitySlot.day_of_week).where(AvailabilitySlot.doctor_id == doctor.id)
+            )).scalars())
+            day = date.today() + timedelta(days=1)
+            while day.weekday() not in days:
+                day += timedelta(days=1)
+            fixtures[f"{key}_date"] = day.isoformat()
+        return fixtures
+
+
+def build_cases(fixtures: Dict[str, Any]) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    hot, cold = fixtures["hot"], fixtures["cold"]
+    # Bookings go far beyond any generated data so every iteration gets a free slot
+    booking_base = datetime.combine(date.today() + timedelta(days=3650), datetime.min.time())
+
+    cases = {
+        "list_doctors:all": lambda i: mcp_tools.list_doctors(),
+        "list_doctors:specialization": lambda i: mcp_tools.list_doctors("heart"),
+        "get_doctor_by_name:exact": lambda i: get_doctor_by_name(hot.name),
+        "get_doctor_by_name:last_name": lambda i: get_doctor_by_name(f"Dr. Nobody {hot.name.split()[-1]}"),
+        "check_doctor_availability:hot_by_name": lambda i: mcp_tools.check_doctor_availability(
+            hot.name, fixtures["hot_date"]
+        ),
+        "check_doctor_availability:hot_by_id": lambda i: mcp_tools.check_doctor_availability(
+            hot.name, fixtures["hot_date"], doctor_id=hot.id
+        ),
+        "check_doctor_availability:cold_by_id": lambda i: mcp_tools.check_doctor_availability(
+            cold.name, fixtures["cold_date"], doctor_id=cold.id
+        ),
+        "get_appointment_stats:hot_week": lambda i: mcp_tools.get_appointment_stats(
+            hot.name, "this_week", doctor_id=hot.id
+        ),
+        "get_appointment_stats:hot_week_filtered": lambda i: mcp_tools.get_appointment_stats(
+            hot.name, "this_week", filter_by="fever", doctor_id=hot.id
+        ),
+        "get_appointment_stats:cold_week": lambda i: mcp_tools.get_appointment_stats(
+            cold.name, "this_week", doctor_id=cold.id
+        ),
+        "book_appointment": lambda i: mcp_tools.book_appointment(
+            hot.id, "Benchmark Patient", BENCH_EMAIL,
+            (booking_base + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S"), "Benchmark"
+        ),
+    }
+    # Warm reads: the untimed warmup calls fill the cache, timed calls should hit it
+    for name in ("check_doctor_availability:hot_by_id", "check_doctor_availability:cold_by_id"):
+        cases[f"{name}:cached"] = with_settings(cases[name], AVAILABILITY_CACHE_ENABLED=True)
+    return cases
+
+
+async def cleanup_bookings():
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Appointment).where(Appointment.patient_email == BENCH_EMAIL))
+        await session.commit()
+
+
+async def measure(call: Callable[[int], Awaitable[Any]], iterations: int, warmup: int, alloc_iterations: int) -> Dict[str, Any]:
+    global _counters
+    calls = 0
+
+    for _ in range(warmup):
+        await call(calls)
+        calls += 1
+
+    latencies, db, rows = [], [], []
+    for _ in range(iterations):
+        _counters = {"db": 0, "rows": 0}
+        started = time.perf_counter()
+        await call(calls)
+        latencies.append((time.perf_counter() - started) * 1000)
+        db.append(_counters["db"])
+        rows.append(_counters["rows"])
+        calls += 1
+    _counters = None
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await call(calls)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            calls += 1
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 3),
+            "p95": round(latencies[max(0, int(round(0.95 * len(latencies))) - 1)], 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        },
+        "db_round_trips": round(statistics.fmean(db), 2),
+        "rows_fetched": round(statistics.fmean(rows), 2),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+async def run_suite(args) -> Dict[str, Any]:
+    fixtures = await pick_fixtures()
+    cases = build_cases(fixtures)
+    selected = [name for name in cases if not args.only or any(name.startswith(p) for p in args.only)]
+
+    results = {}
+    try:
+        for name in selected:
+            results[name] = await measure(cases[name], args.iterations, args.warmup, args.alloc_iterations)
+            stats = results[name]
+            print(f"  {name:<42}{stats['latency_ms']['p50']:>10}{stats['latency_ms']['p95']:>10}"
+                  f"{stats['db_round_trips']:>8}{stats['rows_fetched']:>10}{stats['alloc_peak_kib']:>11}")
+    finally:
+        await cleanup_bookings()
+
+    return {
+        "fixtures": {
+            "hot_doctor": {"id": fixtures["hot"].id, "appointments": fixtures["hot"].n},
+            "cold_doctor": {"id": fixtures["cold"].id, "appointments": fixtures["cold"].n},
+        },
+        "cases": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Prints per-case deltas against the baseline and returns the regressions found."""
+    regressions = []
+    for size, run in current["sizes"].items():
+        base_run = baseline.get("sizes", {}).get(size)
+        if not base_run:
+            print(f"\n[{size}] no baseline for this size, skipping comparison")
+            continue
+        print(f"\n[{size}] vs baseline ({baseline.get('meta', {}).get('timestamp', 'unknown')})")
+        for name, stats in run["cases"].items():
+            base = base_run["cases"].get(name)
+            if not base:
+                continue
+            p50, base_p50 = stats["latency_ms"]["p50"], base["latency_ms"]["p50"]
+            delta = (p50 - base_p50) / base_p50 if base_p50 else 0.0
+            problems = []
+            if delta > tolerance:
+                problems.append(f"latency +{delta:.0%}")
+            if stats["db_round_trips"] > base["db_round_trips"]:
+                problems.append(f"round trips {base['db_round_trips']} -> {stats['db_round_trips']}")
+            if stats["rows_fetched"] > base["rows_fetched"]:
+                problems.append(f"rows {base['rows_fetched']} -> {stats['rows_fetched']}")
+            if base.get("alloc_peak_kib") and stats["alloc_peak_kib"] > base["alloc_peak_kib"] * (1 + tolerance):
+                problems.append(f"alloc {base['alloc_peak_kib']} -> {stats['alloc_peak_kib']} KiB")
+
+            marker = "REGRESSION" if problems else "ok"
+            print(f"  {name:<42}{base_p50:>10} -> {p50:<10}{delta:>+8.0%}  {marker} {', '.join(problems)}")
+            regressions.extend(f"[{size}] {name}: {p}" for p in problems)
+    return regressions
+
+
+async def main_async(args) -> Dict[str, Any]:
+    engine.echo = False
+    calendar_service.authenticate = lambda *args, **kwargs: False
+    stub_integrations()
+    settings.AVAILABILITY_CACHE_ENABLED = args.availability_cache
+    settings.TOOL_COALESCING_ENABLED = args.coalescing
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "alloc_iterations": args.alloc_iterations,
+            "availability_cache_enabled": settings.AVAILABILITY_CACHE_ENABLED,
+            "tool_coalescing_enabled": settings.TOOL_COALESCING_ENABLED,
+        },
+        "sizes": {},
+    }
+
+    print(f"  {'case':<42}{'p50 ms':>10}{'p95 ms':>10}{'db':>8}{'rows':>10}{'peak KiB':>11}")
+    if args.sizes:
+        import generate_dataset
+
+        # Recorded so a generated dataset can be rebuilt exactly with the same --seed and --today
+        today = args.today or date.today()
+        report["meta"]["seed"] = args.seed
+        report["meta"]["dataset_anchor_date"] = today.isoformat()
+        for size in args.sizes:
+            print(f"\n[{size} appointments] generating dataset...")
+            await generate_dataset.generate(argparse.Namespace(
+                doctors=args.doctors, appointments=size, days_back=365, days_ahead=60,
+                zipf=1.1, chunk_size=100000, seed=args.seed, today=today, reset_only=False
+            ))
+            report["sizes"][str(size)] = await run_suite(args)
+    else:
+        print("\n[current database]")
+        report["sizes"]["current"] = await run_suite(args)
+
+    await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the MCP tool functions.")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")],
+                        help="Comma-separated appointment counts to generate and measure (Postgres only)")
+    # Each doctor has ~5k slots in the generated window, so 1M appointments need a few hundred doctors
+    parser.add_argument("--doctors", type=int, default=500, help="Synthetic doctors per generated dataset")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed calls per case")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls per case before measuring")
+    parser.add_argument("--alloc-iterations", type=int, default=5, help="Calls per case traced by tracemalloc")
+    parser.add_argument("--only", nargs="*", help="Only run cases whose name starts with one of these prefixes")
+    parser.add_argument("--availability-cache", action="store_true",
+                        help="Keep the shared availability cache on for every case (off by default)")
+    parser.add_argument("--coalescing", action="store_true", help="Keep tool-call coalescing on (off by default)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat,
+                        help="Anchor date for generated datasets, YYYY-MM-DD (default: the current date)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed latency/allocation growth (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) found.")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
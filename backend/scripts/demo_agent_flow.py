@@ -10,8 +10,11 @@ It simulates realistic user interactions and shows:
 3. Multi-turn context continuity
 4. Natural language understanding
 5. Tool chaining
+
+Pass --record PATH to log every turn for scripts/replay_conversations.py.
 """
 
+import argparse
 import asyncio
 import sys
 import os
@@ -23,6 +26,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 from app.services.llm_service import process_chat_message
 from app.mcp.server import list_available_tools
 from app.core.database import init_db
+from app.core.config import settings
 
 
 class Colors:
@@ -293,4 +297,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the agentic AI demo conversations.")
+    parser.add_argument("--record", help="Append every turn to this JSONL file for later replays")
+    args = parser.parse_args()
+    if args.record:
+        settings.CONVERSATION_RECORD_PATH = args.record
+
     asyncio.run(main())
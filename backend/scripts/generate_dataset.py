@@ -0,0 +1,316 @@
+"""
+Large-Scale Synthetic Dataset Generator
+
+Generates production-shaped data for benchmarking the MCP tools:
+- N doctors spread across specializations (with linked Slack IDs)
+- realistic weekly AvailabilitySlot templates (split morning/afternoon
+  sessions, varying slot lengths and working days)
+- up to tens of millions of appointments with Zipf-skewed doctor popularity,
+  weighted visit reasons and status mix (completed/cancelled in the past,
+  mostly scheduled in the future)
+- at most one appointment per doctor and slot: a doctor's day holds only as
+  many bookings as their schedule has slots, and overflow moves to their next
+  free working day, then to other doctors once they are fully booked
+
+Rows are streamed in chunks through asyncpg COPY, so memory stays flat at any
+size. All synthetic doctors use the @synthetic.mediassist.test email domain;
+each run first removes the previous synthetic data, so runs are idempotent.
+The appointment window is anchored on --today (default: the current date), so
+the same --seed and --today always produce the same dataset. Hand-seeded
+doctors from seed_data.py are never touched.
+
+Usage:
+    python scripts/generate_dataset.py --doctors 500 --appointments 1000000 --seed 42
+    python scripts/generate_dataset.py --doctors 5000 --appointments 20000000 --chunk-size 200000
+    python scripts/generate_dataset.py --seed 42 --today 2026-01-15
+    python scripts/generate_dataset.py --reset-only
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import os
+import random
+import sys
+import time as clock
+from datetime import date, datetime, time, timedelta
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import asyncpg
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+
+SYNTHETIC_DOMAIN = "synthetic.mediassist.test"
+
+SPECIALIZATIONS = [
+    ("General Physician", 18), ("Pediatrician", 9), ("Gynecologist", 8), ("Dentist", 8),
+    ("Dermatologist", 7), ("Orthopedic Surgeon", 6), ("Cardiologist", 6), ("ENT Specialist", 5),
+    ("Ophthalmologist", 5), ("Psychiatrist", 4), ("Neurologist", 4), ("Gastroenterologist", 4),
+    ("Endocrinologist", 3), ("Pulmonologist", 3), ("Urologist", 3), ("Nephrologist", 2),
+    ("Oncologist", 2), ("Rheumatologist", 1), ("Radiologist", 1), ("Anesthesiologist", 1),
+]
+
+REASONS = [
+    ("Fever", 16), ("Routine checkup", 14), ("Follow-up", 12), ("Cough and cold", 9),
+    ("Headache", 6), ("Back pain", 6), ("Skin rash", 5), ("Stomach ache", 5),
+    ("Blood pressure review", 5), ("Diabetes review", 5), ("Joint pain", 4), ("Vaccination", 4),
+    ("Allergy", 3), ("Chest pain", 2), ("Eye irritation", 2), ("Toothache", 2), (None, 10),
+]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Deepa", "Divya", "Farhan", "Gita", "Harsh",
+    "Isha", "Karan", "Kavya", "Lakshmi", "Manish", "Meera", "Neha", "Nikhil", "Pooja", "Priya",
+    "Rahul", "Ravi", "Riya", "Rohan", "Sana", "Sanjay", "Sneha", "Suresh", "Tara", "Vikram",
+    "James", "Maria", "David", "Sarah", "Michael", "Emma", "Daniel", "Olivia", "Thomas", "Sophia",
+]
+
+LAST_NAMES = [
+    "Sharma", "Verma", "Iyer", "Nair", "Reddy", "Patel", "Gupta", "Menon", "Joshi", "Kumar",
+    "Singh", "Das", "Rao", "Bose", "Kapoor", "Mehta", "Chopra", "Pillai", "Shah", "Ahuja",
+    "Smith", "Brown", "Wilson", "Chen", "Lee", "Martinez", "Anderson", "Thompson", "Khan", "Fernandes",
+]
+
+# (days worked, session templates as (start, end)), weighted by how common the pattern is
+SCHEDULE_PATTERNS = [
+    ([0, 1, 2, 3, 4], [(time(9, 0), time(13, 0)), (time(14, 0), time(17, 0))], 5),
+    ([0, 1, 2, 3, 4, 5], [(time(10, 0), time(14, 0)), (time(17, 0), time(20, 0))], 3),
+    ([0, 2, 4], [(time(9, 0), time(15, 0))], 2),
+    ([1, 3, 5], [(time(11, 0), time(18, 0))], 2),
+    ([0, 1, 2, 3, 4, 5], [(time(8, 0), time(12, 0))], 1),
+]
+SLOT_MINUTES = [(15, 2), (20, 3), (30, 5)]
+
+
+class WeightedChoice:
+    """O(log n) weighted sampling over a fixed population via a cumulative table."""
+
+    def __init__(self, items: List, weights: List[float], rng: random.Random):
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+        self.total = self.cumulative[-1]
+        self.rng = rng
+
+    def pick(self):
+        return self.items[bisect.bisect_right(self.cumulative, self.rng.random() * self.total)]
+
+
+def asyncpg_dsn() -> str:
+    return settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def build_doctors(count: int, rng: random.Random) -> List[Tuple]:
+    specialization = WeightedChoice([s for s, _ in SPECIALIZATIONS], [w for _, w in SPECIALIZATIONS], rng)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append((
+            f"Dr. {first} {last}",
+            f"doctor{i:06d}@{SYNTHETIC_DOMAIN}",
+            specialization.pick(),
+            f"USYN{i:07d}",
+            f"+91{rng.randrange(7000000000, 9999999999)}",
+            rng.randint(1, 35),
+            "MBBS, MD",
+            rng.choice([300, 500, 700, 800, 1000, 1200, 1500]),
+        ))
+    return rows
+
+
+def build_templates(doctor_ids: List[int], rng: random.Random) -> Tuple[List[Tuple], Dict[int, Dict[int, List[time]]]]:
+    """Returns availability_slots rows and, per doctor, the bookable start times for each weekday."""
+    pattern = WeightedChoice(SCHEDULE_PATTERNS, [p[2] for p in SCHEDULE_PATTERNS], rng)
+    slot_minutes = WeightedChoice([m for m, _ in SLOT_MINUTES], [w for _, w in SLOT_MINUTES], rng)
+    rows, bookable = [], {}
+
+    for doctor_id in doctor_ids:
+        days, sessions, _ = pattern.pick()
+        minutes = slot_minutes.pick()
+        bookable[doctor_id] = {}
+        for day in days:
+            starts = []
+            for start, end in sessions:
+                rows.append((doctor_id, day, start, end, minutes))
+                current = datetime.combine(date.min, start)
+                while current + timedelta(minutes=minutes) <= datetime.combine(date.min, end):
+                    starts.append(current.time())
+                    current += timedelta(minutes=minutes)
+            bookable[doctor_id][day] = starts
+    return rows, bookable
+
+
+def generate_appointments(
+    total: int,
+    doctor_ids: List[int],
+    bookable: Dict[int, Dict[int, List[time]]],
+    days_back: int,
+    days_ahead: int,
+    zipf_s: float,
+    rng: random.Random,
+    today: Optional[date] = None
+) -> Iterator[Tuple]:
+    """
+    Yields appointment rows with Zipf-skewed doctor popularity and weighted reasons.
+    No two rows share a doctor, date and slot; raises ValueError if total exceeds every schedule's capacity.
+    The window spans days_back before and days_ahead after `today` (default: the current date).
+    """
+    today = today or date.today()
+    span = days_back + days_ahead + 1
+    first_day = today - timedelta(days=days_back)
+    weekdays = [(first_day + timedelta(days=i)).weekday() for i in range(span)]
+
+    capacity = {
+        doctor_id: sum(len(bookable[doctor_id].get(weekday, ())) for weekday in weekdays)
+        for doctor_id in doctor_ids
+    }
+    if total > sum(capacity.values()):
+        raise ValueError(
+            f"{total:,} appointments do not fit: {len(doctor_ids)} doctors have "
+            f"{sum(capacity.values()):,} slots in the window. Add doctors or widen the window."
+        )
+
+    # Popularity rank is shuffled so it is unrelated to doctor ID order
+    ranked = doctor_ids[:]
+    rng.shuffle(ranked)
+    popularity = {doctor_id: 1 / (rank ** zipf_s) for rank, doctor_id in enumerate(ranked, start=1)}
+    open_doctors = [d for d in ranked if capacity[d]]
+    doctor = WeightedChoice(open_doctors, [popularity[d] for d in open_doctors], rng)
+    reason = WeightedChoice([r for r, _ in REASONS], [w for _, w in REASONS], rng)
+
+    # Per (doctor, day index): [bookings so far, first slot]. A day fills consecutive slots from a
+    # random start, so memory grows with doctor-days rather than with rows
+    days_booked: Dict[Tuple[int, int], List[int]] = {}
+    doctor_booked: Counter = Counter()
+
+    for n in range(total):
+        doctor_id = doctor.pick()
+        schedule = bookable[doctor_id]
+        working_days = list(schedule)
+
+        # Pick a random date, then snap it to one of the doctor's working days in that week
+        index = rng.randrange(span)
+        index += rng.choice(working_days) - weekdays[index]
+        index = (index + 7 if index < 0 else index - 7 if index >= span else index) % span
+
+        # Full day: take the doctor's next working day with a free slot
+        while True:
+            starts = schedule.get(weekdays[index], ())
+            booked = days_booked.get((doctor_id, index))
+            if booked is None and starts:
+                booked = days_booked[(doctor_id, index)] = [0, rng.randrange(len(starts))]
+            if booked is not None and booked[0] < len(starts):
+                break
+            index = (index + 1) % span
+
+        day = first_day + timedelta(days=index)
+        appt_time = datetime.combine(day, starts[(booked[1] + booked[0]) % len(starts)])
+        booked[0] += 1
+
+        # Fully booked doctors stop drawing patients; the rest keep their relative popularity
+        doctor_booked[doctor_id] += 1
+        if doctor_booked[doctor_id] == capacity[doctor_id] and n + 1 < total:
+            open_doctors.remove(doctor_id)
+            doctor = WeightedChoice(open_doctors, [popularity[d] for d in open_doctors], rng)
+
+        roll = rng.random()
+        if day < today:
+            status = "completed" if roll < 0.86 else "cancelled"
+        else:
+            status = "scheduled" if roll < 0.93 else "cancelled"
+
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (
+            doctor_id,
+            f"{first} {last}",
+            f"{first.lower()}.{last.lower()}{n % 9973}@example.com",
+            appt_time,
+            reason.pick(),
+            status,
+        )
+
+
+async def reset_synthetic(conn: asyncpg.Connection):
+    doctor_ids = f"SELECT id FROM doctors WHERE email LIKE '%@{SYNTHETIC_DOMAIN}'"
+    async with conn.transaction():
+        deleted = await conn.execute(f"DELETE FROM appointments WHERE doctor_id IN ({doctor_ids})")
+        await conn.execute(f"DELETE FROM availability_slots WHERE doctor_id IN ({doctor_ids})")
+        doctors = await conn.execute(f"DELETE FROM doctors WHERE email LIKE '%@{SYNTHETIC_DOMAIN}'")
+    print(f"Removed previous synthetic data ({doctors.split()[-1]} doctors, {deleted.split()[-1]} appointments).")
+
+
+async def generate(args):
+    rng = random.Random(args.seed)
+    conn = await asyncpg.connect(asyncpg_dsn())
+    try:
+        await reset_synthetic(conn)
+        if args.reset_only:
+            return
+
+        started = clock.perf_counter()
+        await conn.copy_records_to_table(
+            "doctors",
+            records=build_doctors(args.doctors, rng),
+            columns=["name", "email", "specialization", "slack_id", "phone",
+                     "experience_years", "qualification", "consultation_fee"],
+        )
+        doctor_ids = [r["id"] for r in await conn.fetch(
+            f"SELECT id FROM doctors WHERE email LIKE '%@{SYNTHETIC_DOMAIN}' ORDER BY email"
+        )]
+        print(f"Copied {len(doctor_ids)} doctors.")
+
+        slot_rows, bookable = build_templates(doctor_ids, rng)
+        await conn.copy_records_to_table(
+            "availability_slots",
+            records=slot_rows,
+            columns=["doctor_id", "day_of_week", "start_time", "end_time", "slot_duration_minutes"],
+        )
+        print(f"Copied {len(slot_rows)} weekly availability blocks.")
+
+        today = args.today or date.today()
+        print(f"Appointment window anchored on {today} (pass --today {today} to reproduce).")
+        rows = generate_appointments(
+            args.appointments, doctor_ids, bookable, args.days_back, args.days_ahead, args.zipf, rng, today
+        )
+        copied = 0
+        while copied < args.appointments:
+            chunk = list(itertools.islice(rows, args.chunk_size))
+            if not chunk:
+                break
+            await conn.copy_records_to_table(
+                "appointments",
+                records=chunk,
+                columns=["doctor_id", "patient_name", "patient_email", "appointment_time", "reason", "status"],
+            )
+            copied += len(chunk)
+            elapsed = clock.perf_counter() - started
+            print(f"  {copied:>12,} / {args.appointments:,} appointments ({copied / elapsed:,.0f} rows/s)")
+
+        # Fresh planner statistics so benchmarks see realistic query plans
+        await conn.execute("ANALYZE doctors; ANALYZE availability_slots; ANALYZE appointments;")
+        print(f"Done in {clock.perf_counter() - started:.1f}s.")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset via COPY.")
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--appointments", type=int, default=100000)
+    parser.add_argument("--days-back", type=int, default=365, help="History window in days")
+    parser.add_argument("--days-ahead", type=int, default=60, help="Future bookings window in days")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Doctor popularity skew (0 = uniform)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows per COPY batch")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat,
+                        help="Date the appointment window is anchored on, YYYY-MM-DD (default: the current date)")
+    parser.add_argument("--reset-only", action="store_true", help="Only remove previous synthetic data")
+    args = parser.parse_args()
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
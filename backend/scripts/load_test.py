@@ -0,0 +1,325 @@
+"""
+Load-Testing Harness: /api/chat and /api/slack/events
+
+Boots the FastAPI app in-process (including its lifespan) against the
+configured DATABASE_URL and the offline scripted LLM provider, then drives
+both endpoints with a configurable concurrency and conversation mix.
+
+Reports throughput, p50/p95/p99 latency and DB/LLM call counts per turn, and
+optionally writes them as JSON so results can be compared between releases.
+Outbound Slack, SMTP and Calendar calls run in mock mode.
+
+The shared availability cache and tool-call coalescing are off by default so
+DB counts reflect real queries; --availability-cache / --coalescing turn them
+on for warm-path runs. Both settings are recorded in the report.
+
+Prerequisites: a seeded local Postgres (scripts/seed_data.py).
+
+Usage:
+    python scripts/load_test.py --concurrency 20 --conversations 200
+    python scripts/load_test.py --mix availability=3,report=2,routed=2,smalltalk=1 \\
+        --slack-share 0.2 --llm-latency-ms 400 --output results.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Must be set before the app (and its settings) are imported
+os.environ.setdefault("LLM_PROVIDER", "scripted")
+for _key in ("SLACK_WEBHOOK_URL", "SLACK_BOT_TOKEN", "SLACK_SIGNING_SECRET", "SMTP_USER", "SMTP_PASSWORD"):
+    os.environ[_key] = ""
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.core.config import settings
+from app.core.database import engine
+from app.api.slack import slack_event_queue
+from app.llm import ChatSession, LLMProvider
+from app.services import llm_service
+from app.services.mcp_tools import list_doctors
+from app.services.google_calendar import calendar_service
+
+# Conversations per scenario; each entry is a list of user turns
+SCENARIOS = {
+    "availability": lambda doctor: [f"Is {doctor} available tomorrow?", "Which slots are free in the morning?"],
+    "report": lambda doctor: [f"Give me a summary of today's appointments for {doctor}"],
+    "routed": lambda doctor: ["list cardiologists", f"stats for {doctor} this week"],
+    "smalltalk": lambda doctor: ["Hello!", "What can you do?"],
+}
+
+DEFAULT_MIX = "availability=3,report=2,routed=2,smalltalk=1"
+
+# Per-turn counters, carried by contextvars into SQLAlchemy's greenlets and LLM calls
+_turn_counters: contextvars.ContextVar = contextvars.ContextVar("turn_counters", default=None)
+
+
+def _count(kind: str):
+    counters = _turn_counters.get()
+    if counters is not None:
+        counters[kind] += 1
+
+
+def _new_counters() -> Dict[str, int]:
+    counters = {"db": 0, "llm": 0}
+    _turn_counters.set(counters)
+    return counters
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _count("db")
+
+
+class CountingChatSession(ChatSession):
+    def __init__(self, inner: ChatSession):
+        self.inner = inner
+
+    async def send_message(self, content):
+        _count("llm")
+        return await self.inner.send_message(content)
+
+    async def send_function_response(self, name, result):
+        _count("llm")
+        return await self.inner.send_function_response(name, result)
+
+
+class CountingProvider(LLMProvider):
+    """Wraps any provider and attributes its calls to the current turn."""
+
+    def __init__(self, inner: LLMProvider):
+        super().__init__()
+        self.inner = inner
+        self.name = f"counting:{inner.name}"
+
+    def start_chat(self, history):
+        return CountingChatSession(self.inner.start_chat(history))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [s["latency_ms"] for s in samples]
+    db = [s["db"] for s in samples]
+    llm = [s["llm"] for s in samples]
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "errors": sum(1 for s in samples if s["error"]),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        },
+        "db_queries_per_turn": {
+            "mean": round(sum(db) / len(db), 2),
+            "p95": percentile(db, 95),
+            "max": max(db),
+        },
+        "llm_calls_per_turn": {
+            "mean": round(sum(llm) / len(llm), 2),
+            "p95": percentile(llm, 95),
+            "max": max(llm),
+        },
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.samples: Dict[str, List[Dict[str, Any]]] = {"chat": [], "slack_ack": [], "slack_processing": []}
+
+    async def _timed(self, bucket: str, coro):
+        counters = _new_counters()
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await coro
+            if isinstance(result, httpx.Response) and result.status_code >= 400:
+                error = f"HTTP {result.status_code}"
+        except Exception as e:
+            error = str(e)
+        self.samples[bucket].append({
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "db": counters["db"],
+            "llm": counters["llm"],
+            "error": error,
+        })
+        return None if error else result
+
+    def _wrap_slack_handler(self):
+        handler = slack_event_queue.handler
+
+        async def timed_handler(event):
+            await self._timed("slack_processing", handler(event))
+
+        slack_event_queue.handler = timed_handler
+
+    async def run_chat_conversation(self, client: httpx.AsyncClient, turns: List[str]):
+        session_id = None
+        for text in turns:
+            resp = await self._timed("chat", client.post("/api/chat", json={"message": text, "session_id": session_id}))
+            if resp is None:
+                return
+            session_id = resp.json()["session_id"]
+
+    async def run_slack_conversation(self, client: httpx.AsyncClient, turns: List[str]):
+        user = f"ULOAD{uuid.uuid4().hex[:8].upper()}"
+        for text in turns:
+            payload = {
+                "type": "event_callback",
+                "event_id": f"Ev{uuid.uuid4().hex}",
+                "event": {"type": "message", "user": user, "channel": "CLOAD", "text": text, "ts": f"{time.time():.6f}"},
+            }
+            await self._timed("slack_ack", client.post("/api/slack/events", json=payload))
+
+    async def run(self) -> Dict[str, Any]:
+        args = self.args
+        engine.echo = False
+        calendar_service.authenticate = lambda *args, **kwargs: False
+        llm_service.set_llm_provider(CountingProvider(llm_service.get_llm_provider()))
+        self._wrap_slack_handler()
+
+        doctors = [d["name"] for d in (await list_doctors())["doctors"]] or ["Dr. Ahuja"]
+        mix = parse_mix(args.mix)
+        names, weights = list(mix), list(mix.values())
+
+        conversations = []
+        for _ in range(args.conversations):
+            scenario = self.rng.choices(names, weights)[0]
+            channel = "slack" if self.rng.random() < args.slack_share else "chat"
+            conversations.append((channel, SCENARIOS[scenario](self.rng.choice(doctors))))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for conversation in conversations:
+            queue.put_nowait(conversation)
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+                async def worker():
+                    while not queue.empty():
+                        channel, turns = queue.get_nowait()
+                        if channel == "slack":
+                            await self.run_slack_conversation(client, turns)
+                        else:
+                            await self.run_chat_conversation(client, turns)
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+                await slack_event_queue.join()
+                duration = time.perf_counter() - started
+        await engine.dispose()
+
+        turns = len(self.samples["chat"]) + len(self.samples["slack_processing"])
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "git_commit": git_commit(),
+                "config": {
+                    "concurrency": args.concurrency,
+                    "conversations": args.conversations,
+                    "mix": mix,
+                    "slack_share": args.slack_share,
+                    "llm_provider": os.environ.get("LLM_PROVIDER"),
+                    "llm_latency_ms": args.llm_latency_ms,
+                    "seed": args.seed,
+                    "availability_cache_enabled": settings.AVAILABILITY_CACHE_ENABLED,
+                    "tool_coalescing_enabled": settings.TOOL_COALESCING_ENABLED,
+                },
+            },
+            "summary": {
+                "turns": turns,
+                "errors": sum(s["error"] is not None for bucket in self.samples.values() for s in bucket),
+                "duration_s": round(duration, 3),
+                "throughput_turns_per_s": round(turns / duration, 2) if duration else 0.0,
+            },
+            "endpoints": {name: summarize(samples) for name, samples in self.samples.items()},
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report["summary"]
+    print(f"\nTurns: {summary['turns']}  Errors: {summary['errors']}  "
+          f"Duration: {summary['duration_s']}s  Throughput: {summary['throughput_turns_per_s']} turns/s\n")
+    print(f"{'endpoint':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db/turn':>10}{'llm/turn':>10}")
+    for name, stats in report["endpoints"].items():
+        if not stats.get("count"):
+            continue
+        lat = stats["latency_ms"]
+        print(f"{name:<18}{stats['count']:>7}{lat['p50']:>10}{lat['p95']:>10}{lat['p99']:>10}"
+              f"{stats['db_queries_per_turn']['mean']:>10}{stats['llm_calls_per_turn']['mean']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/chat and /api/slack/events in-process.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent conversations")
+    parser.add_argument("--conversations", type=int, default=100, help="Total conversations to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--slack-share", type=float, default=0.0, help="Fraction of conversations sent as Slack events")
+    parser.add_argument("--llm-latency-ms", type=float, default=None, help="Simulated latency per scripted LLM call")
+    parser.add_argument("--availability-cache", action="store_true",
+                        help="Serve free slots from the shared availability cache (off by default)")
+    parser.add_argument("--coalescing", action="store_true", help="Coalesce identical concurrent tool calls (off by default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the machine-readable report to this JSON file")
+    args = parser.parse_args()
+
+    settings.AVAILABILITY_CACHE_ENABLED = args.availability_cache
+    settings.TOOL_COALESCING_ENABLED = args.coalescing
+    if args.llm_latency_ms is not None:
+        settings.LLM_SCRIPTED_LATENCY_MS = args.llm_latency_ms
+
+    report = asyncio.run(LoadTest(args).run())
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
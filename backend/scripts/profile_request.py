@@ -0,0 +1,72 @@
+"""
+Profile One Live Chat Request
+
+Sends a signed /api/chat request to a running server with PROFILING_ENABLED,
+then downloads the resulting profile files (see app/core/profiling.py).
+PROFILING_SECRET must match the server's.
+
+Usage:
+    PROFILING_SECRET=... python scripts/profile_request.py "Is Dr. Ahuja available tomorrow?"
+    python scripts/profile_request.py "Give me today's report" --url https://api.example.com --session-id abc
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.profiling import PROFILE_FILES, sign_profile_request
+
+
+def signed_headers(secret: str, method: str, path: str):
+    timestamp = str(int(time.time()))
+    return {
+        "X-Profile-Timestamp": timestamp,
+        "X-Profile-Signature": sign_profile_request(secret, timestamp, method, path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a single /api/chat request on a live server.")
+    parser.add_argument("message")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--session-id")
+    parser.add_argument("--secret", default=os.environ.get("PROFILING_SECRET"))
+    parser.add_argument("--out", default="profiles", help="Directory to download the profile files into")
+    args = parser.parse_args()
+    if not args.secret:
+        raise SystemExit("Set PROFILING_SECRET or pass --secret.")
+
+    with httpx.Client(base_url=args.url, timeout=120) as client:
+        resp = client.post(
+            "/api/chat",
+            json={"message": args.message, "session_id": args.session_id},
+            headers=signed_headers(args.secret, "POST", "/api/chat"),
+        )
+        print(f"HTTP {resp.status_code}: {resp.json().get('response')}")
+
+        profile_id = resp.headers.get("X-Profile-Id")
+        if not profile_id:
+            raise SystemExit("Request was not profiled (profiling disabled, bad signature, or another profile running).")
+        print(f"Profile {profile_id}: {resp.headers.get('X-Profile-Allocations')}")
+        print(f"Server-Timing: {resp.headers.get('Server-Timing')}")
+
+        os.makedirs(args.out, exist_ok=True)
+        for kind, filename in PROFILE_FILES.items():
+            path = f"/api/debug/profiles/{profile_id}/{kind}"
+            file_resp = client.get(path, headers=signed_headers(args.secret, "GET", path))
+            if file_resp.status_code != 200:
+                continue
+            target = os.path.join(args.out, f"{profile_id}-{filename}")
+            with open(target, "wb") as f:
+                f.write(file_resp.content)
+            print(f"  saved {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Conversation Replay Runner
+
+Re-runs recorded conversations (CONVERSATION_RECORD_PATH logs) through
+process_chat_message with the model responses served from the recording,
+against the configured DATABASE_URL. Tools and queries run for real, so each
+conversation's cost can be measured before and after a change:
+- tool calls and model calls per turn
+- DB queries per turn
+- time spent per turn (excluding the model, unless --llm-latency is given)
+
+Turns where the loop asked for a different number of model responses than
+were recorded (e.g. a message the intent router now answers) are marked as
+diverged. Outbound Slack, SMTP and Calendar calls run in mock mode.
+
+Recording a corpus:
+    CONVERSATION_RECORD_PATH=recordings/demo.jsonl python scripts/demo_agent_flow.py
+    python scripts/demo_agent_flow.py --record recordings/demo.jsonl
+
+Usage:
+    python scripts/replay_conversations.py recordings/demo.jsonl --output before.json
+    python scripts/replay_conversations.py recordings/demo.jsonl --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Must be set before the app (and its settings) are imported
+os.environ["CONVERSATION_RECORD_PATH"] = ""
+for _key in ("SLACK_WEBHOOK_URL", "SLACK_BOT_TOKEN", "SMTP_USER", "SMTP_PASSWORD"):
+    os.environ[_key] = ""
+
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.llm.replay import ReplayProvider
+from app.services import llm_service
+from app.services.conversation_recorder import ConversationRecorder, group_conversations, load_records
+from app.services.google_calendar import calendar_service
+
+_db_queries = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _db_queries
+    _db_queries += 1
+
+
+class CapturingRecorder(ConversationRecorder):
+    """Keeps the replayed turns in memory instead of appending them to a log."""
+
+    def __init__(self):
+        super().__init__()
+        self.turns: List[Dict[str, Any]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def finish(self, turn, response: str):
+        super().finish(turn, response)
+        self.turns.append(turn.to_dict())
+
+
+def turn_cost(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "routed": record["routed"],
+        "llm_calls": len(record["llm"]),
+        "tool_calls": len(record["tools"]) + (1 if record["routed"] else 0),
+        "tools": [t["name"] for t in record["tools"]],
+        "ms": record["ms"],
+    }
+
+
+async def replay(paths: List[str], replay_latency: bool) -> Dict[str, Any]:
+    global _db_queries
+    engine.echo = False
+    calendar_service.authenticate = lambda *args, **kwargs: False
+
+    provider = ReplayProvider(replay_latency=replay_latency)
+    recorder = CapturingRecorder()
+    llm_service.set_llm_provider(provider)
+    llm_service.conversation_recorder = recorder
+
+    conversations = {}
+    for path in paths:
+        conversations.update(group_conversations(load_records(path)))
+
+    results = []
+    for source_id, turns in conversations.items():
+        session_id = f"replay_{uuid.uuid4().hex[:12]}"
+        replayed_turns = []
+        for record in turns:
+            provider.load_turn(record)
+            divergences = provider.stats["divergences"]
+            _db_queries = 0
+            await llm_service.process_chat_message(record["user_message"], session_id=session_id, doctor=record.get("doctor"))
+            replayed = turn_cost(recorder.turns[-1])
+            replayed["db_queries"] = _db_queries
+            replayed["diverged"] = provider.remaining > 0 or provider.stats["divergences"] > divergences
+            replayed_turns.append({
+                "user_message": record["user_message"],
+                "recorded": turn_cost(record),
+                "replayed": replayed,
+            })
+        results.append({"source_session_id": source_id, "turns": replayed_turns})
+
+    await engine.dispose()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "recordings": paths,
+            "llm_latency": replay_latency,
+        },
+        "summary": summarize(results),
+        "conversations": results,
+    }
+
+
+def summarize(conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    turns = [t["replayed"] for c in conversations for t in c["turns"]]
+    if not turns:
+        return {"conversations": 0, "turns": 0}
+    ms = [t["ms"] for t in turns]
+    return {
+        "conversations": len(conversations),
+        "turns": len(turns),
+        "diverged_turns": sum(t["diverged"] for t in turns),
+        "routed_turns": sum(t["routed"] for t in turns),
+        "tool_calls": sum(t["tool_calls"] for t in turns),
+        "llm_calls": sum(t["llm_calls"] for t in turns),
+        "db_queries": sum(t["db_queries"] for t in turns),
+        "total_ms": round(sum(ms), 2),
+        "p50_turn_ms": round(statistics.median(ms), 2),
+        "max_turn_ms": round(max(ms), 2),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    for conversation in report["conversations"]:
+        print(f"\n{conversation['source_session_id']}")
+        for turn in conversation["turns"]:
+            r = turn["replayed"]
+            flag = "  DIVERGED" if r["diverged"] else ""
+            print(f"  {turn['user_message'][:48]:<50}tools={r['tool_calls']} llm={r['llm_calls']} "
+                  f"db={r['db_queries']} {r['ms']:.1f}ms{flag}")
+
+    print("\nSummary:")
+    for key, value in report["summary"].items():
+        print(f"  {key:<16}{value}")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"\nVs baseline ({baseline['meta']['timestamp']}):")
+    for key in ("tool_calls", "llm_calls", "db_queries", "total_ms", "p50_turn_ms", "diverged_turns"):
+        before, after = baseline["summary"].get(key, 0), current["summary"].get(key, 0)
+        change = f"{(after - before) / before:+.0%}" if before else "n/a"
+        print(f"  {key:<16}{before:>12} -> {after:<12}{change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded conversations and measure their cost.")
+    parser.add_argument("recordings", nargs="+", help="JSONL recordings written via CONVERSATION_RECORD_PATH")
+    parser.add_argument("--llm-latency", action="store_true", help="Wait as long as the recorded model calls took")
+    parser.add_argument("--output", help="Write the replay report to this JSON file")
+    parser.add_argument("--compare", help="Earlier replay report to compare the summary against")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.recordings, args.llm_latency))
+    print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.llm.base import LLMProvider
+from app.services import llm_service
+from app.services.admission import AdmissionController, AdmissionRejected, web_tenant
+from test_llm_providers import in_memory_sessions
+
+
+def test_concurrency_is_capped_globally_and_per_tenant():
+    async def run():
+        controller = AdmissionController(max_concurrent=3, max_queue=20, max_wait_seconds=5,
+                                         tenant_max_concurrent=2, tenant_max_queue=10)
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0, "total": 0}
+
+        async def turn(tenant):
+            slot = await controller.acquire(tenant)
+            try:
+                running[tenant] += 1
+                peak[tenant] = max(peak[tenant], running[tenant])
+                peak["total"] = max(peak["total"], running["a"] + running["b"])
+                await asyncio.sleep(0.01)
+            finally:
+                running[tenant] -= 1
+                slot.release()
+
+        await asyncio.gather(*(turn("a") for _ in range(6)), *(turn("b") for _ in range(6)))
+        assert peak == {"a": 2, "b": 2, "total": 3}
+        assert controller.active == controller.waiting == 0
+        assert controller._tenants == {}
+
+    asyncio.run(run())
+
+
+def test_full_queues_are_rejected_with_retry_after():
+    async def run():
+        controller = AdmissionController(max_concurrent=2, max_queue=1, max_wait_seconds=5,
+                                         tenant_max_concurrent=1, tenant_max_queue=1)
+        held = await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+
+        try:
+            await controller.acquire("a")
+            assert False, "tenant queue should be full"
+        except AdmissionRejected as e:
+            assert e.reason == "tenant_queue_full"
+            assert e.status_code == 429
+            assert e.retry_after >= 1
+
+        # Another tenant still gets the free global slot without queueing
+        other = await controller.acquire("b")
+        try:
+            await controller.acquire("c")
+            assert False, "global queue should be full"
+        except AdmissionRejected as e:
+            assert e.reason == "queue_full"
+            assert e.status_code == 503
+
+        held.release()
+        (await waiter).release()
+        other.release()
+        assert controller._tenants == {}
+
+    asyncio.run(run())
+
+
+def test_waiting_past_the_deadline_is_rejected():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=5, max_wait_seconds=0.05)
+        held = await controller.acquire("a")
+        try:
+            await controller.acquire("b")
+            assert False, "wait should time out"
+        except AdmissionRejected as e:
+            assert e.reason == "timeout"
+            assert e.status_code == 503
+        assert controller.waiting == 0
+
+        held.release()
+        held.release()  # Releasing twice is harmless
+        (await controller.acquire("b")).release()
+        assert controller.active == 0
+
+    asyncio.run(run())
+
+
+def test_slot_is_returned_when_the_chat_cannot_start():
+    class BrokenProvider(LLMProvider):
+        name = "broken"
+
+        def start_chat(self, history):
+            raise ValueError("malformed stored history")
+
+    async def run():
+        controller = AdmissionController(max_concurrent=2, max_queue=0, tenant_max_concurrent=1, tenant_max_queue=0)
+        sessions, patches = in_memory_sessions()
+        for p in patches:
+            p.start()
+        llm_service.set_llm_provider(BrokenProvider())
+        try:
+            with patch.object(llm_service, "admission_controller", controller), \
+                    patch.object(settings, "INTENT_ROUTER_ENABLED", False):
+                for _ in range(3):
+                    result = await llm_service.process_chat_message("hello", tenant="web:1.2.3.4")
+                    assert result["response"].startswith("Error communicating with AI")
+        finally:
+            llm_service.set_llm_provider(None)
+            for p in patches:
+                p.stop()
+        assert controller.active == 0
+
+    asyncio.run(run())
+
+
+def test_web_tenant_is_the_client_behind_trusted_proxies():
+    proxies = "10.0.0.0/8, 127.0.0.1"
+    # Every request arrives from the proxy; the forwarded client is the tenant
+    assert web_tenant("10.0.0.5", "203.0.113.7", proxies) == "web:203.0.113.7"
+    assert web_tenant("10.0.0.5", "198.51.100.1, 203.0.113.7, 10.0.0.9", proxies) == "web:203.0.113.7"
+    # A client cannot pick its own tenant by sending the header directly
+    assert web_tenant("203.0.113.7", "198.51.100.1", proxies) == "web:203.0.113.7"
+    assert web_tenant("10.0.0.5", "198.51.100.1", "") == "web:10.0.0.5"
+    assert web_tenant("10.0.0.5", None, proxies) == "web:10.0.0.5"
+    assert web_tenant(None) == "web:unknown"
+
+
+if __name__ == "__main__":
+    test_concurrency_is_capped_globally_and_per_tenant()
+    test_full_queues_are_rejected_with_retry_after()
+    test_waiting_past_the_deadline_is_rejected()
+    test_slot_is_returned_when_the_chat_cannot_start()
+    test_web_tenant_is_the_client_behind_trusted_proxies()
+    print("Admission control tests passed.")
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from app.core.single_flight import SingleFlight
+from app.services.availability_cache import AvailabilityCache, InProcessAvailabilityStore, create_availability_cache
+
+
+def sample(outcome):
+    return REGISTRY.get_sample_value("availability_cache_lookups_total", {"outcome": outcome}) or 0.0
+
+
+class SlowSlots:
+    """Stands in for the schedule and appointment queries."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"working": True, "slots": ["09:00", "09:30"]}
+
+
+def new_cache(**kwargs):
+    return AvailabilityCache(InProcessAvailabilityStore(ttl_seconds=60, **kwargs))
+
+
+def test_hits_until_the_doctor_is_booked():
+    async def run():
+        cache, compute = new_cache(), SlowSlots()
+        first = await cache.get_or_compute(1, "2026-01-21", compute)
+        first["slots"].clear()  # Callers cannot corrupt the cache
+        assert await cache.get_or_compute(1, "2026-01-21", compute) == {"working": True, "slots": ["09:00", "09:30"]}
+        await cache.get_or_compute(1, "2026-01-22", compute)
+        await cache.get_or_compute(2, "2026-01-21", compute)
+        assert compute.calls == 3
+
+        await cache.invalidate_doctor(1)
+        await cache.get_or_compute(1, "2026-01-21", compute)
+        await cache.get_or_compute(2, "2026-01-21", compute)
+        # Only the booked doctor recomputes
+        assert compute.calls == 4
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_compute_once():
+    async def run():
+        cache, compute = new_cache(), SlowSlots(delay=0.02)
+        before_miss, before_coalesced = sample("miss"), sample("coalesced")
+        results = await asyncio.gather(*(cache.get_or_compute(1, "2026-01-21", compute) for _ in range(5)))
+        assert compute.calls == 1
+        assert all(r["slots"] == ["09:00", "09:30"] for r in results)
+        assert sample("miss") == before_miss + 1
+        assert sample("coalesced") == before_coalesced + 4
+
+    asyncio.run(run())
+
+
+def test_result_computed_during_a_booking_is_not_served():
+    async def run():
+        cache = new_cache()
+
+        async def racing_compute():
+            # A booking lands while the old schedule is being read
+            await cache.invalidate_doctor(1)
+            return {"working": True, "slots": ["09:00"]}
+
+        await cache.get_or_compute(1, "2026-01-21", racing_compute)
+        fresh = SlowSlots()
+        assert (await cache.get_or_compute(1, "2026-01-21", fresh))["slots"] == ["09:00", "09:30"]
+        assert fresh.calls == 1
+
+    asyncio.run(run())
+
+
+def test_unreachable_backend_computes_directly():
+    class DownStore(InProcessAvailabilityStore):
+        async def version(self, doctor_id):
+            raise ConnectionError("connection refused")
+
+    async def run():
+        cache, compute = AvailabilityCache(DownStore(ttl_seconds=60)), SlowSlots()
+        before = sample("error")
+        assert (await cache.get_or_compute(1, "2026-01-21", compute))["working"]
+        assert sample("error") == before + 1
+
+    asyncio.run(run())
+
+
+def test_lru_and_ttl_bound_the_store():
+    async def run():
+        store = InProcessAvailabilityStore(ttl_seconds=60, max_entries=2)
+        for key in ("a", "b", "c"):
+            await store.set(key, 1)
+        assert len(store) == 2 and await store.get("a") is None
+
+        expired = InProcessAvailabilityStore(ttl_seconds=0)
+        await expired.set("a", 1)
+        assert await expired.get("a") is None
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def run():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        impatient = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        patient = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        assert await patient == ("done", True)
+        assert len(flights) == 0
+
+    asyncio.run(run())
+
+
+def test_unknown_backend_is_rejected():
+    try:
+        create_availability_cache("memcached")
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "redis" in str(e)
+
+
+if __name__ == "__main__":
+    test_hits_until_the_doctor_is_booked()
+    test_concurrent_misses_compute_once()
+    test_result_computed_during_a_booking_is_not_served()
+    test_unreachable_backend_computes_directly()
+    test_lru_and_ttl_bound_the_store()
+    test_cancelled_caller_does_not_cancel_shared_work()
+    test_unknown_backend_is_rejected()
+    print("Availability cache tests passed.")
@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.llm.replay import ReplayDivergence, ReplayProvider
+from app.llm.scripted import ScriptedProvider
+from app.services import llm_service
+from app.services.conversation_recorder import ConversationRecorder, group_conversations, load_records
+from test_llm_providers import in_memory_sessions
+
+
+async def fake_availability(doctor_name, date_str, time_preference=None, doctor_id=None):
+    return {"doctor_id": 1, "doctor_name": "Dr. Rajesh Ahuja", "date": date_str, "available_slots": ["10:00"]}
+
+
+async def run_turns(provider, recorder, messages, session_id="s1"):
+    sessions, patches = in_memory_sessions()
+    for p in patches:
+        p.start()
+    llm_service.set_llm_provider(provider)
+    try:
+        with patch.dict(llm_service.AVAILABLE_TOOLS, {"check_doctor_availability": fake_availability}), \
+                patch.object(llm_service, "conversation_recorder", recorder), \
+                patch.object(llm_service.settings, "INTENT_ROUTER_ENABLED", False):
+            results = []
+            for message in messages:
+                if isinstance(provider, ReplayProvider):
+                    provider.load_turn(message)
+                    message = message["user_message"]
+                results.append(await llm_service.process_chat_message(message, session_id=session_id))
+            return results
+    finally:
+        llm_service.set_llm_provider(None)
+        for p in patches:
+            p.stop()
+
+
+def test_turns_are_recorded_and_replayed():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.jsonl")
+            recorder = ConversationRecorder(path)
+            recorded = await run_turns(ScriptedProvider(), recorder, ["Is Dr. Ahuja free tomorrow?", "Hello"])
+            recorder.flush()
+
+            records = load_records(path)
+            assert len(records) == 2
+            first = records[0]
+            assert [c["name"] for c in first["llm"][0]["response"]["function_calls"]] == ["check_doctor_availability"]
+            assert first["tools"][0]["result"]["available_slots"] == ["10:00"]
+            assert first["response"] == recorded[0]["response"]
+            assert list(group_conversations(records)) == ["s1"]
+
+            provider = ReplayProvider()
+            replayed = await run_turns(provider, ConversationRecorder(), records, session_id="replay")
+            assert [r["response"] for r in replayed] == [r["response"] for r in recorded]
+            assert provider.stats["divergences"] == 0
+            assert provider.remaining == 0
+
+    asyncio.run(run())
+
+
+def test_recordings_are_redacted_and_written_off_the_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.jsonl")
+        recorder = ConversationRecorder(path)
+        turn = recorder.start_turn("s1", "Book me in, I'm jane.doe@example.com")
+        args = {"doctor_id": 1, "patient_name": "Jane Doe", "patient_email": "jane.doe@example.com"}
+        turn.add_tool_call("book_appointment", args, {"status": "success", "appointment_id": 7}, 0.0)
+        recorder.finish(turn, "Booked for jane.doe@example.com")
+        recorder.flush()
+        assert recorder._writer is not None and recorder._writer is not threading.current_thread()
+
+        with open(path, encoding="utf-8") as f:
+            raw = f.read()
+        assert "jane.doe@example.com" not in raw and "Jane Doe" not in raw
+        record = load_records(path)[0]
+        assert record["user_message"] == "Book me in, I'm j***@example.com"
+        assert record["tools"][0]["args"] == {"doctor_id": 1, "patient_name": "***", "patient_email": "***"}
+        assert record["tools"][0]["result"]["appointment_id"] == 7
+
+
+def test_replay_raises_when_recording_runs_out():
+    async def run():
+        provider = ReplayProvider()
+        provider.load_turn({"llm": []})
+        try:
+            await provider.start_chat([]).send_message("hi")
+            assert False, "Expected ReplayDivergence"
+        except ReplayDivergence:
+            pass
+        assert provider.stats["divergences"] == 1
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_turns_are_recorded_and_replayed()
+    test_recordings_are_redacted_and_written_off_the_loop()
+    test_replay_raises_when_recording_runs_out()
+    print("Conversation replay tests passed.")
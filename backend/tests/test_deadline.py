@@ -0,0 +1,180 @@
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, io_timeout, remaining, turn_deadline, within_deadline
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+from app.services import llm_service
+from test_llm_providers import in_memory_sessions
+
+
+class ToolLoopProvider(LLMProvider):
+    """Asks for the same tool forever, optionally after a delay."""
+
+    name = "tool-loop"
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+
+    def start_chat(self, history):
+        provider = self
+
+        class Chat(ChatSession):
+            async def send_message(self, content):
+                await asyncio.sleep(provider.delay)
+                return LLMResponse(function_calls=[FunctionCall("list_doctors", {})])
+
+            async def send_function_response(self, name, result):
+                return await self.send_message("")
+
+        return Chat()
+
+
+async def run_turn(provider, tools, **overrides):
+    sessions, patches = in_memory_sessions()
+    for p in patches:
+        p.start()
+    llm_service.set_llm_provider(provider)
+    try:
+        # The memo would answer the repeated list_doctors calls these tests rely on
+        with patch.multiple(settings, INTENT_ROUTER_ENABLED=False, TOOL_MEMO_ENABLED=False, **overrides), \
+                patch.dict(llm_service.AVAILABLE_TOOLS, tools):
+            result = await llm_service.process_chat_message("Find me a doctor")
+    finally:
+        llm_service.set_llm_provider(None)
+        for p in patches:
+            p.stop()
+    return result, sessions[result["session_id"]].messages
+
+
+def test_deadline_cancels_slow_work():
+    async def run():
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        assert remaining() is None
+        with turn_deadline(0.05):
+            with turn_deadline(10):
+                # A nested deadline never extends the outer one
+                assert remaining() <= 0.05
+            assert io_timeout(cap=30) <= 0.05
+            try:
+                await within_deadline(slow())
+                assert False, "expected DeadlineExceeded"
+            except DeadlineExceeded:
+                pass
+            assert cancelled.is_set()
+            try:
+                io_timeout()
+                assert False, "expected DeadlineExceeded"
+            except DeadlineExceeded:
+                pass
+        assert io_timeout(cap=3) == 3
+
+    asyncio.run(run())
+
+
+def test_tool_iterations_are_capped():
+    calls = []
+
+    async def list_doctors():
+        calls.append(1)
+        return {"doctors": []}
+
+    result, messages = asyncio.run(run_turn(
+        ToolLoopProvider(), {"list_doctors": list_doctors}, TURN_MAX_TOOL_ITERATIONS=3
+    ))
+    assert len(calls) == 3
+    assert "too many steps" in result["response"]
+    assert "list doctors" in result["response"]
+    assert messages[-1] == {"role": "assistant", "content": result["response"]}
+
+
+def test_hung_tool_returns_a_partial_answer():
+    async def hung_tool():
+        await asyncio.sleep(5)
+
+    result, messages = asyncio.run(run_turn(
+        ToolLoopProvider(), {"list_doctors": hung_tool}, TURN_DEADLINE_SECONDS=0.1
+    ))
+    assert "took too long" in result["response"]
+    assert "still running list doctors" in result["response"]
+    # Nothing was stored for the cancelled tool call
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+
+
+def test_spent_deadline_is_not_reported_as_a_failed_email():
+    from app.services.email_service import email_service
+
+    async def run():
+        with patch.multiple(settings, SMTP_USER="clinic", SMTP_PASSWORD="secret"), turn_deadline(0):
+            await email_service.send_email("jane@example.com", "Booked", "See you")
+
+    try:
+        asyncio.run(run())
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+
+
+def test_calendar_timeout_is_reported_as_a_timeout():
+    from datetime import datetime
+    import time
+    from app.services import mcp_tools
+    from app.services.google_calendar import calendar_service
+
+    def slow_create_event(**kwargs):
+        time.sleep(0.2)
+        return "https://calendar.test/event"
+
+    async def run():
+        with patch.object(calendar_service, "create_event", slow_create_event), \
+                patch.object(settings, "OUTBOUND_TIMEOUT_SECONDS", 0.01):
+            return await mcp_tools.add_to_calendar("Dr. Rao", "Jane", "jane@example.com", datetime(2026, 1, 21, 9))
+
+    link, note = asyncio.run(run())
+    assert link is None
+    assert note == " (Calendar sync timed out.)"
+
+
+def test_spent_deadline_still_notifies_the_doctor_of_a_committed_booking():
+    from datetime import datetime
+    from app.services import mcp_tools
+
+    notified = []
+
+    async def notify(doctor_name, message, urgent=False):
+        notified.append(doctor_name)
+
+    async def run():
+        with patch.object(mcp_tools.notification_dispatcher, "notify", notify), turn_deadline(0):
+            return await mcp_tools.send_booking_followups(
+                "Dr. Rao", "Jane", "jane@example.com", datetime(2026, 1, 21, 9), None
+            )
+
+    link, msg = asyncio.run(run())
+    assert notified == ["Dr. Rao"]
+    assert link is None
+    assert msg == "Appointment booked successfully. (Confirmation email skipped: the request ran out of time.)"
+
+
+if __name__ == "__main__":
+    test_deadline_cancels_slow_work()
+    test_tool_iterations_are_capped()
+    test_hung_tool_returns_a_partial_answer()
+    test_spent_deadline_is_not_reported_as_a_failed_email()
+    test_calendar_timeout_is_reported_as_a_timeout()
+    test_spent_deadline_still_notifies_the_doctor_of_a_committed_booking()
+    print("Deadline tests passed.")
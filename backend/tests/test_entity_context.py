@@ -0,0 +1,129 @@
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+from app.services import llm_service
+from app.services.entity_context import extract_entities, format_entity_context, merge_entities
+from test_llm_providers import in_memory_sessions
+
+AVAILABILITY = {
+    "doctor_id": 2, "doctor_name": "Dr. Sarah Smith", "date": "2026-01-21",
+    "available_slots": ["09:00", "09:30", "10:00"]
+}
+
+
+class OneToolProvider(LLMProvider):
+    """Calls check_doctor_availability on the first turn only, recording what it was sent."""
+
+    name = "one-tool"
+
+    def __init__(self):
+        super().__init__()
+        self.inputs = []
+
+    def start_chat(self, history):
+        provider = self
+
+        class Chat(ChatSession):
+            async def send_message(self, content):
+                provider.inputs.append(content)
+                if len(provider.inputs) == 1:
+                    return LLMResponse(function_calls=[FunctionCall(
+                        "check_doctor_availability", {"doctor_name": "Smith", "date_str": "2026-01-21"}
+                    )])
+                return LLMResponse(text="Booked.")
+
+            async def send_function_response(self, name, result):
+                return LLMResponse(text="She is free in the morning.")
+
+        return Chat()
+
+
+def test_availability_resolves_doctor_date_and_slots():
+    found = extract_entities("check_doctor_availability", {"doctor_name": "Smith"}, AVAILABILITY)
+    assert found == {
+        "doctor": {"id": 2, "name": "Dr. Sarah Smith"},
+        "date": "2026-01-21",
+        "offered_slots": "09:00–10:00 every 30m",
+    }
+    assert extract_entities("check_doctor_availability", {}, {"error": "Doctor 'X' not found."}) == {}
+
+
+def test_only_an_unambiguous_doctor_list_resolves():
+    one = {"doctors": [{"id": 4, "name": "Dr. Ahuja", "specialization": "Cardiologist"}]}
+    two = {"doctors": one["doctors"] + [{"id": 5, "name": "Dr. Rao", "specialization": "Cardiologist"}]}
+    assert extract_entities("list_doctors", {}, one) == {"doctor": {"id": 4, "name": "Dr. Ahuja"}}
+    assert extract_entities("list_doctors", {}, two) == {}
+
+
+def test_booking_keeps_patient_and_clears_offered_slots():
+    entities = merge_entities({}, extract_entities("check_doctor_availability", {}, AVAILABILITY))
+    args = {"doctor_id": 2, "patient_name": "Jane", "patient_email": "jane@example.com",
+            "appointment_time_str": "2026-01-21T09:00:00"}
+
+    taken = merge_entities(entities, extract_entities("book_appointment", args, {"status": "failed", "error": "Slot already taken."}))
+    assert taken["patient"] == {"name": "Jane", "email": "jane@example.com"}
+    assert "appointment" not in taken and taken["offered_slots"]
+
+    booked = merge_entities(taken, extract_entities("book_appointment", args, {"status": "success", "appointment_id": 7}))
+    assert booked["appointment"]["id"] == 7
+    assert "offered_slots" not in booked
+    assert format_entity_context(booked) == (
+        "[Known: doctor Dr. Sarah Smith (doctor_id=2); date 2026-01-21; "
+        "patient Jane <jane@example.com>; booked appointment_id=7 at 2026-01-21T09:00:00]"
+    )
+
+
+def test_switching_doctor_forgets_date_and_slots():
+    entities = merge_entities({}, extract_entities("check_doctor_availability", {}, AVAILABILITY))
+    switched = merge_entities(entities, {"doctor": {"id": 4, "name": "Dr. Ahuja"}})
+    assert switched == {"doctor": {"id": 4, "name": "Dr. Ahuja"}}
+    assert format_entity_context({}) == ""
+
+
+def test_next_turn_is_told_what_is_known():
+    async def run():
+        sessions, patches = in_memory_sessions()
+        for p in patches:
+            p.start()
+        provider = OneToolProvider()
+        llm_service.set_llm_provider(provider)
+
+        async def check_doctor_availability(**kwargs):
+            return AVAILABILITY
+
+        try:
+            with patch.object(settings, "INTENT_ROUTER_ENABLED", False), \
+                    patch.dict(llm_service.AVAILABLE_TOOLS, {"check_doctor_availability": check_doctor_availability}):
+                first = await llm_service.process_chat_message("Is Dr. Smith free on the 21st?")
+                await llm_service.process_chat_message("Book 9:30 for Jane", first["session_id"])
+        finally:
+            llm_service.set_llm_provider(None)
+            for p in patches:
+                p.stop()
+
+        assert "[Known:" not in provider.inputs[0]
+        assert provider.inputs[1].splitlines()[-2:] == [
+            "[Known: doctor Dr. Sarah Smith (doctor_id=2); date 2026-01-21; free slots 09:00–10:00 every 30m]",
+            "Book 9:30 for Jane",
+        ]
+        # The note is never stored in history
+        messages = sessions[first["session_id"]].messages
+        assert all(not (m.get("content") or "").startswith("[Known:") for m in messages)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_availability_resolves_doctor_date_and_slots()
+    test_only_an_unambiguous_doctor_list_resolves()
+    test_booking_keeps_patient_and_clears_offered_slots()
+    test_switching_doctor_forgets_date_and_slots()
+    test_next_turn_is_told_what_is_known()
+    print("Entity context tests passed.")
@@ -0,0 +1,63 @@
+import random
+import sys
+import os
+from collections import Counter
+from datetime import date
+
+# Add project root and scripts to path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+
+from generate_dataset import build_templates, generate_appointments
+
+
+def generate(doctors, fill, days_back=13, days_ahead=0, seed=42, today=None):
+    """Generates appointments filling the given share of every doctor's slots in a two-week window."""
+    rng = random.Random(seed)
+    doctor_ids = list(range(1, doctors + 1))
+    _, bookable = build_templates(doctor_ids, rng)
+    slots = 2 * sum(len(starts) for schedule in bookable.values() for starts in schedule.values())
+    rows = list(generate_appointments(int(slots * fill), doctor_ids, bookable, days_back, days_ahead, 1.1, rng, today))
+    return bookable, rows
+
+
+def test_no_two_appointments_share_a_doctor_slot():
+    bookable, rows = generate(doctors=5, fill=0.6)
+    slots = Counter((row[0], row[3]) for row in rows)
+    assert slots.most_common(1)[0][1] == 1
+    for doctor_id, _, _, appt_time, *_ in rows:
+        assert appt_time.time() in bookable[doctor_id][appt_time.weekday()]
+
+
+def test_popular_doctor_overflows_to_other_days_and_doctors():
+    # Every slot taken: pure Zipf would give the top doctor far more than their share
+    bookable, rows = generate(doctors=3, fill=1.0)
+    assert len(set((row[0], row[3]) for row in rows)) == len(rows)
+    per_day = Counter((row[0], row[3].date()) for row in rows)
+    for (doctor_id, day), count in per_day.items():
+        assert count == len(bookable[doctor_id][day.weekday()])
+
+
+def test_more_appointments_than_slots_is_rejected():
+    try:
+        generate(doctors=1, fill=1.01)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "do not fit" in str(e)
+
+
+def test_same_seed_and_anchor_date_give_the_same_dataset():
+    anchor = date(2026, 1, 15)
+    _, first = generate(doctors=3, fill=0.5, seed=7, today=anchor)
+    _, second = generate(doctors=3, fill=0.5, seed=7, today=anchor)
+    assert first == second
+    assert max(row[3].date() for row in first) <= anchor
+
+
+if __name__ == "__main__":
+    test_no_two_appointments_share_a_doctor_slot()
+    test_popular_doctor_overflows_to_other_days_and_doctors()
+    test_more_appointments_than_slots_is_rejected()
+    test_same_seed_and_anchor_date_give_the_same_dataset()
+    print("Dataset generator tests passed.")
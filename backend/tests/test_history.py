@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.services.history import compact_history, estimate_tokens, fold_into_summary, split_turns, summarize_tool_result
+
+
+def tool_turn(question, tool, result, answer):
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": None, "tool_call": {"name": tool, "args": {}}},
+        {"role": "user", "content": None, "tool_response": {"name": tool, "result": result}},
+        {"role": "assistant", "content": answer},
+    ]
+
+
+def stats_result(n):
+    return {"total": n, "appointments": [{"patient": f"P{i}", "time": "10:00", "reason": "checkup " * 10} for i in range(n)]}
+
+
+def test_old_tool_payloads_are_summarized():
+    messages = []
+    for i in range(4):
+        messages += tool_turn(f"report {i}", "get_appointment_stats", stats_result(50), f"You have 50 appointments ({i}).")
+
+    kept, dropped = compact_history(messages, budget_tokens=100000, recent_tool_payloads=1)
+    assert dropped == []
+    results = [m["tool_response"]["result"] for m in kept if m.get("tool_response")]
+    assert results[-1] == stats_result(50)
+    for result in results[:-1]:
+        assert result["total"] == 50
+        assert len(result["appointments"]) == 4 and result["appointments"][-1] == "... 47 more"
+    assert sum(map(estimate_tokens, kept)) < sum(map(estimate_tokens, messages)) / 2
+    # The stored originals are left untouched
+    assert len(messages[2]["tool_response"]["result"]["appointments"]) == 50
+
+
+def test_whole_turns_are_dropped_to_fit_the_budget():
+    messages = []
+    for i in range(6):
+        messages += tool_turn(f"question {i}", "list_doctors", {"doctors": ["a", "b"]}, f"answer {i}")
+    per_turn = sum(map(estimate_tokens, messages[:4]))
+
+    kept, dropped = compact_history(messages, budget_tokens=per_turn * 2 + 1)
+    assert len(dropped) == 4 and len(kept) == 8
+    assert kept[0] == {"role": "user", "content": "question 4"}
+    assert all(len(turn) == 4 for turn in split_turns(kept))
+
+    # The latest turn is kept even when it alone is over budget
+    kept, dropped = compact_history(messages, budget_tokens=1)
+    assert kept[0]["content"] == "question 5" and len(kept) == 4
+
+
+def test_orphaned_leading_messages_are_dropped():
+    messages = tool_turn("q", "list_doctors", {}, "a")[2:] + tool_turn("next", "list_doctors", {}, "b")
+    kept, dropped = compact_history(messages, budget_tokens=100000)
+    assert kept[0] == {"role": "user", "content": "next"}
+    assert dropped[0][0].get("tool_response")
+
+
+def test_rolling_summary_is_bounded():
+    turns = [tool_turn(f"question {i}", "check_doctor_availability", {}, f"answer {i}") for i in range(20)]
+    summary = fold_into_summary(None, turns[:2], max_chars=1000)
+    assert summary.splitlines()[0] == "User: question 0 | tools: check_doctor_availability | Assistant: answer 0"
+
+    summary = fold_into_summary(summary, turns[2:], max_chars=300)
+    assert len(summary) <= 300
+    assert summary.splitlines()[-1].startswith("User: question 19")
+
+
+def test_summarize_tool_result_truncates_strings_and_depth():
+    result = summarize_tool_result({"note": "x" * 500, "nested": {"deep": {"deeper": 1}}})
+    assert result["note"].endswith("...") and len(result["note"]) == 203
+    assert result["nested"] == {"deep": "{1 fields}"}
+
+
+if __name__ == "__main__":
+    test_old_tool_payloads_are_summarized()
+    test_whole_turns_are_dropped_to_fit_the_budget()
+    test_orphaned_leading_messages_are_dropped()
+    test_rolling_summary_is_bounded()
+    test_summarize_tool_result_truncates_strings_and_depth()
+    print("History compaction tests passed.")
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from app.services.intent_router import build_default_router, resolve_specialization
+
+calls = []
+
+async def fake_list_doctors(specialization=None):
+    calls.append(("list_doctors", {"specialization": specialization}))
+    return {"doctors": [{"id": 2, "name": "Dr. Sarah Smith", "specialization": "Cardiologist"}]}
+
+async def fake_get_appointment_stats(doctor_name, query_type, filter_by=None, doctor_id=None):
+    calls.append(("get_appointment_stats", {"doctor_name": doctor_name, "query_type": query_type, "doctor_id": doctor_id}))
+    if "nobody" in doctor_name:
+        return {"error": f"Doctor '{doctor_name}' not found."}
+    return {
+        "doctor_name": "Dr. Rajesh Ahuja",
+        "period": query_type,
+        "total_appointments": 1,
+        "appointments": [{"time": "10:00", "patient": "John Doe", "reason": "Fever"}]
+    }
+
+TOOLS = {"list_doctors": fake_list_doctors, "get_appointment_stats": fake_get_appointment_stats}
+
+
+def test_resolve_specialization():
+    assert resolve_specialization("cardiologists") == "Cardiologist"
+    assert resolve_specialization("heart doctors") == "Cardiologist"
+    assert resolve_specialization("dentist") == "Dentist"
+    assert resolve_specialization("my appointments") is None
+    # Words that merely look like specializations are not guessed at
+    for word in ("specialist", "specialists", "list", "artist", "pharmacists"):
+        assert resolve_specialization(word) is None, word
+    assert resolve_specialization("pulmonologists") is None
+    assert resolve_specialization("pulmonologists", ["Pulmonologist"]) == "Pulmonologist"
+    assert resolve_specialization("general physicians", ["General Physician"]) == "General Physician"
+
+
+def test_specializations_come_from_the_doctors_on_record():
+    loads = []
+
+    async def load_specializations():
+        loads.append(1)
+        return ["Cardiologist", "Pulmonologist"]
+
+    async def run():
+        router = build_default_router(TOOLS, load_specializations)
+        calls.clear()
+        assert await router.route("find a specialist") is None
+        assert await router.route("list artists") is None
+        turn = await router.route("find pulmonologists")
+        assert calls == [("list_doctors", {"specialization": "Pulmonologist"})]
+        assert turn.intent == "list_specialists"
+        # Loaded once per TTL, and only for messages that need it
+        await router.route("stats for dr. ahuja today")
+        assert loads == [1]
+
+    asyncio.run(run())
+
+
+def test_routes_simple_intents():
+    async def run():
+        router = build_default_router(TOOLS)
+        calls.clear()
+
+        turn = await router.route("List cardiologists")
+        assert turn.tool_name == "list_doctors"
+        assert calls[-1] == ("list_doctors", {"specialization": "Cardiologist"})
+        assert "Dr. Sarah Smith" in turn.response
+
+        turn = await router.route("find me a heart doctor?")
+        assert calls[-1] == ("list_doctors", {"specialization": "Cardiologist"})
+
+        turn = await router.route("show doctors")
+        assert calls[-1] == ("list_doctors", {"specialization": None})
+
+        turn = await router.route("Stats for Dr. Ahuja this week")
+        assert calls[-1][1]["query_type"] == "this_week"
+        assert "has 1 appointment this week" in turn.response
+
+        turn = await router.route("how many patients do I have today", {"doctor": {"id": 7, "name": "Dr. Rajesh Ahuja"}})
+        assert calls[-1][1]["doctor_id"] == 7
+
+        assert router.metrics()["hits"] == 5
+        assert REGISTRY.get_sample_value("intent_router_duration_seconds_count", {"intent": "doctor_stats"}) >= 1
+
+    asyncio.run(run())
+
+
+def test_falls_back_to_llm():
+    async def run():
+        router = build_default_router(TOOLS)
+        calls.clear()
+
+        assert await router.route("Book Dr. Smith tomorrow at 10 AM for fever") is None
+        assert await router.route("find me something for my back") is None
+        # Own-stats needs a known doctor identity
+        assert await router.route("how many patients today") is None
+        assert calls == []
+
+        # Tool errors are left to the LLM to explain
+        assert await router.route("stats for dr. nobody today") is None
+
+        metrics = router.metrics()
+        assert metrics["hits"] == 0
+        assert metrics["misses"] == 3
+        assert metrics["declined"] == 1
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_resolve_specialization()
+    test_specializations_come_from_the_doctors_on_record()
+    test_routes_simple_intents()
+    test_falls_back_to_llm()
+    print("Intent router tests passed.")
@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.logging import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    TextFormatter,
+    _RequestIdFilter,
+    bind_request_id,
+    get_request_id,
+    redact,
+    redact_fields,
+)
+
+
+def make_record(msg, *args, extra=None, level=logging.INFO):
+    logger = logging.getLogger("app.test")
+    record = logger.makeRecord("app.test", level, __file__, 1, msg, args, None, extra=extra)
+    _RequestIdFilter().filter(record)
+    return record
+
+
+def test_redaction_masks_emails_phones_and_sensitive_keys():
+    assert redact("mail john.doe@example.com now") == "mail j***@example.com now"
+    assert redact("call +91 9876543210") == "call +***10"
+    assert redact("booked for 2026-01-05 at 10:00") == "booked for 2026-01-05 at 10:00"
+
+    args = {"doctor_name": "Dr. Ahuja", "patient_name": "John", "nested": [{"patient_email": "j@x.io"}]}
+    assert redact_fields(args) == {"doctor_name": "Dr. Ahuja", "patient_name": "***", "nested": [{"patient_email": "***"}]}
+
+
+def test_json_formatter_carries_request_id_and_extras():
+    with bind_request_id("req-123") as request_id:
+        assert get_request_id() == request_id == "req-123"
+        record = make_record("Tool %s finished for %s", "book_appointment", "jane@example.com",
+                             extra={"ms": 12.5, "tool_args": {"patient_name": "Jane"}})
+    assert get_request_id() is None
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["request_id"] == "req-123"
+    assert entry["msg"] == "Tool book_appointment finished for j***@example.com"
+    assert entry["ms"] == 12.5
+    assert entry["tool_args"] == {"patient_name": "***"}
+
+    unredacted = json.loads(JsonFormatter(redact_pii=False).format(record))
+    assert unredacted["tool_args"] == {"patient_name": "Jane"}
+
+
+def test_malformed_request_ids_are_replaced():
+    with bind_request_id("bad id\nwith newline") as request_id:
+        assert request_id != "bad id\nwith newline"
+        assert len(request_id) == 16
+
+    line = TextFormatter().format(make_record("hello"))
+    assert "[-] app.test: hello" in line
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record("message %d", i))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    # Formatting is left to the listener thread
+    assert handler.queue.get_nowait().msg == "message %d"
+
+
+if __name__ == "__main__":
+    test_redaction_masks_emails_phones_and_sensitive_keys()
+    test_json_formatter_carries_request_id_and_extras()
+    test_malformed_request_ids_are_replaced()
+    test_queue_handler_drops_instead_of_blocking()
+    print("Logging tests passed.")
@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from app.core.metrics import observe_llm_usage, render_metrics
+from app.core.tracing import span
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_spans_feed_latency_histograms():
+    before_tool = sample("tool_duration_seconds_count", tool="metrics_probe", outcome="ok")
+    before_errors = sample("outbound_request_errors_total", integration="slack", operation="probe")
+
+    with span("tool.metrics_probe", "tool"):
+        pass
+    try:
+        with span("slack.probe", "slack"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert sample("tool_duration_seconds_count", tool="metrics_probe", outcome="ok") == before_tool + 1
+    assert sample("outbound_request_errors_total", integration="slack", operation="probe") == before_errors + 1
+    assert sample("outbound_request_duration_seconds_count", integration="slack", operation="probe") >= 1
+
+
+def test_llm_token_counts():
+    before = sample("llm_tokens_total", provider="probe", kind="prompt")
+    observe_llm_usage("probe", {"prompt_tokens": 120, "completion_tokens": 0})
+    assert sample("llm_tokens_total", provider="probe", kind="prompt") == before + 120
+    assert sample("llm_tokens_total", provider="probe", kind="completion") == 0
+
+
+def test_exposition_format():
+    body, content_type = render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"http_request_duration_seconds" in body
+    assert b"booking_conflicts_total" in body
+
+
+if __name__ == "__main__":
+    test_spans_feed_latency_histograms()
+    test_llm_token_counts()
+    test_exposition_format()
+    print("Metrics tests passed.")
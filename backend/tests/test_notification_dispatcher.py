@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.services.notification_dispatcher import (
+    NotificationDispatcher,
+    TokenBucket,
+    build_digest_payload,
+)
+
+
+class RecordingDispatcher(NotificationDispatcher):
+    """Captures digests instead of posting them to Slack."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delivered = []
+
+    async def deliver(self, doctor_name, messages):
+        self.delivered.append((doctor_name, list(messages)))
+        return {"status": "success"}
+
+
+def test_messages_are_coalesced_per_doctor():
+    async def run():
+        dispatcher = RecordingDispatcher(window_seconds=0.05)
+        await dispatcher.start()
+        for i in range(5):
+            await dispatcher.notify("Dr. Ahuja", f"Booking {i}")
+        await dispatcher.notify("Dr. Smith", "Booking A")
+        await asyncio.sleep(0.1)
+        await dispatcher.stop()
+
+        assert sorted(dispatcher.delivered) == [
+            ("Dr. Ahuja", [f"Booking {i}" for i in range(5)]),
+            ("Dr. Smith", ["Booking A"]),
+        ]
+
+    asyncio.run(run())
+
+
+def test_urgent_message_flushes_immediately():
+    async def run():
+        dispatcher = RecordingDispatcher(window_seconds=60)
+        await dispatcher.start()
+        await dispatcher.notify("Dr. Ahuja", "Routine booking")
+        await dispatcher.notify("Dr. Ahuja", "Booking in 30 minutes", urgent=True)
+        await asyncio.sleep(0.01)
+
+        # The urgent message carries the doctor's pending digest with it
+        assert dispatcher.delivered == [("Dr. Ahuja", ["Routine booking", "Booking in 30 minutes"])]
+        await dispatcher.stop()
+
+    asyncio.run(run())
+
+
+def test_token_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        # Two tokens from the burst, two more at 20/s
+        assert time.monotonic() - start >= 0.09
+
+    asyncio.run(run())
+
+
+def test_digest_payload_caps_items():
+    payload = build_digest_payload("Dr. Ahuja", [f"Booking {i}" for i in range(15)], max_items=10)
+    blocks = payload["attachments"][0]["blocks"]
+    sections = [b for b in blocks if b["type"] == "section"]
+    assert "15 new updates" in sections[0]["text"]["text"]
+    assert len(sections) == 11
+    assert any("5 more updates" in b["elements"][0]["text"] for b in blocks if b["type"] == "context")
+
+
+if __name__ == "__main__":
+    test_messages_are_coalesced_per_doctor()
+    test_urgent_message_flushes_immediately()
+    test_token_bucket_limits_rate()
+    test_digest_payload_caps_items()
+    print("Notification dispatcher tests passed.")
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+from app.core.profiling import PROFILE_FILES, RequestProfile, profile_dir, sign_profile_request, verify_profile_request
+
+
+def signed(secret, method, path, timestamp=None):
+    timestamp = str(timestamp or int(time.time()))
+    return {"X-Profile-Timestamp": timestamp, "X-Profile-Signature": sign_profile_request(secret, timestamp, method, path)}
+
+
+def test_signature_is_required_and_scoped():
+    with patch.object(settings, "PROFILING_ENABLED", True), patch.object(settings, "PROFILING_SECRET", "s3cret"):
+        assert verify_profile_request(signed("s3cret", "POST", "/api/chat"), "POST", "/api/chat")
+        assert not verify_profile_request(signed("wrong", "POST", "/api/chat"), "POST", "/api/chat")
+        assert not verify_profile_request(signed("s3cret", "POST", "/api/chat"), "POST", "/api/slack/events")
+        assert not verify_profile_request(signed("s3cret", "POST", "/api/chat", timestamp=1), "POST", "/api/chat")
+        assert not verify_profile_request({}, "POST", "/api/chat")
+
+    with patch.object(settings, "PROFILING_ENABLED", False), patch.object(settings, "PROFILING_SECRET", "s3cret"):
+        assert not verify_profile_request(signed("s3cret", "POST", "/api/chat"), "POST", "/api/chat")
+
+
+def test_profile_records_allocations_and_saves_files():
+    async def work():
+        await asyncio.sleep(0)
+        return [str(i) * 10 for i in range(5000)]
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp, patch.object(settings, "PROFILING_OUTPUT_DIR", tmp):
+            assert RequestProfile.acquire()
+            assert not RequestProfile.acquire()
+            profile = RequestProfile("POST /api/chat")
+            try:
+                profile.start()
+                data = await work()
+                summary = profile.stop()
+                kinds = profile.save()
+            finally:
+                RequestProfile.release()
+
+            assert len(data) == 5000
+            assert summary["alloc_blocks"] >= 5000
+            assert summary["peak_kib"] > 0
+            for kind in kinds:
+                assert os.path.exists(os.path.join(profile_dir(profile.id), PROFILE_FILES[kind]))
+            with open(os.path.join(profile_dir(profile.id), PROFILE_FILES["summary"])) as f:
+                assert json.load(f)["id"] == profile.id
+
+    asyncio.run(run())
+
+
+def test_profile_ids_cannot_escape_the_output_dir():
+    assert profile_dir("../../etc") is None
+    assert profile_dir("abc123") is not None
+
+
+if __name__ == "__main__":
+    test_signature_is_required_and_scoped()
+    test_profile_records_allocations_and_saves_files()
+    test_profile_ids_cannot_escape_the_output_dir()
+    print("Profiling tests passed.")
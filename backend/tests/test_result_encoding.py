@@ -0,0 +1,78 @@
+import json
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.services.result_encoding import apply_cursor, compress_slots, encode_tool_result
+
+
+def half_hours(start, end):
+    return [f"{m // 60:02d}:{m % 60:02d}" for m in range(start * 60, end * 60, 30)]
+
+
+def test_slots_become_ranges_with_exceptions():
+    slots = [s for s in half_hours(9, 13) if s != "10:00"]
+    assert compress_slots(slots) == "09:00–12:30 every 30m, except 10:00"
+
+    # A lunch break longer than a few slots starts a new range
+    slots = half_hours(9, 12) + half_hours(14, 17)
+    assert compress_slots(slots) == "09:00–11:30, 14:00–16:30 every 30m"
+
+    assert compress_slots(["11:00"]) == "11:00"
+    assert compress_slots([]) == ""
+    # Mixed slot lengths are listed as they are
+    assert compress_slots(["09:00", "09:30", "09:50"]) == "09:00, 09:30, 09:50"
+
+
+def test_availability_result_is_smaller_and_keeps_its_meaning():
+    raw = {"doctor_id": 3, "doctor_name": "Dr. Rajesh Ahuja", "date": "2026-01-20",
+           "available_slots": [s for s in half_hours(9, 17) if s not in ("10:00", "15:30")]}
+    encoded = encode_tool_result("check_doctor_availability", raw)
+    assert encoded == {
+        "doctor_id": 3, "doctor_name": "Dr. Rajesh Ahuja", "date": "2026-01-20",
+        "free_slots": "09:00–16:30 every 30m, except 10:00, 15:30", "free_slot_count": 14,
+    }
+    assert len(encoded["free_slots"]) < len(json.dumps(raw["available_slots"])) / 2
+
+    closed = encode_tool_result("check_doctor_availability", {
+        "doctor": "Dr. A", "date": "2026-01-20", "available_slots": [], "message": "Doctor is not working on this day."
+    })
+    assert closed == {"doctor": "Dr. A", "date": "2026-01-20", "free_slot_count": 0, "message": "Doctor is not working on this day."}
+
+
+def test_record_lists_become_capped_tables_with_a_cursor():
+    appointments = [{"time": f"{9 + i // 2:02d}:{30 * (i % 2):02d}", "patient": f"P{i}", "reason": None} for i in range(12)]
+    raw = {"doctor_name": "Dr. A", "period": "today", "total_appointments": 12, "appointments": appointments}
+    encoded = encode_tool_result("get_appointment_stats", raw, max_items=5)
+    assert encoded["appointments"]["columns"] == ["time", "patient", "reason"]
+    assert encoded["appointments"]["rows"][0] == ["09:00", "P0", None]
+    assert len(encoded["appointments"]["rows"]) == 5
+    assert encoded["appointments"]["next_cursor"] == "5"
+
+    page, offset = apply_cursor(appointments, "5")
+    assert offset == 5 and page[0]["patient"] == "P5"
+    second = encode_tool_result("get_appointment_stats", {**raw, "appointments": page, "offset": offset}, max_items=5)
+    assert second["appointments"]["rows"][0][1] == "P5"
+    assert second["appointments"]["next_cursor"] == "10"
+    assert "offset" not in second
+
+    last, offset = apply_cursor(appointments, "10")
+    final = encode_tool_result("get_appointment_stats", {**raw, "appointments": last, "offset": offset}, max_items=5)
+    assert "next_cursor" not in final["appointments"]
+
+
+def test_errors_and_unknown_tools_pass_through():
+    assert encode_tool_result("list_doctors", {"error": "boom"}) == {"error": "boom"}
+    assert encode_tool_result("book_appointment", {"status": "success", "calendar_link": None}) == {"status": "success"}
+    assert encode_tool_result("list_doctors", {"doctors": []}) == {}
+    assert apply_cursor([1, 2], "nonsense") == ([1, 2], 0)
+
+
+if __name__ == "__main__":
+    test_slots_become_ranges_with_exceptions()
+    test_availability_result_is_smaller_and_keeps_its_meaning()
+    test_record_lists_become_capped_tables_with_a_cursor()
+    test_errors_and_unknown_tools_pass_through()
+    print("Result encoding tests passed.")
@@ -0,0 +1,226 @@
+import asyncio
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.llm.scripted import ScriptedProvider
+from app.services import llm_service
+from app.services.session_locks import InProcessSessionLocks, PostgresSessionLocks, SessionBusy, create_session_locks
+from test_llm_providers import in_memory_sessions
+
+
+async def run_turns(messages_by_session, latency_ms=30):
+    sessions, patches = in_memory_sessions()
+    for p in patches:
+        p.start()
+    llm_service.set_llm_provider(ScriptedProvider(latency_ms=latency_ms))
+    try:
+        await asyncio.gather(*(
+            llm_service.process_chat_message(message, session_id)
+            for session_id, message in messages_by_session
+        ))
+    finally:
+        llm_service.set_llm_provider(None)
+        for p in patches:
+            p.stop()
+    return sessions
+
+
+def test_turns_for_one_session_do_not_interleave():
+    async def run():
+        sessions = await run_turns([("double-click", "hello"), ("double-click", "hello again")])
+        history = [(m["role"], m["content"]) for m in sessions["double-click"].messages]
+        assert [role for role, _ in history] == ["user", "assistant", "user", "assistant"]
+        assert history[0][1] == "hello" and history[2][1] == "hello again"
+        assert len(llm_service.session_locks) == 0
+
+    asyncio.run(run())
+
+
+def test_different_sessions_stay_parallel():
+    async def run():
+        started = time.perf_counter()
+        await run_turns([(f"s-{i}", "hello") for i in range(5)], latency_ms=50)
+        # Serialized, five turns would take at least 250ms
+        assert time.perf_counter() - started < 0.2
+
+    asyncio.run(run())
+
+
+def test_lock_entries_are_dropped_when_idle():
+    async def run():
+        locks = InProcessSessionLocks()
+        order = []
+
+        async def turn(name):
+            async with locks.hold("s1"):
+                order.append(f"{name}-start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name}-end")
+
+        await asyncio.gather(turn("a"), turn("b"))
+        assert order == ["a-start", "a-end", "b-start", "b-end"]
+        assert len(locks) == 0
+
+    asyncio.run(run())
+
+
+def test_stuck_holder_does_not_block_the_session_forever():
+    async def run():
+        locks = InProcessSessionLocks()
+        release = asyncio.Event()
+
+        async def stuck_turn():
+            async with locks.hold("s1"):
+                await release.wait()
+
+        holder = asyncio.ensure_future(stuck_turn())
+        await asyncio.sleep(0)
+        try:
+            async with locks.hold("s1", timeout=0.02):
+                assert False, "should not get the lock"
+        except SessionBusy as e:
+            assert e.status_code == 429 and e.retry_after == 1
+        release.set()
+        await holder
+        assert len(locks) == 0
+
+    asyncio.run(run())
+
+
+def test_lock_wait_counts_against_the_turn_deadline():
+    async def run():
+        locks = InProcessSessionLocks()
+        sessions, patches = in_memory_sessions()
+        for p in patches:
+            p.start()
+        llm_service.set_llm_provider(ScriptedProvider())
+        try:
+            with patch.object(llm_service, "session_locks", locks), \
+                    patch.object(settings, "TURN_DEADLINE_SECONDS", 0.05):
+                async with locks.hold("busy"):
+                    started = time.perf_counter()
+                    try:
+                        await llm_service.process_chat_message("hello", "busy")
+                        assert False, "expected SessionBusy"
+                    except SessionBusy:
+                        pass
+                    assert time.perf_counter() - started < 0.5
+        finally:
+            llm_service.set_llm_provider(None)
+            for p in patches:
+                p.stop()
+
+    asyncio.run(run())
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class AdvisoryLockDb:
+    """Stands in for the engine: the advisory lock is held elsewhere for `busy_polls` tries."""
+
+    def __init__(self, busy_polls, unlock_error=None):
+        self.busy_polls = busy_polls
+        self.unlock_error = unlock_error
+        self.statements = []
+        self.invalidated = False
+
+    def connect(self):
+        db = self
+
+        class Connection:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement, params):
+                db.statements.append(str(statement).split("(")[0].split()[-1])
+                if "pg_try_advisory_lock" in str(statement):
+                    db.busy_polls -= 1
+                    return FakeResult(db.busy_polls < 0)
+                if db.unlock_error:
+                    raise db.unlock_error
+                return FakeResult(True)
+
+            async def invalidate(self):
+                db.invalidated = True
+
+        return Connection()
+
+
+def test_postgres_lock_polls_within_a_bounded_wait():
+    async def run():
+        db = AdvisoryLockDb(busy_polls=2)
+        async with PostgresSessionLocks(db).hold("s1", timeout=5):
+            pass
+        assert db.statements == ["pg_try_advisory_lock"] * 3 + ["pg_advisory_unlock"]
+
+        stuck = AdvisoryLockDb(busy_polls=10 ** 6)
+        started = time.perf_counter()
+        try:
+            async with PostgresSessionLocks(stuck).hold("s1", timeout=0.1):
+                assert False, "should not get the lock"
+        except SessionBusy:
+            pass
+        assert time.perf_counter() - started < 0.5
+        assert "pg_advisory_unlock" not in stuck.statements
+
+    asyncio.run(run())
+
+
+def test_connection_is_discarded_when_unlock_is_cancelled():
+    async def run():
+        db = AdvisoryLockDb(busy_polls=0, unlock_error=asyncio.CancelledError())
+        try:
+            async with PostgresSessionLocks(db).hold("s1", timeout=5):
+                pass
+            assert False, "expected CancelledError"
+        except asyncio.CancelledError:
+            pass
+        assert db.invalidated
+
+    asyncio.run(run())
+
+
+def test_postgres_locks_use_their_own_pool():
+    from app.core.database import engine
+
+    with patch.object(settings, "DATABASE_URL", "postgresql+asyncpg://u:p@localhost/db"):
+        locks = create_session_locks("postgres")
+    assert locks._engine is not engine
+    assert locks._engine.sync_engine.pool.size() == settings.SESSION_LOCK_POOL_SIZE
+
+
+def test_unknown_backend_is_rejected():
+    try:
+        create_session_locks("redis")
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "memory" in str(e)
+
+
+if __name__ == "__main__":
+    test_turns_for_one_session_do_not_interleave()
+    test_different_sessions_stay_parallel()
+    test_lock_entries_are_dropped_when_idle()
+    test_stuck_holder_does_not_block_the_session_forever()
+    test_lock_wait_counts_against_the_turn_deadline()
+    test_postgres_lock_polls_within_a_bounded_wait()
+    test_connection_is_discarded_when_unlock_is_cancelled()
+    test_postgres_locks_use_their_own_pool()
+    test_unknown_backend_is_rejected()
+    print("Session lock tests passed.")
@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.services.slack_events import EventDeduplicator, SlackEventQueue, QueueFullError
+
+
+def test_deduplicator_drops_retries():
+    dedup = EventDeduplicator(ttl_seconds=60)
+    assert dedup.check_and_mark("Ev1")
+    assert not dedup.check_and_mark("Ev1")
+    assert dedup.check_and_mark("Ev2")
+
+    # A forgotten ID (e.g. rejected under backpressure) is accepted again
+    dedup.forget("Ev1")
+    assert dedup.check_and_mark("Ev1")
+
+
+def test_deduplicator_expires_entries():
+    dedup = EventDeduplicator(ttl_seconds=0)
+    assert dedup.check_and_mark("Ev1")
+    assert dedup.check_and_mark("Ev1")
+
+    bounded = EventDeduplicator(ttl_seconds=60, max_entries=2)
+    for event_id in ["Ev1", "Ev2", "Ev3"]:
+        bounded.check_and_mark(event_id)
+    assert len(bounded) == 2
+
+
+def test_queue_backpressure_and_drain():
+    async def run():
+        handled = []
+        release = asyncio.Event()
+
+        async def handler(event):
+            await release.wait()
+            handled.append(event["id"])
+
+        queue = SlackEventQueue(handler, maxsize=2, concurrency=1)
+        await queue.start()
+
+        queue.submit({"id": 1})
+        await asyncio.sleep(0)  # worker picks up event 1 and blocks
+        queue.submit({"id": 2})
+        queue.submit({"id": 3})
+
+        try:
+            queue.submit({"id": 4})
+            assert False, "Expected QueueFullError"
+        except QueueFullError:
+            pass
+
+        release.set()
+        await queue.stop(timeout=5)
+        assert handled == [1, 2, 3]
+        assert not queue.running
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_deduplicator_drops_retries()
+    test_deduplicator_expires_entries()
+    test_queue_backpressure_and_drain()
+    print("Slack event ingestion tests passed.")
@@ -0,0 +1,142 @@
+import asyncio
+import gc
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.api import slack
+from app.core.config import settings
+from app.services.slack_reports import parse_report_command, build_report_response
+
+posted = []
+
+
+class FakeRequest:
+    def __init__(self, form):
+        self._form = form
+        self.headers = {}
+
+    async def form(self):
+        return self._form
+
+
+class RecordingClient:
+    """Stands in for httpx.AsyncClient when posting to response_url."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def post(self, url, json):
+        posted.append((url, json))
+
+
+def slow_report(delay, error=None):
+    async def build_slash_report(user_id, text):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return {"response_type": "ephemeral", "text": "3 appointments today"}
+    return build_slash_report
+
+
+def test_parse_report_command():
+    assert parse_report_command("today") == ("today", None)
+    assert parse_report_command("Week") == ("this_week", None)
+    assert parse_report_command("tomorrow  fever and cough") == ("tomorrow", "fever and cough")
+    assert parse_report_command("") is None
+    assert parse_report_command("next month") is None
+
+
+def test_build_report_response():
+    stats = {
+        "doctor_name": "Dr. Ahuja",
+        "period": "today",
+        "total_appointments": 2,
+        "appointments": [
+            {"time": "10:00", "patient": "John Doe", "reason": "Fever"},
+            {"time": "11:30", "patient": "Jane Roe", "reason": None},
+        ]
+    }
+    response = build_report_response(stats, "fever")
+    assert response["response_type"] == "ephemeral"
+    assert "*Today* for *Dr. Ahuja*: 2 appointments matching _fever_" == response["text"]
+    body = response["blocks"][1]["text"]["text"]
+    assert "• 10:00 – John Doe (Fever)" in body
+    assert "Jane Roe (Not specified)" in body
+
+
+def test_build_report_response_empty_and_error():
+    empty = build_report_response({"doctor_name": "Dr. Ahuja", "period": "this_week", "total_appointments": 0, "appointments": []})
+    assert "No appointments found" in empty["blocks"][1]["text"]["text"]
+
+    error = build_report_response({"error": "Doctor 'X' not found."})
+    assert error["text"].endswith("Doctor 'X' not found.")
+
+
+def run_slow_command(delay, drain_timeout):
+    async def run():
+        form = {"user_id": "U1", "text": "today", "response_url": "https://hooks.slack.test/r"}
+        with patch.object(settings, "SLACK_SIGNING_SECRET", ""), \
+                patch.object(settings, "SLACK_COMMAND_TIMEOUT_SECONDS", 0.01), \
+                patch.object(slack, "build_slash_report", slow_report(delay)), \
+                patch.object(slack.httpx, "AsyncClient", RecordingClient):
+            ack = await slack.slack_commands(FakeRequest(form))
+            assert ack["text"].startswith("⏳")
+            assert len(slack.late_reports) == 1
+            gc.collect()  # Nothing but late_reports references the delivery task
+            await slack.drain_late_reports(timeout=drain_timeout)
+        assert not slack.late_reports
+
+    posted.clear()
+    asyncio.run(run())
+
+
+def test_late_report_is_kept_alive_and_drained_at_shutdown():
+    run_slow_command(delay=0.05, drain_timeout=5)
+    assert posted == [("https://hooks.slack.test/r", {"response_type": "ephemeral", "text": "3 appointments today"})]
+
+
+def test_drain_gives_up_on_stuck_reports():
+    run_slow_command(delay=10, drain_timeout=0.05)
+    assert posted == []
+
+
+def test_failed_reports_are_answered_without_internals():
+    error = ConnectionError('relation "appointments" does not exist')
+    form = {"user_id": "U1", "text": "today", "response_url": "https://hooks.slack.test/r"}
+
+    async def run(delay, timeout):
+        with patch.object(settings, "SLACK_SIGNING_SECRET", ""), \
+                patch.object(settings, "SLACK_COMMAND_TIMEOUT_SECONDS", timeout), \
+                patch.object(slack, "build_slash_report", slow_report(delay, error)), \
+                patch.object(slack.httpx, "AsyncClient", RecordingClient):
+            ack = await slack.slack_commands(FakeRequest(form))
+            await slack.drain_late_reports(timeout=5)
+            return ack
+
+    posted.clear()
+    # Failing inside Slack's window: an ephemeral reply, not a 500
+    assert asyncio.run(run(delay=0, timeout=1)) == slack.REPORT_FAILED
+    # Failing after it: the same message goes to response_url
+    assert asyncio.run(run(delay=0.05, timeout=0.01))["text"].startswith("⏳")
+    assert posted == [("https://hooks.slack.test/r", slack.REPORT_FAILED)]
+    assert "relation" not in slack.REPORT_FAILED["text"]
+
+
+if __name__ == "__main__":
+    test_parse_report_command()
+    test_build_report_response()
+    test_build_report_response_empty_and_error()
+    test_late_report_is_kept_alive_and_drained_at_shutdown()
+    test_drain_gives_up_on_stuck_reports()
+    test_failed_reports_are_answered_without_internals()
+    print("Slack report tests passed.")
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import subprocess
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.config import settings
+from app.services import warmup
+
+# Generous against a ~0.8s measurement, tight enough to catch an SDK creeping back into module scope
+IMPORT_BUDGET_SECONDS = 2.5
+LAZY_MODULES = ["google.generativeai", "googleapiclient", "google_auth_oauthlib", "google_auth_httplib2"]
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def test_app_imports_within_budget_without_heavy_sdks():
+    # Fresh interpreter: this process has already imported half the app
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60, check=True
+    )
+    probe = json.loads(out.stdout.strip().splitlines()[-1])
+    assert probe["loaded"] == [], f"imported at startup: {probe['loaded']}"
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS, f"import app.main took {probe['seconds']:.2f}s"
+
+
+def test_failing_or_slow_steps_do_not_block_startup():
+    ran = []
+
+    async def ok():
+        ran.append("ok")
+
+    async def broken():
+        raise ConnectionError("database is down")
+
+    async def stuck():
+        await asyncio.sleep(10)
+
+    async def run():
+        with patch.object(settings, "WARMUP_TIMEOUT_SECONDS", 0.05):
+            return await warmup.warm_up({"ok": ok, "broken": broken, "stuck": stuck})
+
+    assert asyncio.run(run()) == {"ok": "ok", "broken": "failed", "stuck": "timeout"}
+    assert ran == ["ok"]
+
+
+def test_calendar_warmup_never_prompts_for_consent():
+    from app.services.google_calendar import CalendarService
+
+    service = CalendarService()
+    service.token_path = os.path.join(BACKEND_DIR, "missing-token.json")
+    # No saved token: skip rather than start the interactive OAuth flow
+    assert service.warm() is False
+    assert service.service is None
+
+
+if __name__ == "__main__":
+    test_app_imports_within_budget_without_heavy_sdks()
+    test_failing_or_slow_steps_do_not_block_startup()
+    test_calendar_warmup_never_prompts_for_consent()
+    print("Startup tests passed.")
@@ -0,0 +1,88 @@
+import asyncio
+import inspect
+import sys
+import os
+from typing import Optional
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.single_flight import coalesced
+from app.services import mcp_tools
+
+calls = []
+
+
+@coalesced
+async def report(doctor_name: str, query_type: str = "today", doctor_id: Optional[int] = None):
+    """Stands in for get_appointment_stats."""
+    calls.append((doctor_name, query_type))
+    await asyncio.sleep(0.02)
+    if doctor_name == "missing":
+        raise LookupError("no such doctor")
+    return {"doctor_name": doctor_name, "appointments": [{"time": "09:00"}]}
+
+
+def coalesced_count():
+    return REGISTRY.get_sample_value("tool_calls_coalesced_total", {"tool": "report"}) or 0.0
+
+
+def test_identical_concurrent_calls_share_one_query():
+    async def run():
+        calls.clear()
+        before = coalesced_count()
+        results = await asyncio.gather(
+            report("Dr. Ahuja", "today"),
+            report("Dr. Ahuja"),                        # Defaults filled in: same call
+            report(doctor_name="Dr. Ahuja", query_type="today"),
+            report("Dr. Ahuja", "this_week"),
+        )
+        assert calls == [("Dr. Ahuja", "today"), ("Dr. Ahuja", "this_week")]
+        assert coalesced_count() == before + 2
+        assert results[0] == results[1] == results[2]
+        results[1]["appointments"].clear()  # Joiners get their own copy
+        assert results[0]["appointments"] and results[2]["appointments"]
+
+        # Nothing is cached once the call finishes
+        await report("Dr. Ahuja", "today")
+        assert len(calls) == 3
+
+    asyncio.run(run())
+
+
+def test_failures_reach_every_caller():
+    async def run():
+        results = await asyncio.gather(report("missing"), report("missing"), return_exceptions=True)
+        assert all(isinstance(r, LookupError) for r in results)
+
+    asyncio.run(run())
+
+
+def test_coalescing_can_be_turned_off():
+    async def run():
+        calls.clear()
+        with patch.object(settings, "TOOL_COALESCING_ENABLED", False):
+            await asyncio.gather(report("Dr. Rao"), report("Dr. Rao"))
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_read_only_tools_keep_their_signatures():
+    # The LLM provider builds tool declarations from these
+    for tool in (mcp_tools.check_doctor_availability, mcp_tools.get_appointment_stats, mcp_tools.list_doctors):
+        assert inspect.signature(tool) == inspect.signature(tool.__wrapped__)
+        assert tool.__name__ == tool.__wrapped__.__name__ and tool.__doc__
+    assert not hasattr(mcp_tools.book_appointment, "__wrapped__")
+
+
+if __name__ == "__main__":
+    test_identical_concurrent_calls_share_one_query()
+    test_failures_reach_every_caller()
+    test_coalescing_can_be_turned_off()
+    test_read_only_tools_keep_their_signatures()
+    print("Tool coalescing tests passed.")
@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+import json
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.config import settings
+from app.core.tools import AVAILABLE_TOOLS, TOOL_DECLARATIONS, TOOLS_SCHEMA, tool_arguments
+from app.llm.base import ChatSession, LLMProvider, LLMResponse
+from app.services import llm_service
+from test_llm_providers import in_memory_sessions
+
+
+class RecordingProvider(LLMProvider):
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.inputs = []
+
+    def start_chat(self, history):
+        provider = self
+
+        class Chat(ChatSession):
+            async def send_message(self, content):
+                provider.inputs.append(content)
+                return LLMResponse(text="Hi!")
+
+        return Chat()
+
+
+def test_declarations_match_the_tool_signatures():
+    assert [d["name"] for d in TOOL_DECLARATIONS] == list(AVAILABLE_TOOLS)
+    for declaration in TOOL_DECLARATIONS:
+        params = inspect.signature(AVAILABLE_TOOLS[declaration["name"]]).parameters
+        schema = declaration["parameters"]
+        assert set(schema["properties"]) == set(params), declaration["name"]
+        assert set(schema["required"]) <= set(schema["properties"])
+        for name, param in params.items():
+            if param.default is inspect.Parameter.empty:
+                assert name in schema["required"], f"{declaration['name']}.{name} must be required"
+    assert TOOLS_SCHEMA[0]["function"] is TOOL_DECLARATIONS[0]
+
+
+def test_mcp_server_and_gemini_use_the_same_declarations():
+    from app.llm.gemini import compile_tools
+    from app.mcp.server import MCP_TOOLS, call_tool
+
+    assert [(t.name, t.inputSchema) for t in MCP_TOOLS] == [(d["name"], d["parameters"]) for d in TOOL_DECLARATIONS]
+    compiled = compile_tools(TOOL_DECLARATIONS)
+    assert [f.name for f in compiled.function_declarations] == list(AVAILABLE_TOOLS)
+    booking = compiled.function_declarations[1]
+    assert "appointment_time_str" in booking.parameters.properties
+
+    async def run():
+        unknown = await call_tool("drop_tables", {})
+        invalid = await call_tool("book_appointment", {"doctor_id": 1, "made_up": True})
+        return json.loads(unknown[0].text), json.loads(invalid[0].text)
+
+    unknown, invalid = asyncio.run(run())
+    assert unknown == {"error": "Unknown tool: drop_tables"}
+    assert invalid["error"].startswith("Invalid arguments for book_appointment")
+    assert tool_arguments("list_doctors", {"specialization": "heart", "made_up": 1}) == {"specialization": "heart"}
+
+
+def test_date_is_sent_per_turn_not_baked_into_the_prompt():
+    assert f"{datetime.now():%Y-%m-%d}" not in llm_service.SYSTEM_INSTRUCTION
+    assert llm_service.format_date_context(datetime(2026, 1, 20, 23, 59)) == "[Today: 2026-01-20, Tuesday]"
+
+    async def run():
+        sessions, patches = in_memory_sessions()
+        for p in patches:
+            p.start()
+        provider = RecordingProvider()
+        llm_service.set_llm_provider(provider)
+        days = iter(["[Today: 2026-01-20, Tuesday]", "[Today: 2026-01-21, Wednesday]"])
+        try:
+            with patch.object(settings, "INTENT_ROUTER_ENABLED", False), \
+                    patch.object(llm_service, "format_date_context", lambda: next(days)):
+                await llm_service.process_chat_message("hello", "overnight")
+                await llm_service.process_chat_message("hello again", "overnight")
+        finally:
+            llm_service.set_llm_provider(None)
+            for p in patches:
+                p.stop()
+
+        # Same provider (and system prompt) across midnight; only the note changes
+        assert provider.inputs == ["[Today: 2026-01-20, Tuesday]\nhello", "[Today: 2026-01-21, Wednesday]\nhello again"]
+        assert all("[Today:" not in (m["content"] or "") for m in sessions["overnight"].messages)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_declarations_match_the_tool_signatures()
+    test_mcp_server_and_gemini_use_the_same_declarations()
+    test_date_is_sent_per_turn_not_baked_into_the_prompt()
+    print("Tool declaration tests passed.")
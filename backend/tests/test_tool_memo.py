@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import os
+import time
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.llm.base import ChatSession, FunctionCall, LLMProvider, LLMResponse
+from app.services import llm_service
+from app.services.tool_memo import ToolMemo
+from test_llm_providers import in_memory_sessions
+
+TTLS = {"list_doctors": 60, "check_doctor_availability": 60, "get_appointment_stats": 60}
+
+
+class CountingTool:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self, **kwargs):
+        self.calls += 1
+        return dict(self.result)
+
+
+class RepeatProvider(LLMProvider):
+    """Asks for list_doctors twice with the same arguments, then answers."""
+
+    name = "repeat"
+
+    def start_chat(self, history):
+        class Chat(ChatSession):
+            sent = 0
+
+            async def send_message(self, content):
+                return LLMResponse(function_calls=[FunctionCall("list_doctors", {"specialization": "heart"})])
+
+            async def send_function_response(self, name, result):
+                self.sent += 1
+                if self.sent < 2:
+                    return await self.send_message("")
+                return LLMResponse(text="Dr. Ahuja is a cardiologist.")
+
+        return Chat()
+
+
+def test_repeats_are_served_within_a_turn_and_across_turns():
+    async def run():
+        memo = ToolMemo(TTLS)
+        tool = CountingTool({"doctors": [{"id": 1, "name": "Dr. Ahuja"}]})
+
+        first, hit = await memo.call("s", "t1", "list_doctors", tool, {"specialization": "heart"})
+        assert not hit
+        again, hit = await memo.call("s", "t1", "list_doctors", tool, {"specialization": "heart"})
+        assert hit and again == first
+        again["doctors"].clear()  # Callers cannot corrupt the memo
+        cached, hit = await memo.call("s", "t2", "list_doctors", tool, {"specialization": "heart"})
+        assert hit and cached["doctors"]
+
+        # Other arguments and other sessions miss
+        await memo.call("s", "t2", "list_doctors", tool, {"specialization": "skin"})
+        result, hit = await memo.call("other", "t3", "list_doctors", tool, {"specialization": "heart"})
+        assert not hit and result["doctors"]
+        assert tool.calls == 3
+
+    asyncio.run(run())
+
+
+def test_expired_entries_only_serve_their_own_turn():
+    async def run():
+        memo = ToolMemo({"check_doctor_availability": 0})
+        tool = CountingTool({"doctor_id": 1, "date": "2026-01-21", "available_slots": ["09:00"]})
+        args = {"doctor_id": 1, "date_str": "2026-01-21"}
+        await memo.call("s", "t1", "check_doctor_availability", tool, args)
+        time.sleep(0.001)
+        assert (await memo.call("s", "t1", "check_doctor_availability", tool, args))[1]
+        assert not (await memo.call("s", "t2", "check_doctor_availability", tool, args))[1]
+        assert tool.calls == 2
+
+    asyncio.run(run())
+
+
+def test_bookings_invalidate_and_writes_bypass():
+    async def run():
+        memo = ToolMemo(TTLS)
+        day1 = CountingTool({"doctor_id": 1, "date": "2026-01-21", "available_slots": ["09:00"]})
+        day2 = CountingTool({"doctor_id": 1, "date": "2026-01-22", "available_slots": ["09:00"]})
+        stats = CountingTool({"doctor_id": 1, "doctor_name": "Dr. Ahuja", "appointments": []})
+        await memo.call("a", "t", "check_doctor_availability", day1, {"doctor_id": 1, "date_str": "2026-01-21"})
+        await memo.call("b", "t", "check_doctor_availability", day2, {"doctor_id": 1, "date_str": "2026-01-22"})
+        await memo.call("b", "t", "get_appointment_stats", stats, {"doctor_id": 1, "query_type": "today"})
+        assert len(memo) == 3
+
+        memo.invalidate_booking(1, "2026-01-21")
+        # Only the booked day and the doctor's reports go, in every session
+        assert len(memo) == 1
+        assert (await memo.call("b", "t", "check_doctor_availability", day2, {"doctor_id": 1, "date_str": "2026-01-22"}))[1]
+
+        book = CountingTool({"status": "success", "appointment_id": 1})
+        failing = CountingTool({"error": "Doctor 'X' not found."})
+        for _ in range(2):
+            await memo.call("a", "t", "book_appointment", book, {"doctor_id": 1})
+            await memo.call("a", "t", "list_doctors", failing, {"specialization": "x"})
+        assert book.calls == 2 and failing.calls == 2
+
+    asyncio.run(run())
+
+
+def test_agent_loop_skips_repeated_read_only_calls():
+    async def run():
+        sessions, patches = in_memory_sessions()
+        for p in patches:
+            p.start()
+        llm_service.set_llm_provider(RepeatProvider())
+        tool = CountingTool({"doctors": [{"id": 1, "name": "Dr. Ahuja"}]})
+        labels = {"tool": "list_doctors", "outcome": "hit"}
+        before = REGISTRY.get_sample_value("tool_memo_lookups_total", labels) or 0.0
+        try:
+            with patch.object(settings, "INTENT_ROUTER_ENABLED", False), \
+                    patch.object(llm_service, "tool_memo", ToolMemo(TTLS)), \
+                    patch.dict(llm_service.AVAILABLE_TOOLS, {"list_doctors": tool}):
+                result = await llm_service.process_chat_message("Which heart doctors are there?")
+        finally:
+            llm_service.set_llm_provider(None)
+            for p in patches:
+                p.stop()
+
+        assert result["response"] == "Dr. Ahuja is a cardiologist."
+        assert tool.calls == 1
+        assert REGISTRY.get_sample_value("tool_memo_lookups_total", labels) == before + 1
+        responses = [m for m in sessions[result["session_id"]].messages if m.get("tool_response")]
+        assert len(responses) == 2
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_repeats_are_served_within_a_turn_and_across_turns()
+    test_expired_entries_only_serve_their_own_turn()
+    test_bookings_invalidate_and_writes_bypass()
+    test_agent_loop_skips_repeated_read_only_calls()
+    print("Tool memo tests passed.")
@@ -0,0 +1,61 @@
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from app.core.tracing import current_trace, record_span, span, trace_turn
+
+
+def test_spans_are_summed_per_category():
+    async def run():
+        with trace_turn("turn") as trace:
+            with span("llm.send_message", "llm"):
+                await asyncio.sleep(0.01)
+            with span("tool.list_doctors", "tool"):
+                record_span("db.query", "db", 0.0)
+            with span("llm.send_function_response", "llm"):
+                pass
+
+        breakdown = trace.breakdown()
+        assert breakdown["llm"]["count"] == 2
+        assert breakdown["llm"]["ms"] >= 9
+        assert breakdown["tool"]["count"] == 1
+        assert breakdown["db"]["count"] == 1
+        assert current_trace() is None
+
+        header = trace.server_timing()
+        assert header.startswith('llm;dur=')
+        assert 'desc="2 calls"' in header
+        assert header.split(", ")[-1].startswith("total;dur=")
+
+    asyncio.run(run())
+
+
+def test_spans_outside_a_trace_are_ignored():
+    with span("tool.list_doctors", "tool"):
+        pass
+    assert current_trace() is None
+
+
+def test_spans_follow_concurrent_tasks():
+    async def turn(name, delay):
+        with trace_turn(name) as trace:
+            with span("llm.send_message", "llm"):
+                await asyncio.sleep(delay)
+            return trace
+
+    async def run():
+        first, second = await asyncio.gather(turn("a", 0.02), turn("b", 0.0))
+        assert len(first.spans) == 1 and len(second.spans) == 1
+        assert first.spans[0]["ms"] > second.spans[0]["ms"]
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_spans_are_summed_per_category()
+    test_spans_outside_a_trace_are_ignored()
+    test_spans_follow_concurrent_tasks()
+    print("Tracing tests passed.")